@@ -1,14 +1,84 @@
+from typing import List, Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     cassandra_host: str = "localhost"
     cassandra_port: int = 9042
     cassandra_keyspace: str = "experimentation"
+    # Comma separated; falls back to cassandra_host when empty
+    cassandra_contact_points: str = ""
+    cassandra_protocol_version: int = 4
+    # Data centre whose replicas are preferred; None lets the driver pick the first one it sees
+    cassandra_local_dc: Optional[str] = None
+    cassandra_used_hosts_per_remote_dc: int = 0
+    cassandra_token_aware: bool = True
+    cassandra_executor_threads: int = 2
+    cassandra_connect_timeout: float = 5.0
+    cassandra_request_timeout: float = 10.0
+    # 0 disables speculative execution; otherwise the delay before retrying an idempotent query on another host
+    cassandra_speculative_delay_ms: int = 0
+    cassandra_speculative_max_attempts: int = 2
+    # "auto" (driver picks lz4 or snappy if installed), "lz4", "snappy" or "none"
+    cassandra_compression: str = "auto"
+    # Named execution profiles (app.db.cassandra.PROFILES): a consistency level name, a timeout in
+    # seconds and a retry policy, "default" or "fallthrough" (never retry)
+    cassandra_hot_read_consistency: str = "LOCAL_ONE"
+    cassandra_hot_read_timeout: float = 2.0
+    cassandra_hot_read_retry: str = "default"
+    cassandra_config_read_consistency: str = "LOCAL_QUORUM"
+    cassandra_config_read_timeout: float = 5.0
+    cassandra_config_read_retry: str = "default"
+    cassandra_sample_write_consistency: str = "LOCAL_QUORUM"
+    cassandra_sample_write_timeout: float = 2.0
+    cassandra_sample_write_retry: str = "default"
+    # Also used for statements run without a profile, including all cqlengine queries
+    cassandra_admin_consistency: str = "QUORUM"
+    cassandra_admin_timeout: float = 10.0
+    cassandra_admin_retry: str = "default"
     otel_enabled: bool = True
     otel_service_name: str = "prayog-api-service"
     otel_exporter_otlp_endpoint: str = "http://localhost:4317"
+    allocation_batch_max_size: int = 100000
+    # Partitions per experiment and day in samples_by_experiment_day; fixed once samples are written
+    sample_shard_count: int = 16
+    # How many days before today sample listings look back
+    sample_timeline_lookback_days: int = 30
+    sample_batch_max_size: int = 1000
+    # Statements per single-partition unlogged batch, and batches in flight at once, when ingesting
+    sample_batch_partition_size: int = 20
+    sample_batch_concurrency: int = 64
+    # Keys resolved and completed per streamed chunk of a bulk completion
+    sample_complete_chunk_size: int = 200
+    # Answer sample writes once queued and write them from a background task
+    sample_write_behind: bool = False
+    sample_buffer_max_size: int = 10000
+    # Samples per flush, and seconds the first queued sample waits for a full flush
+    sample_buffer_flush_size: int = 500
+    sample_buffer_flush_interval: float = 0.05
+    # Seconds a write waits for room in a full buffer before it is shed with a 503
+    sample_buffer_put_timeout: float = 0.1
+    sample_buffer_max_attempts: int = 5
+    sample_buffer_drain_timeout: float = 30.0
+    # With write-behind, log buffered samples under this directory, one subdirectory per worker process,
+    # and replay them at startup
+    sample_log_dir: Optional[str] = None
+    sample_log_segment_bytes: int = 64 * 1024 * 1024
+    # Width of the time windows experiment results are counted in; fixed once counts are written
+    result_window_minutes: int = 60
+    # Partitions each experiment's counters are spread over; reads cover this many, so never lower it
+    result_counter_shards: int = 8
+    # Seconds between full reloads of the in-memory experiment configuration; 0 turns them off
+    config_reload_interval_seconds: float = 60.0
+    migration_lock_ttl_seconds: int = 120
+    migration_lock_timeout_seconds: int = 300
 
     class Config:
         env_file = ".env"
 
+    @property
+    def cassandra_hosts(self) -> List[str]:
+        hosts = [host.strip() for host in self.cassandra_contact_points.split(",") if host.strip()]
+        return hosts or [self.cassandra_host]
+
 settings = Settings()
\ No newline at end of file
@@ -1,7 +1,168 @@
-from cassandra.cluster import Cluster
+import asyncio
+from typing import Any, List, Optional, Sequence, Union
+
+import logging
+
+from cassandra import ConsistencyLevel
+from cassandra.cluster import EXEC_PROFILE_DEFAULT, Cluster, ExecutionProfile, ResponseFuture, Session
+from cassandra.policies import (
+    ConstantSpeculativeExecutionPolicy,
+    DCAwareRoundRobinPolicy,
+    FallthroughRetryPolicy,
+    HostDistance,
+    RetryPolicy,
+    TokenAwarePolicy
+)
+from cassandra.query import Statement, dict_factory
 from cassandra.cqlengine import connection
 from cassandra.auth import PlainTextAuthProvider
-from app.config import settings
+from app.config import Settings, settings
+
+logger = logging.getLogger(__name__)
+
+# Named execution profiles; each one's consistency, timeout and retry policy come from
+# the cassandra_<profile>_* settings
+HOT_READ = "hot_read"          # allocation hot path: sticky sample lookups
+CONFIG_READ = "config_read"    # experiment, bucket and criteria configuration
+SAMPLE_WRITE = "sample_write"  # recording and completing samples
+ADMIN = "admin"                # control-plane listings and schema changes
+PROFILES = (HOT_READ, CONFIG_READ, SAMPLE_WRITE, ADMIN)
+
+RETRY_POLICIES = {
+    "default": RetryPolicy,
+    "fallthrough": FallthroughRetryPolicy,
+}
+
+
+def build_load_balancing_policy(config: Settings):
+    """DC-aware round robin over the local data centre, token-aware unless disabled"""
+    policy = DCAwareRoundRobinPolicy(
+        local_dc=config.cassandra_local_dc,
+        used_hosts_per_remote_dc=config.cassandra_used_hosts_per_remote_dc
+    )
+    return TokenAwarePolicy(policy) if config.cassandra_token_aware else policy
+
+
+def _consistency_level(name: str) -> int:
+    try:
+        return ConsistencyLevel.name_to_value[name.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown consistency level {name}") from None
+
+
+def _retry_policy(name: str) -> RetryPolicy:
+    try:
+        return RETRY_POLICIES[name.lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown retry policy {name}, expected one of {sorted(RETRY_POLICIES)}") from None
+
+
+def _build_profile(config: Settings, consistency: str, timeout: float, retry: str) -> ExecutionProfile:
+    speculative_policy = None
+    if config.cassandra_speculative_delay_ms > 0:
+        speculative_policy = ConstantSpeculativeExecutionPolicy(
+            config.cassandra_speculative_delay_ms / 1000.0,
+            config.cassandra_speculative_max_attempts
+        )
+    return ExecutionProfile(
+        load_balancing_policy=build_load_balancing_policy(config),
+        retry_policy=_retry_policy(retry),
+        consistency_level=_consistency_level(consistency),
+        request_timeout=timeout,
+        speculative_execution_policy=speculative_policy,
+        row_factory=dict_factory
+    )
+
+
+def build_default_profile(config: Settings) -> ExecutionProfile:
+    """
+    The profile of statements run without a name, which includes every cqlengine query
+
+    cqlengine cannot select a profile, so control-plane writes made through it get the
+    admin consistency and retry policy here.
+    """
+    return _build_profile(config, config.cassandra_admin_consistency, config.cassandra_request_timeout,
+                          config.cassandra_admin_retry)
+
+
+def build_profile(config: Settings, name: str) -> ExecutionProfile:
+    """The named execution profile, configured by the cassandra_<name>_consistency/_timeout/_retry settings"""
+    if name not in PROFILES:
+        raise ValueError(f"Unknown execution profile {name}")
+    return _build_profile(config, getattr(config, f"cassandra_{name}_consistency"),
+                          getattr(config, f"cassandra_{name}_timeout"), getattr(config, f"cassandra_{name}_retry"))
+
+
+def _compression(config: Settings):
+    value = config.cassandra_compression.lower()
+    if value == "auto":
+        return True
+    if value in ("none", "off", "false", ""):
+        return False
+    return value
+
+
+def build_cluster(config: Settings) -> Cluster:
+    """
+    A Cluster configured from settings: contact points, routing, timeouts and compression
+
+    Protocol v3+ multiplexes up to 32k concurrent requests over a single connection per
+    host, so the driver has no pool size to tune.
+    """
+    # auth_provider = PlainTextAuthProvider(
+    #     username='your_username',
+    #     password='your_password'
+    # )
+    cluster = Cluster(
+        config.cassandra_hosts,
+        port=config.cassandra_port,
+        # auth_provider=auth_provider,
+        protocol_version=config.cassandra_protocol_version,
+        execution_profiles={
+            EXEC_PROFILE_DEFAULT: build_default_profile(config),
+            **{name: build_profile(config, name) for name in PROFILES}
+        },
+        compression=_compression(config),
+        connect_timeout=config.cassandra_connect_timeout,
+        executor_threads=config.cassandra_executor_threads
+    )
+    return cluster
+
+
+def cluster_report(cluster: Cluster) -> dict:
+    """
+    The effective driver settings, logged once the application has connected
+
+    Only public Cluster and ExecutionProfile attributes are read. The local data centre
+    is the one the load balancing policy treats as local among the hosts discovered so
+    far, so it is only known once connected.
+    """
+    profile = cluster.profile_manager.default
+    speculative = profile.speculative_execution_policy
+    balancing = profile.load_balancing_policy
+    local_dcs = sorted({host.datacenter for host in cluster.metadata.all_hosts()
+                        if balancing.distance(host) == HostDistance.LOCAL})
+    return {
+        "contact_points": list(cluster.contact_points),
+        "port": cluster.port,
+        "protocol_version": cluster.protocol_version,
+        "load_balancing": type(balancing).__name__,
+        "token_aware": isinstance(balancing, TokenAwarePolicy),
+        "local_dc": ", ".join(local_dcs) or None,
+        "connect_timeout": cluster.connect_timeout,
+        "request_timeout": profile.request_timeout,
+        "speculative_execution": (f"{speculative.delay}s x{speculative.max_attempts}"
+                                  if isinstance(speculative, ConstantSpeculativeExecutionPolicy) else "off"),
+        "compression": cluster.compression,
+        "profiles": {name: _describe_profile(cluster.profile_manager.profiles[name])
+                     for name in PROFILES if name in cluster.profile_manager.profiles},
+    }
+
+
+def _describe_profile(profile: ExecutionProfile) -> str:
+    return (f"{ConsistencyLevel.value_to_name[profile.consistency_level]} "
+            f"{profile.request_timeout}s {type(profile.retry_policy).__name__}")
+
 
 class CassandraSessionManager:
     _session = None
@@ -9,16 +170,8 @@ class CassandraSessionManager:
     @classmethod
     def get_session(cls):
         if cls._session is None:
-            # auth_provider = PlainTextAuthProvider(
-            #     username='your_username',
-            #     password='your_password'
-            # )
-            cluster = Cluster(
-                ['127.0.0.1'],
-                # auth_provider=auth_provider,
-                protocol_version=4
-            )
-            session = cluster.connect('experimentation')
+            cluster = build_cluster(settings)
+            session = cluster.connect()
             cls._session = session
 
             # Create keyspace if not exists
@@ -39,3 +192,46 @@ class CassandraSessionManager:
         if cls._session:
             cls._session.cluster.shutdown()
             cls._session = None
+
+
+def bridge_response_future(response_future: ResponseFuture) -> "asyncio.Future[List[Any]]":
+    """
+    Wrap a driver ResponseFuture in an asyncio future resolving to every row of the result
+
+    The driver invokes callbacks on its own event loop thread, so results are handed
+    back with `call_soon_threadsafe`; further pages are requested from the callback
+    itself and never block the caller.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    rows: List[Any] = []
+
+    def set_result(result):
+        if not future.done():
+            future.set_result(result)
+
+    def set_exception(exc):
+        if not future.done():
+            future.set_exception(exc)
+
+    def on_page(page):
+        rows.extend(page)
+        if response_future.has_more_pages:
+            response_future.start_fetching_next_page()
+        else:
+            loop.call_soon_threadsafe(set_result, rows)
+
+    def on_error(exc):
+        loop.call_soon_threadsafe(set_exception, exc)
+
+    response_future.add_callbacks(callback=on_page, errback=on_error)
+    return future
+
+
+async def execute_async(session: Session, query: Union[str, Statement],
+                        parameters: Optional[Union[Sequence, dict]] = None,
+                        execution_profile: Any = EXEC_PROFILE_DEFAULT) -> List[Any]:
+    """Awaitable counterpart of `session.execute`, returning every row of the result"""
+    return await bridge_response_future(
+        session.execute_async(query, parameters, execution_profile=execution_profile)
+    )
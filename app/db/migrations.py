@@ -0,0 +1,172 @@
+# app/db/migrations.py
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Set
+
+from cassandra.cluster import Session
+from cassandra.cqlengine.management import sync_table
+
+from app.config import settings
+from app.repositories.cassandra.bucket_repository import BucketByExperimentModel, ExperimentBucketModel
+from app.repositories.cassandra.condition_repository import (
+    ConditionByCriterionModel,
+    ExperimentSamplingConditionModel
+)
+from app.repositories.cassandra.criterion_repository import (
+    CriterionByExperimentModel,
+    ExperimentSamplingCriterionModel
+)
+from app.repositories.cassandra.experiment_repository import ExperimentByServiceModel, ExperimentModel
+from app.repositories.cassandra.layer_repository import (
+    ExperimentLayerModel,
+    LayerByExperimentModel,
+    LayerByServiceModel,
+    LayerExperimentModel
+)
+from app.repositories.cassandra.result_repository import BucketCounterShardModel
+from app.repositories.cassandra.sample_repository import (
+    BucketedSampleModel,
+    SampleAssignmentModel,
+    SampleModel,
+    SampleTimelineModel
+)
+from app.repositories.cassandra.service_repository import ServiceModel
+from app.repositories.cassandra.slot_map_repository import ExperimentSlotMapModel
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_LOCK = "schema_migrations"
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Session], None]
+
+
+def sync_models(*models) -> Callable[[Session], None]:
+    """A migration step creating or extending the tables of cqlengine models"""
+    def apply(session: Session):
+        for model in models:
+            sync_table(model)
+    return apply
+
+
+def cql(*statements: str) -> Callable[[Session], None]:
+    """A migration step running raw CQL statements, which must be idempotent (IF [NOT] EXISTS)"""
+    def apply(session: Session):
+        for statement in statements:
+            session.execute(statement)
+    return apply
+
+
+# Append only: a released version must never change, add a new migration instead
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Services, experiments, buckets, sampling criteria and samples", sync_models(
+        ServiceModel, ExperimentModel, ExperimentBucketModel, ExperimentSamplingCriterionModel,
+        ExperimentSamplingConditionModel, BucketedSampleModel
+    )),
+    Migration(2, "Experiment layers", sync_models(ExperimentLayerModel, LayerExperimentModel)),
+    Migration(3, "Slot map allocation mode", sync_models(ExperimentModel, ExperimentSlotMapModel)),
+    # Existing rows are copied by `python -m app.tools.backfill_lookup_tables`
+    Migration(4, "Lookup tables partitioned by service and experiment", sync_models(
+        ExperimentByServiceModel, BucketByExperimentModel, CriterionByExperimentModel
+    )),
+    # Existing samples are copied by `python -m app.tools.backfill_lookup_tables --table samples_by_experiment_day`
+    Migration(5, "Samples sharded by experiment, shard and day", sync_models(SampleTimelineModel)),
+    # Existing samples are copied by `python -m app.tools.backfill_lookup_tables --table sample_assignments`
+    Migration(6, "Sticky assignment lookup by experiment, entity and value", sync_models(SampleAssignmentModel)),
+    # Counting starts with this migration; counters cannot be backfilled idempotently
+    Migration(7, "Bucket counters per experiment shard and time window", sync_models(BucketCounterShardModel)),
+    # Existing conditions are copied by `python -m app.tools.backfill_lookup_tables --table conditions_by_criterion`
+    Migration(8, "Sampling conditions lookup by criterion", sync_models(ConditionByCriterionModel)),
+    # Existing layers are copied by `python -m app.tools.backfill_lookup_tables --table layers_by_service
+    # --table layers_by_experiment`
+    Migration(9, "Layer lookups by service and experiment", sync_models(LayerByServiceModel, LayerByExperimentModel)),
+    # Existing samples are copied by `python -m app.tools.backfill_lookup_tables --table samples`
+    Migration(10, "Samples keyed by id alone", sync_models(SampleModel)),
+]
+
+
+def _ensure_tracking_tables(session: Session):
+    session.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP
+        )
+    """)
+    session.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migration_locks (
+            name TEXT PRIMARY KEY,
+            owner UUID
+        )
+    """)
+
+
+def applied_versions(session: Session) -> Set[int]:
+    return {row['version'] for row in session.execute("SELECT version FROM schema_migrations")}
+
+
+def _acquire_lock(session: Session, owner: uuid.UUID, timeout: float, poll_interval: float):
+    """
+    Take the migration lock with a lightweight transaction
+
+    The lock row expires on its own, so a worker that dies mid-migration cannot
+    block the others for longer than `settings.migration_lock_ttl_seconds`.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        result = session.execute(
+            "INSERT INTO schema_migration_locks (name, owner) VALUES (%s, %s) IF NOT EXISTS USING TTL %s",
+            (MIGRATION_LOCK, owner, settings.migration_lock_ttl_seconds)
+        )
+        if result.was_applied:
+            return
+        if time.monotonic() >= deadline:
+            raise RuntimeError("Timed out waiting for another worker to finish schema migrations")
+        time.sleep(poll_interval)
+
+
+def _release_lock(session: Session, owner: uuid.UUID):
+    session.execute("DELETE FROM schema_migration_locks WHERE name = %s IF owner = %s", (MIGRATION_LOCK, owner))
+
+
+def run_migrations(session: Session, migrations: List[Migration] = None, timeout: float = None,
+                   poll_interval: float = 1.0) -> List[int]:
+    """
+    Apply every migration not yet recorded in `schema_migrations`, in version order
+
+    Safe to call from every worker at startup: once the schema is current it costs
+    a single read, and otherwise workers serialise on an LWT lock and re-check
+    what is applied once they hold it.
+
+    Returns:
+        The versions applied by this call
+    """
+    migrations = sorted(MIGRATIONS if migrations is None else migrations, key=lambda m: m.version)
+    _ensure_tracking_tables(session)
+    if {m.version for m in migrations} <= applied_versions(session):
+        return []
+
+    owner = uuid.uuid4()
+    _acquire_lock(session, owner, settings.migration_lock_timeout_seconds if timeout is None else timeout,
+                  poll_interval)
+    applied = []
+    try:
+        done = applied_versions(session)
+        for migration in migrations:
+            if migration.version in done:
+                continue
+            logger.info("Applying schema migration %d: %s", migration.version, migration.description)
+            migration.apply(session)
+            session.execute(
+                "INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, %s)",
+                (migration.version, migration.description, datetime.now())
+            )
+            applied.append(migration.version)
+    finally:
+        _release_lock(session, owner)
+    return applied
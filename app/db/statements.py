@@ -0,0 +1,90 @@
+# app/db/statements.py
+import logging
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+from cassandra.cluster import Session
+from cassandra.query import BoundStatement, PreparedStatement
+
+logger = logging.getLogger(__name__)
+
+
+class StatementCatalog:
+    """
+    Process-wide catalog of named CQL statements
+
+    Repositories register their statements at import time with `?` bind markers;
+    the catalog prepares each one once per session (all of them at startup, or
+    lazily on first use) so hot queries skip client-side query building and
+    server-side parsing, and values are always bound rather than interpolated.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(StatementCatalog, cls).__new__(cls)
+                cls._instance._cql: Dict[str, str] = {}
+                cls._instance._prepared: Dict[str, PreparedStatement] = {}
+                cls._instance._session: Optional[Session] = None
+                cls._instance._prepare_lock = threading.Lock()
+        return cls._instance
+
+    def register(self, name: str, cql: str) -> str:
+        """
+        Add a statement to the catalog and return its name
+
+        Raises:
+            ValueError: If the name is already registered with different CQL
+        """
+        existing = self._cql.get(name)
+        if existing is not None and existing != cql:
+            raise ValueError(f"Statement {name} is already registered with different CQL")
+        self._cql[name] = cql
+        return name
+
+    def names(self):
+        return list(self._cql)
+
+    def prepare_all(self, session: Session) -> int:
+        """Prepare every registered statement against the session; returns how many were prepared"""
+        for name in self.names():
+            self.get(session, name)
+        logger.info("Prepared %d CQL statements", len(self._prepared))
+        return len(self._prepared)
+
+    def get(self, session: Session, name: str) -> PreparedStatement:
+        """The prepared statement for `name`, preparing it on first use with this session"""
+        prepared = self._prepared.get(name) if session is self._session else None
+        if prepared is not None:
+            return prepared
+
+        with self._prepare_lock:
+            if session is not self._session:
+                # A new session (reconnect, tests) invalidates everything prepared on the old one
+                self._prepared = {}
+                self._session = session
+            prepared = self._prepared.get(name)
+            if prepared is None:
+                cql = self._cql.get(name)
+                if cql is None:
+                    raise KeyError(f"Unknown statement {name}")
+                prepared = session.prepare(cql)
+                # Reads are safe to retry and to execute speculatively on another replica
+                prepared.is_idempotent = cql.lstrip().upper().startswith("SELECT")
+                self._prepared[name] = prepared
+        return prepared
+
+    def bind(self, session: Session, name: str, parameters: Sequence[Any] = (),
+             fetch_size: Optional[int] = None, consistency_level: Optional[int] = None) -> BoundStatement:
+        """Bind parameters to a prepared statement, optionally setting paging and consistency"""
+        bound = self.get(session, name).bind(parameters)
+        if fetch_size is not None:
+            bound.fetch_size = fetch_size
+        if consistency_level is not None:
+            bound.consistency_level = consistency_level
+        return bound
+
+
+statements = StatementCatalog()
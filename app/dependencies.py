@@ -1,41 +1,112 @@
-# app/dependencies.py
+import threading
+from typing import Optional, Union
+
+from fastapi import Request
+
 from app.repositories.cassandra.condition_repository import ExperimentSamplingConditionRepository
 from app.repositories.cassandra.service_repository import ServiceRepository
 from app.repositories.cassandra.experiment_repository import ExperimentRepository
 from app.repositories.cassandra.bucket_repository import BucketRepository
 from app.repositories.cassandra.sample_repository import BucketedSampleRepository
+from app.repositories.cassandra.result_repository import ExperimentResultRepository
 from app.repositories.cassandra.criterion_repository import ExperimentSamplingCriterionRepository
+from app.repositories.cassandra.layer_repository import LayerRepository
+from app.repositories.cassandra.slot_map_repository import SlotMapRepository
+from app.services.allocator_loader import AllocatorLoader
 from app.services.bucket_allocator import BucketAllocator
+from app.services.criteria_engine import CriteriaEngine
+from app.services.criteria_loader import CriteriaLoader
+from app.services.sample_buffer import SampleWriteBuffer
+
+
+class Repositories:
+    """Long-lived repositories shared by every request, built once at startup and kept on `app.state`"""
+
+    def __init__(self):
+        self.services = ServiceRepository()
+        self.experiments = ExperimentRepository()
+        self.buckets = BucketRepository()
+        self.conditions = ExperimentSamplingConditionRepository()
+        self.criteria = ExperimentSamplingCriterionRepository(condition_repo=self.conditions)
+        self.results = ExperimentResultRepository()
+        self.samples = BucketedSampleRepository(result_repo=self.results)
+        self.layers = LayerRepository()
+        self.slot_maps = SlotMapRepository()
+
+
+_repositories: Optional[Repositories] = None
+_repositories_lock = threading.Lock()
+
 
+def get_repositories(request: Request = None) -> Repositories:
+    """The repositories on `app.state`, falling back to a lazily built process-wide set outside requests"""
+    global _repositories
+    if request is not None:
+        repositories = getattr(request.app.state, "repositories", None)
+        if repositories is not None:
+            return repositories
+    if _repositories is None:
+        with _repositories_lock:
+            if _repositories is None:
+                _repositories = Repositories()
+    return _repositories
 
-def get_service_repository() -> ServiceRepository:
-    return ServiceRepository()
 
+def get_service_repository(request: Request = None) -> ServiceRepository:
+    return get_repositories(request).services
 
-def get_experiment_repository() -> ExperimentRepository:
-    return ExperimentRepository()
 
+def get_experiment_repository(request: Request = None) -> ExperimentRepository:
+    return get_repositories(request).experiments
 
-def get_bucket_repository() -> BucketRepository:
-    return BucketRepository()
 
+def get_bucket_repository(request: Request = None) -> BucketRepository:
+    return get_repositories(request).buckets
 
-def get_experiment_sampling_criterion_repository() -> ExperimentSamplingCriterionRepository:
-    return ExperimentSamplingCriterionRepository()
 
+def get_experiment_sampling_criterion_repository(request: Request = None) -> ExperimentSamplingCriterionRepository:
+    return get_repositories(request).criteria
 
-def get_bucketed_sample_repository() -> BucketedSampleRepository:
-    return BucketedSampleRepository()
 
-def get_criterion_repository() -> ExperimentSamplingCriterionRepository:
-    return ExperimentSamplingCriterionRepository()
+def get_bucketed_sample_repository(request: Request = None) -> BucketedSampleRepository:
+    return get_repositories(request).samples
 
-def get_condition_repository() -> ExperimentSamplingConditionRepository:
-    return ExperimentSamplingConditionRepository()
+def get_criterion_repository(request: Request = None) -> ExperimentSamplingCriterionRepository:
+    return get_repositories(request).criteria
 
-def get_sample_repository() -> BucketedSampleRepository:
-    return BucketedSampleRepository()
+def get_condition_repository(request: Request = None) -> ExperimentSamplingConditionRepository:
+    return get_repositories(request).conditions
+
+def get_sample_repository(request: Request = None) -> BucketedSampleRepository:
+    return get_repositories(request).samples
+
+def get_sample_writer(request: Request = None) -> Union[BucketedSampleRepository, SampleWriteBuffer]:
+    """Where new samples are written: the write-behind buffer when it is running, otherwise the repository"""
+    buffer = getattr(request.app.state, "sample_buffer", None) if request is not None else None
+    return buffer if buffer is not None else get_repositories(request).samples
+
+def get_result_repository(request: Request = None) -> ExperimentResultRepository:
+    return get_repositories(request).results
+
+def get_layer_repository(request: Request = None) -> LayerRepository:
+    return get_repositories(request).layers
+
+def get_slot_map_repository(request: Request = None) -> SlotMapRepository:
+    return get_repositories(request).slot_maps
 
 # Dependency to get the allocator instance
 def get_allocator():
-    return BucketAllocator()
\ No newline at end of file
+    return BucketAllocator()
+
+def get_allocator_loader(request: Request = None) -> AllocatorLoader:
+    repositories = get_repositories(request)
+    return AllocatorLoader(get_allocator(), repositories.experiments, repositories.buckets,
+                           repositories.layers, repositories.slot_maps)
+
+def get_criteria_engine():
+    return CriteriaEngine()
+
+def get_criteria_loader(request: Request = None) -> CriteriaLoader:
+    repositories = get_repositories(request)
+    return CriteriaLoader(get_criteria_engine(), repositories.experiments, repositories.criteria,
+                          repositories.conditions)
@@ -1,33 +1,62 @@
+import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.openapi.utils import get_openapi
 
-from app.db.cassandra import CassandraSessionManager
-from app.services.bucket_allocator import BucketAllocator
+from app.config import settings
+from app.db.cassandra import CassandraSessionManager, cluster_report
+from app.db.migrations import run_migrations
+from app.db.statements import statements
+from app.dependencies import get_allocator_loader, get_criteria_loader, get_repositories
 from app.telemetry.tracing import setup_tracing
 from app.telemetry.metrics import setup_metrics
 from app.telemetry.logging import setup_logging
 from app.routers import router as api_router, docs
+from app.services.config_reloader import ConfigReloader
+from app.services.sample_buffer import SampleBufferFull, SampleWriteBuffer
+from app.services.sample_log import SampleLog
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
     # Initialize Cassandra connection
-    CassandraSessionManager.get_session()
+    session = CassandraSessionManager.get_session()
+    # Bring the schema up to date once, before any repository is used
+    run_migrations(session)
+    # Prepare every catalogued statement up front rather than on first request
+    statements.prepare_all(session)
+    app.state.repositories = get_repositories()
     setup_metrics()
     setup_logging()
-    allocator = BucketAllocator()
-    # sample allocation, which needs to reflect the actual {experiment, [buckets]} combination
-    allocator.configure_experiment(
-        "homepage_redesign",
-        [
-            {"bucket_name": "control", "percentage_distribution": 50},
-            {"bucket_name": "variant", "percentage_distribution": 50}
-        ]
-    )
+    logger.info("Connected to Cassandra with %s", cluster_report(session.cluster))
+    # Hydrate the allocator with every active experiment and its buckets
+    allocator_loader = get_allocator_loader()
+    allocator_loader.load_all()
+    # Compile every active experiment's sampling criteria
+    criteria_loader = get_criteria_loader()
+    criteria_loader.load_all()
+    # Pick up changes made by other workers or outside the API
+    app.state.config_reloader = ConfigReloader([allocator_loader, criteria_loader])
+    app.state.config_reloader.start()
+    if settings.sample_write_behind:
+        sample_log = None
+        if settings.sample_log_dir:
+            # Write out samples this or an exited worker logged but never stored
+            sample_log = SampleLog.for_worker(settings.sample_log_dir)
+            await sample_log.recover(app.state.repositories.samples)
+        app.state.sample_buffer = SampleWriteBuffer(app.state.repositories.samples, log=sample_log)
+        app.state.sample_buffer.start()
     yield
     # Shutdown logic
+    await app.state.config_reloader.stop()
+    # Write out buffered samples while the session is still open
+    if getattr(app.state, "sample_buffer", None) is not None:
+        await app.state.sample_buffer.stop()
+        app.state.sample_buffer = None
     # Clean up Cassandra connection
     CassandraSessionManager.shutdown()
 
@@ -62,12 +91,16 @@ setup_tracing(app)
 
 # Include routers
 # app.include_router(items.router, prefix="/items", tags=["items"])
-app = FastAPI()
 app.include_router(api_router)
 app.include_router(docs.router)
 app.openapi = custom_openapi
 
 
+@app.exception_handler(SampleBufferFull)
+async def sample_buffer_full_handler(request: Request, exc: SampleBufferFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
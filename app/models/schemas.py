@@ -1,7 +1,7 @@
 # app/models/schemas.py
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Literal, Optional
 import uuid
 
 class ServiceBase(BaseModel):
@@ -25,6 +25,14 @@ class ExperimentBase(BaseModel):
     service_id: uuid.UUID
     active: bool = True
     scheduled_start_date: Optional[datetime] = None
+    # "range" cuts cumulative percentage ranges; "slot_map" keeps buckets on fixed slots across rebalancing
+    allocation_mode: Literal["range", "slot_map"] = "range"
+
+    @field_validator("allocation_mode", mode="before")
+    @classmethod
+    def default_allocation_mode(cls, value):
+        # Experiments stored before allocation modes existed have no mode
+        return "range" if value is None else value
 
 class ExperimentCreate(ExperimentBase):
     pass
@@ -40,6 +48,42 @@ class ExperimentList(BaseModel):
     experiments: List[Experiment]
     next_page_token: Optional[str] = None
 
+class ExperimentStatusUpdate(BaseModel):
+    active: bool
+
+
+class ExperimentLayerBase(BaseModel):
+    name: str
+    service_id: uuid.UUID
+    segment_count: int = Field(1000, ge=1, le=100000)
+
+class ExperimentLayerCreate(ExperimentLayerBase):
+    pass
+
+class ExperimentLayer(ExperimentLayerBase):
+    id: uuid.UUID
+    created_at: datetime
+    updated_at: datetime
+
+class LayerExperimentBase(BaseModel):
+    experiment_id: uuid.UUID
+    segment_start: int = Field(..., ge=0)
+    segment_end: int = Field(..., ge=1)
+
+class LayerExperimentCreate(LayerExperimentBase):
+    pass
+
+class LayerExperiment(LayerExperimentBase):
+    layer_id: uuid.UUID
+    created_at: datetime
+    updated_at: datetime
+
+
+class ExperimentSlotMap(BaseModel):
+    experiment_id: uuid.UUID
+    owners: List[str]
+    updated_at: datetime
+
 
 class ExperimentBucketBase(BaseModel):
     experiment_id: uuid.UUID
@@ -49,6 +93,9 @@ class ExperimentBucketBase(BaseModel):
 class ExperimentBucketCreate(ExperimentBucketBase):
     pass
 
+class ExperimentBucketUpdate(BaseModel):
+    percentage_distribution: int
+
 class ExperimentBucket(ExperimentBucketBase):
     experiment_id: uuid.UUID
     created_at: datetime
@@ -109,11 +156,127 @@ class BucketedSampleBase(BaseModel):
     allocated_bucket: str
 
 class BucketedSampleCreate(BucketedSampleBase):
-    pass
+    # When the sample happened; a retry that repeats it rewrites exactly the same rows
+    created_at: Optional[datetime] = None
 
 class BucketedSample(BucketedSampleBase):
     id: uuid.UUID
     complete: bool = False
     completed_at: Optional[datetime] = None
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+    @field_validator("complete", mode="before")
+    @classmethod
+    def default_complete(cls, value):
+        # Sample inserts leave complete unset until the sample is completed
+        return False if value is None else value
+
+class SampleBatchRequest(BaseModel):
+    samples: List[BucketedSampleCreate] = Field(..., min_length=1)
+
+class SampleBatchItem(BaseModel):
+    index: int
+    status: Literal["created", "failed"]
+    sample: Optional[BucketedSample] = None
+    error: Optional[str] = None
+
+class SampleBatch(BaseModel):
+    experiment_id: uuid.UUID
+    created: int
+    failed: int
+    items: List[SampleBatchItem]
+
+class SampleKey(BaseModel):
+    # Either the sample id, or the entity and value it was sampled for
+    sample_id: Optional[uuid.UUID] = None
+    sampled_entity: Optional[str] = None
+    sampled_value: Optional[str] = None
+
+    @model_validator(mode="after")
+    def one_key(self):
+        if (self.sample_id is None) == (self.sampled_entity is None or self.sampled_value is None):
+            raise ValueError("Give either sample_id, or sampled_entity and sampled_value")
+        return self
+
+class SampleCompletionRequest(BaseModel):
+    keys: List[SampleKey] = Field(..., min_length=1)
+
+class SampleCompletionItem(BaseModel):
+    index: int
+    status: Literal["completed", "not_found", "failed"]
+    sample: Optional[BucketedSample] = None
+    error: Optional[str] = None
+
+class BucketWindowResult(BaseModel):
+    window_start: datetime
+    bucket_name: str
+    assigned: int = 0
+    completed: int = 0
+
+    @field_validator("assigned", "completed", mode="before")
+    @classmethod
+    def default_count(cls, value):
+        # A counter never incremented reads back as null
+        return 0 if value is None else value
+
+class BucketResult(BaseModel):
+    bucket_name: str
+    assigned: int
+    completed: int
+    completion_rate: Optional[float] = None
+
+class ExperimentResults(BaseModel):
+    experiment_id: uuid.UUID
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    buckets: List[BucketResult]
+    windows: List[BucketWindowResult]
+
+class AllocationBatchRequest(BaseModel):
+    entity_ids: List[str] = Field(..., min_length=1)
+
+class EntityAllocation(BaseModel):
+    entity_id: str
+    allocated_bucket: Optional[str] = None
+
+class AllocationBatch(BaseModel):
+    experiment_id: uuid.UUID
+    config_version: int
+    allocations: List[EntityAllocation]
+
+class AllocationRequest(BaseModel):
+    sampled_entity: str
+    sampled_value: str
+
+class SampleAllocation(BucketedSample):
+    config_version: Optional[int] = None
+    new_assignment: bool
+
+class ServiceAssignmentRequest(AllocationRequest):
+    record: bool = True
+    # When given, only experiments whose sampling criteria the entity satisfies are assigned
+    attributes: Optional[Dict[str, Dict[str, Any]]] = None
+
+class ExperimentAssignment(BaseModel):
+    allocated_bucket: str
+    config_version: Optional[int] = None
+    new_assignment: bool
+
+class ServiceAssignments(BaseModel):
+    service_id: uuid.UUID
+    assignments: Dict[uuid.UUID, ExperimentAssignment]
+
+class EligibilityRequest(BaseModel):
+    # Attribute values keyed by sampling model, then property, e.g. {"User": {"country": "US"}}
+    attributes: Dict[str, Dict[str, Any]]
+
+class Eligibility(BaseModel):
+    experiment_id: uuid.UUID
+    eligible: bool
+    config_version: int
+    failed_criterion_id: Optional[uuid.UUID] = None
+
+class ServiceEligibility(BaseModel):
+    service_id: uuid.UUID
+    experiment_ids: List[uuid.UUID]
@@ -1,28 +1,51 @@
 # app/repositories/base_repository.py
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic, Optional, List
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Type, TypeVar, Generic, Optional, List, Sequence, Tuple
 
-from cassandra import ConsistencyLevel
-from cassandra.cluster import Session
-from cassandra.query import SimpleStatement
-from cassandra.cluster import Session
+from cassandra.cluster import EXEC_PROFILE_DEFAULT, Session
+from cassandra.query import BoundStatement
+from pydantic import BaseModel
 
-from app.db.cassandra import CassandraSessionManager
+from app.db.cassandra import CassandraSessionManager, execute_async
+from app.db.statements import statements
 from app.models.schemas import Service
 
 T = TypeVar('T')
 K = TypeVar('K')
+S = TypeVar('S', bound=BaseModel)
+
+
+def map_rows(schema: Type[S], rows: Iterable[dict]) -> List[S]:
+    """Map dict rows of a prepared statement straight onto a schema, without cqlengine model instances"""
+    return [schema.model_validate(row) for row in rows]
+
+
+def map_row(schema: Type[S], rows: Sequence[dict]) -> Optional[S]:
+    """The first row mapped onto a schema, or None for an empty result"""
+    return schema.model_validate(rows[0]) if rows else None
+
+
+def partition_groups(statements: Iterable[Tuple[Any, BoundStatement]],
+                     max_size: int) -> List[List[Tuple[Any, BoundStatement]]]:
+    """
+    Group tagged statements by the partition they write, at most `max_size` to a group
+
+    Each group can go out as one unlogged batch that a single replica set applies,
+    rather than a batch the coordinator has to fan out across the cluster.
+    """
+    by_partition: Dict[tuple, List[Tuple[Any, BoundStatement]]] = defaultdict(list)
+    for tag, statement in statements:
+        by_partition[(statement.prepared_statement.query_string, statement.routing_key)].append((tag, statement))
+    return [members[start:start + max_size]
+            for members in by_partition.values()
+            for start in range(0, len(members), max_size)]
 
 
 class BaseRepository(ABC):
     def __init__(self):
+        # Tables are created by app.db.migrations at startup, never per repository
         self.session: Session = CassandraSessionManager.get_session()
-        self._sync_table()
-
-    @abstractmethod
-    def _sync_table(self):
-        """Initialize the Cassandra table"""
-        pass
 
     @abstractmethod
     def create(self, entity: T) -> T:
@@ -44,36 +67,19 @@ class BaseRepository(ABC):
         """Delete entity by primary key"""
         pass
 
-    def list_paginated(self, session: Session, table_name: str, has_active_only: bool or False,
-                       active_only: bool or False, limit: int, paging_state: bytes = None):
+    def _bind(self, name: str, parameters: Sequence[Any] = (), fetch_size: Optional[int] = None) -> BoundStatement:
         """
-        Fetch paginated services from Cassandra table.
-
-        Args:
-            active_only: Filter for active services.
-            limit: Number of records to fetch.
-            paging_state: Token for fetching the next page.
-
-        Returns:
-            A tuple: (list of services, next_page_token)
-            :param table_name:
-            :param has_active_only:
-            :param paging_state:
-            :param limit:
-            :param active_only:
-            :param session:
-        """
-        query = f"SELECT * FROM {table_name}"
-
-        if has_active_only and active_only:
-            query += " WHERE active = true ALLOW FILTERING"
+        Bind parameters to a statement from the prepared-statement catalog
 
-        statement = SimpleStatement(query, fetch_size=limit, consistency_level=ConsistencyLevel.QUORUM
-                                    )
+        Consistency and timeouts are left to the execution profile the statement is run with.
+        """
+        return statements.bind(self.session, name, parameters, fetch_size)
 
-        # Execute query with paging state
-        result_set = session.execute(statement, paging_state=paging_state)
-        rows = result_set.current_rows
+    def _execute(self, name: str, parameters: Sequence[Any] = (), profile: Any = EXEC_PROFILE_DEFAULT,
+                 **kwargs) -> list:
+        """Run a catalog statement with a named execution profile and return every row"""
+        return list(self.session.execute(self._bind(name, parameters, **kwargs), execution_profile=profile))
 
-        # Return the entities and next page token
-        return rows, result_set.paging_state
+    async def _execute_async(self, query, parameters=None, profile: Any = EXEC_PROFILE_DEFAULT) -> list:
+        """Run a CQL statement without blocking the event loop, returning every row"""
+        return await execute_async(self.session, query, parameters, execution_profile=profile)
@@ -4,11 +4,13 @@ from uuid import UUID
 from typing import List, Optional
 from cassandra.cqlengine import columns
 from cassandra.cqlengine.models import Model
+from cassandra.cqlengine.query import BatchQuery
 
 from app.models.schemas import ExperimentBucket, ExperimentBucketCreate
-from app.repositories.cassandra.base_repository import BaseRepository, T, K
+from app.db.cassandra import CONFIG_READ
+from app.db.statements import statements
+from app.repositories.cassandra.base_repository import BaseRepository, T, K, map_row, map_rows
 from datetime import datetime
-from cassandra.cqlengine.management import sync_table
 
 class ExperimentBucketModel(Model):
     __keyspace__ = "experimentation"
@@ -21,6 +23,34 @@ class ExperimentBucketModel(Model):
     updated_at = columns.DateTime()
 
 
+class BucketByExperimentModel(Model):
+    """Lookup copy of `experiment_buckets` partitioned by experiment, written in the same batch as the bucket"""
+    __keyspace__ = "experimentation"
+    __table_name__ = "buckets_by_experiment"
+    experiment_id = columns.UUID(primary_key=True)  # Partition key
+    bucket_name = columns.Text(primary_key=True)  # Clustering column
+    id = columns.UUID(required=True)
+    percentage_distribution = columns.Integer(required=True)
+    created_at = columns.DateTime()
+    updated_at = columns.DateTime()
+
+
+def lookup_values(bucket) -> dict:
+    """The buckets_by_experiment row mirroring a bucket"""
+    return {column: bucket[column] for column in
+            ('experiment_id', 'bucket_name', 'id', 'percentage_distribution', 'created_at', 'updated_at')}
+
+
+LIST_BUCKETS_BY_EXPERIMENT = statements.register(
+    "buckets.list_by_experiment",
+    "SELECT * FROM buckets_by_experiment WHERE experiment_id = ?"
+)
+FIND_BUCKET_BY_EXPERIMENT_AND_NAME = statements.register(
+    "buckets.find_by_experiment_and_name",
+    "SELECT * FROM buckets_by_experiment WHERE experiment_id = ? AND bucket_name = ?"
+)
+
+
 class BucketRepository(BaseRepository):
     def find_by_id(self, bucket_id: K) -> Optional[T]:
         bucket = ExperimentBucketModel.objects(id = bucket_id).first()
@@ -30,51 +60,55 @@ class BucketRepository(BaseRepository):
         bucket = ExperimentBucketModel.objects(id = entity.id).first()
         if not bucket:
             raise ValueError(f"No Bucket found for id {entity.id}")
-        bucket.update(bucket_name=entity.bucket_name, percentage_distribution=entity.percentage_distribution)
+        with BatchQuery() as batch:
+            bucket.batch(batch).update(bucket_name=entity.bucket_name,
+                                       percentage_distribution=entity.percentage_distribution)
+            BucketByExperimentModel.batch(batch).create(**lookup_values(bucket))
         return ExperimentBucket(**bucket)
 
-    def _sync_table(self):
-        sync_table(ExperimentBucketModel)
-
     def create(self, bucket: ExperimentBucketCreate) -> ExperimentBucket:
-        bucket_model = ExperimentBucketModel.create(
-            id = uuid.uuid4(),
-            experiment_id=bucket.experiment_id,
-            bucket_name=bucket.bucket_name,
-            percentage_distribution=bucket.percentage_distribution,
-            created_at=datetime.now(),
-            updated_at=datetime.now()
-        )
+        with BatchQuery() as batch:
+            bucket_model = ExperimentBucketModel.batch(batch).create(
+                id = uuid.uuid4(),
+                experiment_id=bucket.experiment_id,
+                bucket_name=bucket.bucket_name,
+                percentage_distribution=bucket.percentage_distribution,
+                created_at=datetime.now(),
+                updated_at=datetime.now()
+            )
+            BucketByExperimentModel.batch(batch).create(**lookup_values(bucket_model))
         return ExperimentBucket(**bucket_model)
 
     def find_by_experiment_and_name(self, experiment_id: UUID, bucket_name: str) -> Optional[ExperimentBucket]:
-        bucket = ExperimentBucketModel.objects(
-            experiment_id=experiment_id,
-            bucket_name=bucket_name
-        ).allow_filtering().first()
-        return ExperimentBucket(**bucket) if bucket else None
+        return map_row(ExperimentBucket, self._execute(FIND_BUCKET_BY_EXPERIMENT_AND_NAME,
+                                                       (experiment_id, bucket_name), profile=CONFIG_READ))
 
     def list_by_experiment(self, experiment_id: UUID) -> List[ExperimentBucket]:
-        buckets = ExperimentBucketModel.objects(experiment_id=experiment_id).allow_filtering()
+        return map_rows(ExperimentBucket, self._execute(LIST_BUCKETS_BY_EXPERIMENT, (experiment_id,),
+                                                         profile=CONFIG_READ))
+
+    def list_all(self) -> List[ExperimentBucket]:
+        buckets = ExperimentBucketModel.objects.all()
         return [ExperimentBucket(**b) for b in buckets]
 
     def update_distribution(self, experiment_id: UUID, bucket_name: str, percentage: int) -> ExperimentBucket:
-        bucket = ExperimentBucketModel.objects(
-            experiment_id=experiment_id,
-            bucket_name=bucket_name
-        ).allow_filtering().first()
-
+        bucket = self.find_by_experiment_and_name(experiment_id, bucket_name)
         if not bucket:
             raise ValueError("Bucket not found")
 
-        bucket.update(
-            percentage_distribution=percentage,
-            updated_at=datetime.now()
-        )
-        return ExperimentBucket(**bucket)
+        now = datetime.now()
+        with BatchQuery() as batch:
+            ExperimentBucketModel.objects(id=bucket.id, experiment_id=experiment_id, bucket_name=bucket_name) \
+                .batch(batch).update(percentage_distribution=percentage, updated_at=now)
+            BucketByExperimentModel.objects(experiment_id=experiment_id, bucket_name=bucket_name) \
+                .batch(batch).update(percentage_distribution=percentage, updated_at=now)
+        return bucket.model_copy(update={'percentage_distribution': percentage, 'updated_at': now})
 
     def delete(self, experiment_id: UUID) -> bool:
-        deleted = ExperimentBucketModel.objects(
-            experiment_id=experiment_id
-        ).delete()
-        return deleted > 0
\ No newline at end of file
+        buckets = self.list_by_experiment(experiment_id)
+        with BatchQuery() as batch:
+            for bucket in buckets:
+                ExperimentBucketModel.objects(id=bucket.id, experiment_id=experiment_id,
+                                              bucket_name=bucket.bucket_name).batch(batch).delete()
+            BucketByExperimentModel.objects(experiment_id=experiment_id).batch(batch).delete()
+        return len(buckets) > 0
@@ -3,9 +3,12 @@ from uuid import UUID, uuid4
 from datetime import datetime
 from cassandra.cqlengine import columns
 from cassandra.cqlengine.models import Model
-from cassandra.cqlengine.management import sync_table
+from cassandra.cqlengine.query import BatchQuery
 from typing import List, Optional
+from app.db.cassandra import CONFIG_READ, CassandraSessionManager
+from app.db.statements import statements
 from app.models.schemas import ExperimentSamplingCondition, ExperimentSamplingConditionCreate
+from app.repositories.cassandra.base_repository import map_rows
 
 
 class ExperimentSamplingConditionModel(Model):
@@ -23,19 +26,50 @@ class ExperimentSamplingConditionModel(Model):
     updated_at = columns.DateTime(default=datetime.now)
 
 
+class ConditionByCriterionModel(Model):
+    """Lookup copy of `experiment_sampling_conditions` partitioned by criterion, written in the same batch"""
+    __keyspace__ = "experimentation"
+    __table_name__ = "conditions_by_criterion"
+
+    criterion_id = columns.UUID(primary_key=True)  # partition key
+    id = columns.UUID(primary_key=True)  # clustering key
+    experiment_id = columns.UUID(required=True)
+    model = columns.Text(required=True)
+    property = columns.Text(required=True)
+    value = columns.Text(required=True)
+    condition = columns.Text(required=True)
+    created_at = columns.DateTime(default=datetime.now)
+    updated_at = columns.DateTime(default=datetime.now)
+
+
+def lookup_values(condition) -> dict:
+    """The conditions_by_criterion row mirroring a condition"""
+    return {column: condition[column] for column in
+            ('criterion_id', 'id', 'experiment_id', 'model', 'property', 'value', 'condition', 'created_at',
+             'updated_at')}
+
+
+FIND_CONDITIONS_BY_CRITERION = statements.register(
+    "conditions.find_by_criterion",
+    "SELECT * FROM conditions_by_criterion WHERE criterion_id = ?"
+)
+
+
 class ExperimentSamplingConditionRepository:
     def __init__(self):
-        sync_table(ExperimentSamplingConditionModel)
+        self.session = CassandraSessionManager.get_session()
 
     def create(self, condition: ExperimentSamplingConditionCreate) -> ExperimentSamplingCondition:
-        condition_model = ExperimentSamplingConditionModel.create(
-            criterion_id=condition.criterion_id,
-            experiment_id=condition.experiment_id,
-            model=condition.model,
-            property=condition.property,
-            value=condition.value,
-            condition=condition.condition
-        )
+        with BatchQuery() as batch:
+            condition_model = ExperimentSamplingConditionModel.batch(batch).create(
+                criterion_id=condition.criterion_id,
+                experiment_id=condition.experiment_id,
+                model=condition.model,
+                property=condition.property,
+                value=condition.value,
+                condition=condition.condition
+            )
+            ConditionByCriterionModel.batch(batch).create(**lookup_values(condition_model))
         return ExperimentSamplingCondition(**condition_model)
 
     def find_by_id(self, experiment_sampling_condition_id: UUID) -> Optional[ExperimentSamplingCondition]:
@@ -43,13 +77,22 @@ class ExperimentSamplingConditionRepository:
         return ExperimentSamplingCondition(**condition) if condition else None
 
     def find_by_criterion(self, criterion_id: UUID) -> List[ExperimentSamplingCondition]:
-        conditions = ExperimentSamplingConditionModel.objects(criterion_id=criterion_id).allow_filtering()
-        return [ExperimentSamplingCondition(**c) for c in conditions]
+        rows = self.session.execute(statements.bind(self.session, FIND_CONDITIONS_BY_CRITERION, (criterion_id,)),
+                                    execution_profile=CONFIG_READ)
+        return map_rows(ExperimentSamplingCondition, rows)
 
     def find_by_experiment(self, experiment_id: UUID) -> List[ExperimentSamplingCondition]:
         conditions = ExperimentSamplingConditionModel.objects(experiment_id=experiment_id)
         return [ExperimentSamplingCondition(**c) for c in conditions]
 
+    def list_all(self) -> List[ExperimentSamplingCondition]:
+        conditions = ExperimentSamplingConditionModel.objects.all()
+        return [ExperimentSamplingCondition(**c) for c in conditions]
+
     def delete(self, id: UUID) -> bool:
-        deleted = ExperimentSamplingConditionModel.objects(id=id).delete()
-        return deleted is None
\ No newline at end of file
+        condition = ExperimentSamplingConditionModel.objects(id=id).first()
+        with BatchQuery() as batch:
+            deleted = ExperimentSamplingConditionModel.objects(id=id).batch(batch).delete()
+            if condition:
+                ConditionByCriterionModel.objects(criterion_id=condition.criterion_id, id=id).batch(batch).delete()
+        return deleted is None
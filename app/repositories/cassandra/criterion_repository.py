@@ -2,13 +2,11 @@
 from uuid import UUID, uuid4
 from datetime import datetime
 
-from cassandra import ConsistencyLevel
 from cassandra.cqlengine import columns
 from cassandra.cqlengine.models import Model
-from cassandra.cqlengine.management import sync_table
+from cassandra.cqlengine.query import BatchQuery
 from typing import List, Optional
 
-from cassandra.query import SimpleStatement
 from fastapi import Depends
 
 # from app.dependencies import get_condition_repo
@@ -17,7 +15,9 @@ from app.models.schemas import (
     ExperimentSamplingCriterionCreate,
     ExperimentSamplingConditionCreate
 )
-from app.repositories.cassandra.base_repository import BaseRepository, T
+from app.db.cassandra import ADMIN, CONFIG_READ
+from app.db.statements import statements
+from app.repositories.cassandra.base_repository import BaseRepository, T, map_rows
 from app.repositories.cassandra.dependencies import get_condition_repo
 from app.repositories.cassandra.condition_repository import ExperimentSamplingConditionRepository
 
@@ -34,25 +34,51 @@ class ExperimentSamplingCriterionModel(Model):
     updated_at = columns.DateTime(default=datetime.now)
 
 
-class ExperimentSamplingCriterionRepository(BaseRepository):
+class CriterionByExperimentModel(Model):
+    """Lookup copy of `experiment_sampling_criteria` partitioned by experiment, written in the same batch"""
+    __keyspace__ = "experimentation"
+    __table_name__ = "criteria_by_experiment"
+
+    experiment_id = columns.UUID(primary_key=True)  # partition key
+    id = columns.UUID(primary_key=True)  # clustering key
+    sampling_model = columns.Text(required=True)
+    sampling_attribute = columns.Text(required=True)
+    created_at = columns.DateTime(default=datetime.now)
+    updated_at = columns.DateTime(default=datetime.now)
+
+
+def lookup_values(criterion) -> dict:
+    """The criteria_by_experiment row mirroring a criterion"""
+    return {column: criterion[column] for column in
+            ('experiment_id', 'id', 'sampling_model', 'sampling_attribute', 'created_at', 'updated_at')}
+
+
+FIND_CRITERION_BY_ID = statements.register(
+    "criteria.find_by_id",
+    "SELECT * FROM experiment_sampling_criteria WHERE id = ? LIMIT 1"
+)
+LIST_CRITERIA_BY_EXPERIMENT = statements.register(
+    "criteria.list_by_experiment",
+    "SELECT * FROM criteria_by_experiment WHERE experiment_id = ?"
+)
+
 
+class ExperimentSamplingCriterionRepository(BaseRepository):
     def __init__(self, condition_repo: ExperimentSamplingConditionRepository = None):
         super().__init__()
-        sync_table(ExperimentSamplingCriterionModel)
         self.condition_repo = condition_repo or get_condition_repo()
 
-    def _sync_table(self):
-        sync_table(ExperimentSamplingCriterionModel)
-
     def update(self, entity: T) -> T:
         pass
 
     def create(self, criterion: ExperimentSamplingCriterionCreate) -> ExperimentSamplingCriterion:
-        criterion_model = ExperimentSamplingCriterionModel.create(
-            experiment_id=criterion.experiment_id,
-            sampling_model=criterion.sampling_model,
-            sampling_attribute=criterion.sampling_attribute
-        )
+        with BatchQuery() as batch:
+            criterion_model = ExperimentSamplingCriterionModel.batch(batch).create(
+                experiment_id=criterion.experiment_id,
+                sampling_model=criterion.sampling_model,
+                sampling_attribute=criterion.sampling_attribute
+            )
+            CriterionByExperimentModel.batch(batch).create(**lookup_values(criterion_model))
         return ExperimentSamplingCriterion(
             id=criterion_model.id,
             experiment_id=criterion_model.experiment_id,
@@ -79,38 +105,42 @@ class ExperimentSamplingCriterionRepository(BaseRepository):
         return self.find_by_id(created_criterion.id)
 
     def find_by_id(self, experiment_sampling_criterion_id: UUID) -> Optional[ExperimentSamplingCriterion]:
-        criterion = ExperimentSamplingCriterionModel.objects(
-            id=experiment_sampling_criterion_id).allow_filtering().first()
-        if not criterion:
+        rows = self._execute(FIND_CRITERION_BY_ID, (experiment_sampling_criterion_id,), profile=CONFIG_READ)
+        if not rows:
             return None
+        return self._with_conditions(rows[0])
 
-        conditions = self.condition_repo.find_by_criterion(experiment_sampling_criterion_id)
-        return ExperimentSamplingCriterion(
-            id=criterion.id,
-            experiment_id=criterion.experiment_id,
-            sampling_model=criterion.sampling_model,
-            sampling_attribute=criterion.sampling_attribute,
-            conditions=conditions,
-            created_at=criterion.created_at,
-            updated_at=criterion.updated_at
+    def find_by_experiment(self, experiment_id: UUID) -> List[ExperimentSamplingCriterion]:
+        return [self._with_conditions(row) for row in self._execute(LIST_CRITERIA_BY_EXPERIMENT, (experiment_id,),
+                                                                  profile=CONFIG_READ)]
+
+    def _with_conditions(self, row: dict) -> ExperimentSamplingCriterion:
+        return ExperimentSamplingCriterion.model_validate(
+            dict(row, conditions=self.condition_repo.find_by_criterion(row['id']))
         )
 
-    def find_by_experiment(self, experiment_id: UUID) -> List[ExperimentSamplingCriterion]:
-        criteria = ExperimentSamplingCriterionModel.objects(experiment_id=experiment_id).allow_filtering()
-        return [self.find_by_id(c.id) for c in criteria]
+    def list_all(self) -> List[ExperimentSamplingCriterion]:
+        """Every criterion without its conditions, see `ExperimentSamplingConditionRepository.list_all`"""
+        return [
+            ExperimentSamplingCriterion(
+                id=c.id,
+                experiment_id=c.experiment_id,
+                sampling_model=c.sampling_model,
+                sampling_attribute=c.sampling_attribute,
+                conditions=[],
+                created_at=c.created_at,
+                updated_at=c.updated_at
+            )
+            for c in ExperimentSamplingCriterionModel.objects.all()
+        ]
 
     def list_criterions_paginated_by_experiment(self, experiment_id: UUID, limit: int = 100,
                                                 paging_state: bytes = None):
-        query = f"SELECT * FROM {ExperimentSamplingCriterionModel.__table_name__} WHERE experiment_id = {experiment_id} ALLOW FILTERING"
-
-        statement = SimpleStatement(query, fetch_size=limit, consistency_level=ConsistencyLevel.QUORUM)
+        statement = self._bind(LIST_CRITERIA_BY_EXPERIMENT, (experiment_id,), fetch_size=limit)
 
         # Execute query with paging state
-        result_set = self.session.execute(statement, paging_state=paging_state)
-        rows = result_set.current_rows
-
-        # Convert rows to ExperimentSamplingCriterion objects
-        criterions = [ExperimentSamplingCriterion(**row) for row in rows]
+        result_set = self.session.execute(statement, paging_state=paging_state, execution_profile=ADMIN)
+        criterions = map_rows(ExperimentSamplingCriterion, result_set.current_rows)
         return criterions, result_set.paging_state
 
     def delete(self, experiment_sampling_criterion_id: UUID) -> bool:
@@ -119,7 +149,13 @@ class ExperimentSamplingCriterionRepository(BaseRepository):
         for condition in conditions:
             self.condition_repo.delete(condition.id)
 
-        # Then delete the criterion
-        deleted = ExperimentSamplingCriterionModel.objects(id=experiment_sampling_criterion_id).delete()
+        # Then delete the criterion and its lookup row
+        criterion = ExperimentSamplingCriterionModel.objects(id=experiment_sampling_criterion_id).first()
+        with BatchQuery() as batch:
+            deleted = ExperimentSamplingCriterionModel.objects(id=experiment_sampling_criterion_id) \
+                .batch(batch).delete()
+            if criterion:
+                CriterionByExperimentModel.objects(experiment_id=criterion.experiment_id,
+                                                   id=experiment_sampling_criterion_id).batch(batch).delete()
         return deleted is None
 
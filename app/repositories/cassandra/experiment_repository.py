@@ -2,16 +2,15 @@
 from uuid import uuid4, UUID
 from typing import List, Optional
 
-from cassandra import ConsistencyLevel
 from cassandra.cqlengine import columns
 from cassandra.cqlengine.connection import session
 from cassandra.cqlengine.models import Model
-from cassandra.cqlengine.query import DoesNotExist
-from cassandra.query import SimpleStatement
+from cassandra.cqlengine.query import BatchQuery, DoesNotExist
 
 from app.models.schemas import Experiment, ExperimentCreate
-from app.repositories.cassandra.base_repository import BaseRepository
-from cassandra.cqlengine.management import sync_table
+from app.db.cassandra import ADMIN, CONFIG_READ
+from app.db.statements import statements
+from app.repositories.cassandra.base_repository import BaseRepository, map_row, map_rows
 from datetime import datetime
 
 
@@ -26,36 +25,85 @@ class ExperimentModel(Model):
     last_deactivated_at = columns.DateTime()
     last_activated_at = columns.DateTime()
     scheduled_start_date = columns.DateTime()
+    allocation_mode = columns.Text(default="range")
     created_at = columns.DateTime()
     updated_at = columns.DateTime()
 
 
-class ExperimentRepository(BaseRepository):
-    def _sync_table(self):
-        sync_table(ExperimentModel)
+class ExperimentByServiceModel(Model):
+    """Lookup copy of `experiments` partitioned by service, written in the same batch as the experiment"""
+    __keyspace__ = "experimentation"
+    __table_name__ = "experiments_by_service"
+
+    service_id = columns.UUID(primary_key=True)  # Partition key
+    name = columns.Text(primary_key=True)  # Clustering column
+    id = columns.UUID(required=True)
+    active = columns.Boolean(default=True)
+    last_deactivated_at = columns.DateTime()
+    last_activated_at = columns.DateTime()
+    scheduled_start_date = columns.DateTime()
+    allocation_mode = columns.Text(default="range")
+    created_at = columns.DateTime()
+    updated_at = columns.DateTime()
+
+
+_LOOKUP_COLUMNS = ('service_id', 'name', 'id', 'active', 'last_deactivated_at', 'last_activated_at',
+                   'scheduled_start_date', 'allocation_mode', 'created_at', 'updated_at')
 
+
+def lookup_values(experiment) -> dict:
+    """The experiments_by_service row mirroring an experiment"""
+    return {column: experiment[column] for column in _LOOKUP_COLUMNS}
+
+
+FIND_EXPERIMENT_BY_ID = statements.register(
+    "experiments.find_by_id",
+    "SELECT * FROM experiments WHERE id = ? LIMIT 1"
+)
+LIST_EXPERIMENTS_BY_SERVICE = statements.register(
+    "experiments.list_by_service",
+    "SELECT * FROM experiments_by_service WHERE service_id = ?"
+)
+# Filtering stays within the one service partition, it never scans the cluster
+LIST_ACTIVE_EXPERIMENTS_BY_SERVICE = statements.register(
+    "experiments.list_active_by_service",
+    "SELECT * FROM experiments_by_service WHERE service_id = ? AND active = true ALLOW FILTERING"
+)
+FIND_EXPERIMENT_BY_SERVICE_AND_NAME = statements.register(
+    "experiments.find_by_service_and_name",
+    "SELECT * FROM experiments_by_service WHERE service_id = ? AND name = ?"
+)
+
+
+class ExperimentRepository(BaseRepository):
     def create(self, experiment: ExperimentCreate) -> Experiment:
-        experiment_model = ExperimentModel.create(
-            id=uuid4(),
-            service_id=experiment.service_id,
-            name=experiment.name,
-            active=experiment.active,
-            scheduled_start_date=experiment.scheduled_start_date,
-            created_at=experiment.created_at if hasattr(experiment, 'created_at') else datetime.now(),
-            updated_at=experiment.updated_at if hasattr(experiment, 'updated_at') else datetime.now()
-        )
+        with BatchQuery() as batch:
+            experiment_model = ExperimentModel.batch(batch).create(
+                id=uuid4(),
+                service_id=experiment.service_id,
+                name=experiment.name,
+                active=experiment.active,
+                scheduled_start_date=experiment.scheduled_start_date,
+                allocation_mode=experiment.allocation_mode,
+                created_at=experiment.created_at if hasattr(experiment, 'created_at') else datetime.now(),
+                updated_at=experiment.updated_at if hasattr(experiment, 'updated_at') else datetime.now()
+            )
+            ExperimentByServiceModel.batch(batch).create(**lookup_values(experiment_model))
         return Experiment(**experiment_model)
 
     def find_by_id(self, experiment_id: UUID) -> Optional[Experiment]:
-        experiment = ExperimentModel.objects(id=experiment_id).first()
-        return Experiment(**experiment) if experiment else None
+        return map_row(Experiment, self._execute(FIND_EXPERIMENT_BY_ID, (experiment_id,), profile=CONFIG_READ))
 
     def find_by_service_and_name(self, service_id: UUID, name: str) -> Optional[Experiment]:
-        experiment = ExperimentModel.objects(service_id=service_id, name=name).allow_filtering().first()
-        return Experiment(**experiment) if experiment else None
+        return map_row(Experiment, self._execute(FIND_EXPERIMENT_BY_SERVICE_AND_NAME, (service_id, name),
+                                                 profile=CONFIG_READ))
 
     def list_by_service(self, service_id: UUID, active_only: bool = True) -> List[Experiment]:
-        experiments = ExperimentModel.objects(service_id=service_id).allow_filtering()
+        name = LIST_ACTIVE_EXPERIMENTS_BY_SERVICE if active_only else LIST_EXPERIMENTS_BY_SERVICE
+        return map_rows(Experiment, self._execute(name, (service_id,), profile=CONFIG_READ))
+
+    def list_all(self, active_only: bool = True) -> List[Experiment]:
+        experiments = ExperimentModel.objects.all()
         if active_only:
             return [Experiment(**e) for e in experiments if e.active]
         else:
@@ -63,20 +111,12 @@ class ExperimentRepository(BaseRepository):
 
     def list_experiments_paginated_by_service(self, service_id: UUID, active_only: bool or False, limit: int,
                                               paging_state: bytes = None):
-        query = f"SELECT * FROM {ExperimentModel.__table_name__}"
-
-        if active_only:
-            query += f" WHERE active = {active_only} and service_id = {service_id} ALLOW FILTERING"
-
-        statement = SimpleStatement(query, fetch_size=limit, consistency_level=ConsistencyLevel.QUORUM
-                                    )
+        name = LIST_ACTIVE_EXPERIMENTS_BY_SERVICE if active_only else LIST_EXPERIMENTS_BY_SERVICE
+        statement = self._bind(name, (service_id,), fetch_size=limit)
 
         # Execute query with paging state
-        result_set = self.session.execute(statement, paging_state=paging_state)
-        rows = result_set.current_rows
-
-        # Convert rows to Service objects
-        experiments = [Experiment(**row) for row in rows]
+        result_set = self.session.execute(statement, paging_state=paging_state, execution_profile=ADMIN)
+        experiments = map_rows(Experiment, result_set.current_rows)
         return experiments, result_set.paging_state
 
     def update_status(self, experiment_id: UUID, active: bool) -> Experiment:
@@ -94,19 +134,29 @@ class ExperimentRepository(BaseRepository):
         else:
             update_data['last_deactivated_at'] = datetime.now()
 
-        experiment.update(**update_data)
+        with BatchQuery() as batch:
+            experiment.batch(batch).update(**update_data)
+            ExperimentByServiceModel.batch(batch).create(**lookup_values(experiment))
         return Experiment(**experiment)
 
     def update(self, experiment: Experiment) -> Experiment:
         experiment = ExperimentModel.objects(id=experiment.id).first()
         if not experiment:
             raise ValueError("Experiment not found")
-        experiment.update(name=experiment.name, active=experiment.active, updated_at=experiment.updated_at)
+        with BatchQuery() as batch:
+            experiment.batch(batch).update(name=experiment.name, active=experiment.active,
+                                           updated_at=experiment.updated_at)
+            ExperimentByServiceModel.batch(batch).create(**lookup_values(experiment))
         return Experiment(**experiment)
 
     def delete(self, experiment_id: UUID) -> bool:
         try:
-            ExperimentModel.objects(id=experiment_id).delete()
+            experiment = ExperimentModel.objects(id=experiment_id).first()
+            with BatchQuery() as batch:
+                ExperimentModel.objects(id=experiment_id).batch(batch).delete()
+                if experiment:
+                    ExperimentByServiceModel.objects(service_id=experiment.service_id,
+                                                     name=experiment.name).batch(batch).delete()
             result = True
         except DoesNotExist:
             result = False
@@ -0,0 +1,167 @@
+# app/repositories/cassandra/layer_repository.py
+from uuid import UUID, uuid4
+from datetime import datetime
+from typing import List, Optional
+from cassandra.cqlengine import columns
+from cassandra.cqlengine.models import Model
+from cassandra.cqlengine.query import BatchQuery
+
+from app.db.cassandra import CONFIG_READ
+from app.db.statements import statements
+from app.models.schemas import ExperimentLayer, ExperimentLayerCreate, LayerExperiment, LayerExperimentCreate
+from app.repositories.cassandra.base_repository import BaseRepository, T, map_rows
+
+
+class ExperimentLayerModel(Model):
+    __keyspace__ = "experimentation"
+    __table_name__ = "experiment_layers"
+    id = columns.UUID(primary_key=True, default=uuid4)  # Partition key
+    service_id = columns.UUID(required=True)
+    name = columns.Text(required=True)
+    segment_count = columns.Integer(required=True)
+    created_at = columns.DateTime(default=datetime.now)
+    updated_at = columns.DateTime(default=datetime.now)
+
+
+class LayerExperimentModel(Model):
+    __keyspace__ = "experimentation"
+    __table_name__ = "layer_experiments"
+    layer_id = columns.UUID(primary_key=True)  # Partition key
+    experiment_id = columns.UUID(primary_key=True)  # Clustering column
+    segment_start = columns.Integer(required=True)
+    segment_end = columns.Integer(required=True)
+    created_at = columns.DateTime(default=datetime.now)
+    updated_at = columns.DateTime(default=datetime.now)
+
+
+class LayerByServiceModel(Model):
+    """Lookup copy of `experiment_layers` partitioned by service, written in the same batch"""
+    __keyspace__ = "experimentation"
+    __table_name__ = "layers_by_service"
+    service_id = columns.UUID(primary_key=True)  # Partition key
+    id = columns.UUID(primary_key=True)  # Clustering column
+    name = columns.Text(required=True)
+    segment_count = columns.Integer(required=True)
+    created_at = columns.DateTime(default=datetime.now)
+    updated_at = columns.DateTime(default=datetime.now)
+
+
+class LayerByExperimentModel(Model):
+    """Lookup copy of `layer_experiments` partitioned by experiment, written in the same batch"""
+    __keyspace__ = "experimentation"
+    __table_name__ = "layers_by_experiment"
+    experiment_id = columns.UUID(primary_key=True)  # Partition key
+    layer_id = columns.UUID(primary_key=True)  # Clustering column
+    segment_start = columns.Integer(required=True)
+    segment_end = columns.Integer(required=True)
+    created_at = columns.DateTime(default=datetime.now)
+    updated_at = columns.DateTime(default=datetime.now)
+
+
+def service_lookup_values(layer) -> dict:
+    """The layers_by_service row mirroring a layer"""
+    return {column: layer[column] for column in
+            ('service_id', 'id', 'name', 'segment_count', 'created_at', 'updated_at')}
+
+
+def experiment_lookup_values(member) -> dict:
+    """The layers_by_experiment row mirroring a layer membership"""
+    return {column: member[column] for column in
+            ('experiment_id', 'layer_id', 'segment_start', 'segment_end', 'created_at', 'updated_at')}
+
+
+LIST_LAYERS_BY_SERVICE = statements.register(
+    "layers.list_by_service",
+    "SELECT * FROM layers_by_service WHERE service_id = ?"
+)
+LIST_LAYERS_BY_EXPERIMENT = statements.register(
+    "layers.list_by_experiment",
+    "SELECT * FROM layers_by_experiment WHERE experiment_id = ?"
+)
+
+
+class LayerRepository(BaseRepository):
+    def create(self, layer: ExperimentLayerCreate) -> ExperimentLayer:
+        with BatchQuery() as batch:
+            layer_model = ExperimentLayerModel.batch(batch).create(
+                service_id=layer.service_id,
+                name=layer.name,
+                segment_count=layer.segment_count
+            )
+            LayerByServiceModel.batch(batch).create(**service_lookup_values(layer_model))
+        return ExperimentLayer(**layer_model)
+
+    def find_by_id(self, layer_id: UUID) -> Optional[ExperimentLayer]:
+        layer = ExperimentLayerModel.objects(id=layer_id).first()
+        return ExperimentLayer(**layer) if layer else None
+
+    def list_by_service(self, service_id: UUID) -> List[ExperimentLayer]:
+        return map_rows(ExperimentLayer, self._execute(LIST_LAYERS_BY_SERVICE, (service_id,), profile=CONFIG_READ))
+
+    def list_all(self) -> List[ExperimentLayer]:
+        return [ExperimentLayer(**l) for l in ExperimentLayerModel.objects.all()]
+
+    def update(self, entity: T) -> T:
+        pass
+
+    def assign_experiment(self, layer_id: UUID, assignment: LayerExperimentCreate) -> LayerExperiment:
+        """
+        Give an experiment a segment range of the layer
+
+        Re-assigning an experiment already in the layer replaces its range.
+
+        Raises:
+            ValueError: if the layer does not exist, the range is invalid, or it overlaps
+                another experiment of the layer or the experiment belongs to another layer
+        """
+        layer = self.find_by_id(layer_id)
+        if not layer:
+            raise ValueError("Layer not found")
+        if not 0 <= assignment.segment_start < assignment.segment_end <= layer.segment_count:
+            raise ValueError(f"Segment range must fall within the layer's {layer.segment_count} segments")
+
+        for member in self.list_experiments(layer_id):
+            if member.experiment_id == assignment.experiment_id:
+                continue
+            if assignment.segment_start < member.segment_end and member.segment_start < assignment.segment_end:
+                raise ValueError(f"Segment range overlaps experiment {member.experiment_id}")
+
+        other_layers = self._execute(LIST_LAYERS_BY_EXPERIMENT, (assignment.experiment_id,), profile=CONFIG_READ)
+        if any(m['layer_id'] != layer_id for m in other_layers):
+            raise ValueError("Experiment already belongs to another layer")
+
+        with BatchQuery() as batch:
+            member_model = LayerExperimentModel.batch(batch).create(
+                layer_id=layer_id,
+                experiment_id=assignment.experiment_id,
+                segment_start=assignment.segment_start,
+                segment_end=assignment.segment_end
+            )
+            LayerByExperimentModel.batch(batch).create(**experiment_lookup_values(member_model))
+        return LayerExperiment(**member_model)
+
+    def list_experiments(self, layer_id: UUID) -> List[LayerExperiment]:
+        members = LayerExperimentModel.objects(layer_id=layer_id)
+        return [LayerExperiment(**m) for m in members]
+
+    def list_all_experiments(self) -> List[LayerExperiment]:
+        return [LayerExperiment(**m) for m in LayerExperimentModel.objects.all()]
+
+    def remove_experiment(self, layer_id: UUID, experiment_id: UUID) -> bool:
+        with BatchQuery() as batch:
+            LayerExperimentModel.objects(layer_id=layer_id, experiment_id=experiment_id).batch(batch).delete()
+            LayerByExperimentModel.objects(experiment_id=experiment_id, layer_id=layer_id).batch(batch).delete()
+        return True
+
+    def delete(self, layer_id: UUID) -> bool:
+        layer = ExperimentLayerModel.objects(id=layer_id).first()
+        members = self.list_experiments(layer_id)
+        with BatchQuery() as batch:
+            for member in members:
+                LayerByExperimentModel.objects(experiment_id=member.experiment_id,
+                                               layer_id=layer_id).batch(batch).delete()
+            LayerExperimentModel.objects(layer_id=layer_id).batch(batch).delete()
+            ExperimentLayerModel.objects(id=layer_id).batch(batch).delete()
+            if layer:
+                LayerByServiceModel.objects(service_id=layer.service_id, id=layer_id).batch(batch).delete()
+        return True
@@ -0,0 +1,181 @@
+# app/repositories/cassandra/result_repository.py
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from cassandra.cqlengine import columns
+from cassandra.cqlengine.models import Model
+from cassandra.query import BatchStatement, BatchType as StatementBatchType, BoundStatement
+
+from app.config import settings
+from app.db.cassandra import HOT_READ, SAMPLE_WRITE
+from app.db.statements import statements
+from app.models.schemas import BucketedSample, BucketResult, BucketWindowResult
+from app.repositories.cassandra.base_repository import BaseRepository, T
+from app.repositories.cassandra.sharded_counter import ShardedCounter
+
+logger = logging.getLogger(__name__)
+
+
+class BucketCounterShardModel(Model):
+    """Samples assigned to and completed in each bucket of an experiment, per shard and time window"""
+    __keyspace__ = "experimentation"
+    __table_name__ = "bucket_counter_shards"
+    experiment_id = columns.UUID(partition_key=True)
+    shard = columns.Integer(partition_key=True)
+    window_start = columns.DateTime(primary_key=True, clustering_order="DESC")
+    bucket_name = columns.Text(primary_key=True)
+    assigned = columns.Counter()
+    completed = columns.Counter()
+
+
+def counter_window(moment: datetime, minutes: Optional[int] = None) -> datetime:
+    """The start of the counter window holding `moment`"""
+    width = timedelta(minutes=minutes or settings.result_window_minutes)
+    return datetime.min + (moment - datetime.min) // width * width
+
+
+def bucket_totals(windows: Iterable[BucketWindowResult]) -> List[BucketResult]:
+    """Sum window counts into one result per bucket, ordered by bucket name"""
+    totals: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    for window in windows:
+        totals[window.bucket_name][0] += window.assigned
+        totals[window.bucket_name][1] += window.completed
+    return [
+        BucketResult(bucket_name=name, assigned=assigned, completed=completed,
+                     completion_rate=completed / assigned if assigned else None)
+        for name, (assigned, completed) in sorted(totals.items())
+    ]
+
+
+bucket_counters = ShardedCounter("bucket_counter_shards", ("experiment_id", "window_start", "bucket_name"),
+                                 ("assigned", "completed"))
+
+LIST_BUCKET_COUNTERS = statements.register(
+    "results.list",
+    "SELECT * FROM bucket_counter_shards WHERE experiment_id = ? AND shard = ? AND window_start >= ? "
+    "AND window_start < ?"
+)
+DELETE_BUCKET_COUNTERS = statements.register(
+    "results.delete",
+    "DELETE FROM bucket_counter_shards WHERE experiment_id = ? AND shard = ?"
+)
+
+# Window bounds used when a listing is not limited in time
+_EARLIEST = datetime(1970, 1, 1)
+_LATEST = datetime(9999, 1, 1)
+
+
+class ExperimentResultRepository(BaseRepository):
+    """
+    Per-bucket assignment and completion counters of each experiment
+
+    Samples count towards the window of their `created_at`, completions included, so
+    each window's completion rate is that of the samples assigned in it. Each count is
+    sharded by sampled entity, so a popular experiment's increments spread over
+    `settings.result_counter_shards` partitions rather than contending on one, and
+    reads fan out over those partitions.
+
+    A sample is counted as assigned each time it is written, since writes do not read
+    whether it existed: re-sent and replayed samples count again, while sticky
+    allocation writes a sample only when its lookup found none. Counter updates
+    themselves cannot be retried safely, so a failed update is lost: the counts are
+    for monitoring, and `samples` stays the source of truth.
+    """
+
+    def create(self, entity: T) -> T:
+        """Counters are only ever incremented, see `record`"""
+        pass
+
+    def update(self, entity: T) -> T:
+        pass
+
+    def find_by_id(self, experiment_id: UUID) -> List[BucketWindowResult]:
+        return self.find_by_experiment(experiment_id)
+
+    def delete(self, experiment_id: UUID) -> bool:
+        futures = [self.session.execute_async(self._bind(DELETE_BUCKET_COUNTERS, (experiment_id, shard)),
+                                              execution_profile=SAMPLE_WRITE)
+                   for shard in bucket_counters.shards]
+        for future in futures:
+            future.result()
+        return True
+
+    def _increments(self, assigned: Iterable[BucketedSample],
+                    completed: Iterable[BucketedSample]) -> List[BoundStatement]:
+        """One counter update per (experiment, window, bucket, shard) the samples fall in"""
+        counts = [
+            ((sample.experiment_id, counter_window(sample.created_at), sample.allocated_bucket),
+             sample.sampled_entity, amounts)
+            for samples, amounts in ((assigned, (1, 0)), (completed, (0, 1)))
+            for sample in samples
+        ]
+        return [self._bind(bucket_counters.increment, parameters) for parameters in bucket_counters.increments(counts)]
+
+    def _counter_query(self, assigned: Iterable[BucketedSample], completed: Iterable[BucketedSample]):
+        """The counter updates as one query, in a counter batch when there are several"""
+        updates = self._increments(assigned, completed)
+        if len(updates) <= 1:
+            return updates[0] if updates else None
+        batch = BatchStatement(batch_type=StatementBatchType.COUNTER)
+        for update in updates:
+            batch.add(update)
+        return batch
+
+    def record(self, assigned: Iterable[BucketedSample] = (), completed: Iterable[BucketedSample] = ()):
+        """
+        Count newly written and newly completed samples
+
+        The samples themselves are already stored, so a failed update is logged rather than raised.
+        """
+        query = self._counter_query(assigned, completed)
+        if query is None:
+            return
+        try:
+            self.session.execute(query, execution_profile=SAMPLE_WRITE)
+        except Exception:
+            logger.exception("Failed to update bucket counters")
+
+    async def record_async(self, assigned: Iterable[BucketedSample] = (), completed: Iterable[BucketedSample] = ()):
+        query = self._counter_query(assigned, completed)
+        if query is None:
+            return
+        try:
+            await self._execute_async(query, profile=SAMPLE_WRITE)
+        except Exception:
+            logger.exception("Failed to update bucket counters")
+
+    def _window_queries(self, experiment_id: UUID, since: Optional[datetime],
+                        until: Optional[datetime]) -> List[BoundStatement]:
+        return [self._bind(LIST_BUCKET_COUNTERS, (experiment_id, shard, since or _EARLIEST, until or _LATEST))
+                for shard in bucket_counters.shards]
+
+    def find_by_experiment(self, experiment_id: UUID, since: Optional[datetime] = None,
+                           until: Optional[datetime] = None) -> List[BucketWindowResult]:
+        """The counts of every window of an experiment starting in [since, until), newest first"""
+        futures = [self.session.execute_async(query, execution_profile=HOT_READ)
+                   for query in self._window_queries(experiment_id, since, until)]
+        return self._windows(row for future in futures for row in future.result())
+
+    async def find_by_experiment_async(self, experiment_id: UUID, since: Optional[datetime] = None,
+                                       until: Optional[datetime] = None) -> List[BucketWindowResult]:
+        pages = await asyncio.gather(*(
+            self._execute_async(query, profile=HOT_READ)
+            for query in self._window_queries(experiment_id, since, until)
+        ))
+        return self._windows(row for page in pages for row in page)
+
+    @staticmethod
+    def _windows(rows: Iterable[dict]) -> List[BucketWindowResult]:
+        """Sum the shards of each window and bucket, newest window first"""
+        windows = [
+            BucketWindowResult(window_start=window_start, bucket_name=bucket_name, assigned=assigned,
+                               completed=completed)
+            for (_, window_start, bucket_name), (assigned, completed) in bucket_counters.totals(rows).items()
+        ]
+        windows.sort(key=lambda window: window.bucket_name)
+        windows.sort(key=lambda window: window.window_start, reverse=True)
+        return windows
@@ -1,21 +1,43 @@
 # app/repositories/sample_repository.py
+import asyncio
+import heapq
 import uuid
+from itertools import islice
 from uuid import UUID
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from datetime import date, datetime, timedelta
+
+import xxhash
 
-from cassandra import ConsistencyLevel
 from cassandra.cluster import Session
 from cassandra.cqlengine import columns
 from cassandra.cqlengine.models import Model
-from cassandra.query import BatchStatement
+from cassandra.query import BatchStatement, BatchType as StatementBatchType, BoundStatement
 
-from app.db.cassandra import CassandraSessionManager
+from app.config import settings
+from app.db.cassandra import HOT_READ, SAMPLE_WRITE, CassandraSessionManager
 from app.models.schemas import BucketedSample, BucketedSampleCreate
-from app.repositories.cassandra.base_repository import BaseRepository, T, K
-from cassandra.cqlengine.management import sync_table
+from app.db.statements import statements
+from app.repositories.cassandra.base_repository import BaseRepository, T, K, map_row, map_rows, partition_groups
+from app.repositories.cassandra.result_repository import ExperimentResultRepository
+
+
+# Fixed forever: changing it would give every (experiment, entity, value) a new sample id
+SAMPLE_ID_NAMESPACE = uuid.UUID("bf8d0a45-577e-4673-90a4-4bf550c3d74a")
+
+
+def sample_id(experiment_id: UUID, sampled_entity: str, sampled_value: str) -> UUID:
+    """
+    The id of the sample of an (experiment, entity, value), the same on every write
+
+    Retried and concurrent duplicate writes of a sample therefore upsert one `samples`
+    row instead of adding another, without a read or a lightweight transaction first.
+    """
+    return uuid.uuid5(SAMPLE_ID_NAMESPACE, "\x1f".join((str(experiment_id), sampled_entity, sampled_value)))
 
 
+# Keyed by created_at, so a sample re-sent without it got another row; superseded by
+# `samples` and only still read to backfill it
 class BucketedSampleModel(Model):
     __keyspace__ = "experimentation"
     __table_name__ = "bucketed_samples"
@@ -30,64 +52,511 @@ class BucketedSampleModel(Model):
     updated_at = columns.DateTime()
 
 
-class BucketedSampleRepository(BaseRepository):
+class SampleModel(Model):
+    """
+    Each sample by its deterministic id
+
+    The key leaves out created_at, so every write of a sample, re-sends without
+    created_at included, upserts this one row.
+    """
+    __keyspace__ = "experimentation"
+    __table_name__ = "samples"
+    id = columns.UUID(primary_key=True)
+    experiment_id = columns.UUID(required=True)
+    sampled_entity = columns.Text(required=True)
+    sampled_value = columns.Text(required=True)
+    allocated_bucket = columns.Text(required=True)
+    complete = columns.Boolean(default=False)
+    completed_at = columns.DateTime()
+    created_at = columns.DateTime(required=True)
+    updated_at = columns.DateTime()
+
+
+def sample_values(sample) -> dict:
+    """
+    The samples row of a bucketed_samples row
+
+    An incomplete row leaves completion unset, so whichever of a sample's several
+    bucketed_samples rows is copied last, a completed one is not reopened.
+    """
+    return {
+        'id': sample['id'],
+        'experiment_id': sample['experiment_id'],
+        'sampled_entity': sample['sampled_entity'],
+        'sampled_value': sample['sampled_value'],
+        'allocated_bucket': sample['allocated_bucket'],
+        'complete': sample['complete'] or None,
+        'completed_at': sample['completed_at'] if sample['complete'] else None,
+        'created_at': sample['created_at'],
+        'updated_at': sample['updated_at']
+    }
+
+
+class SampleTimelineModel(Model):
+    """
+    Samples of an experiment by day, spread over `settings.sample_shard_count` shards
+
+    Written alongside samples so that no partition holds more than one shard
+    of one day of an experiment, however large the experiment grows.
+    """
+    __keyspace__ = "experimentation"
+    __table_name__ = "samples_by_experiment_day"
+    experiment_id = columns.UUID(partition_key=True)
+    shard = columns.Integer(partition_key=True)
+    day = columns.Date(partition_key=True)
+    created_at = columns.DateTime(primary_key=True, clustering_order="DESC")  # Clustering column
+    id = columns.UUID(primary_key=True)  # Clustering column
+    sampled_entity = columns.Text(required=True)
+    sampled_value = columns.Text(required=True)
+    allocated_bucket = columns.Text(required=True)
+    complete = columns.Boolean(default=False)
+    completed_at = columns.DateTime()
+    updated_at = columns.DateTime()
+
+
+def sample_shard(sampled_entity: str, shard_count: Optional[int] = None) -> int:
+    """
+    The timeline shard of an entity's samples
+
+    Derived from the entity alone so a sample's timeline row can always be found
+    again; `settings.sample_shard_count` must therefore not change once samples exist.
+    """
+    return xxhash.xxh32_intdigest(sampled_entity) % (shard_count or settings.sample_shard_count)
+
+
+def timeline_values(sample) -> dict:
+    """The samples_by_experiment_day row mirroring a sample row or model"""
+    return {
+        'experiment_id': sample['experiment_id'],
+        'shard': sample_shard(sample['sampled_entity']),
+        'day': sample['created_at'].date(),
+        'created_at': sample['created_at'],
+        'id': sample['id'],
+        'sampled_entity': sample['sampled_entity'],
+        'sampled_value': sample['sampled_value'],
+        'allocated_bucket': sample['allocated_bucket'],
+        'complete': sample['complete'],
+        'completed_at': sample['completed_at'],
+        'updated_at': sample['updated_at']
+    }
+
+
+class SampleAssignmentModel(Model):
+    """
+    The sample of each (experiment, entity, value), for sticky assignment lookups
+
+    Written alongside samples, so "has this entity been assigned, and to which
+    bucket?" is a single-row primary-key read.
+    """
+    __keyspace__ = "experimentation"
+    __table_name__ = "sample_assignments"
+    experiment_id = columns.UUID(partition_key=True)
+    sampled_entity = columns.Text(partition_key=True)
+    sampled_value = columns.Text(primary_key=True)  # Clustering column
+    id = columns.UUID(required=True)
+    allocated_bucket = columns.Text(required=True)
+    complete = columns.Boolean(default=False)
+    completed_at = columns.DateTime()
+    created_at = columns.DateTime(required=True)
+    updated_at = columns.DateTime()
+
+
+def assignment_values(sample) -> dict:
+    """The sample_assignments row mirroring a sample row or model"""
+    return {column: sample[column] for column in
+            ('experiment_id', 'sampled_entity', 'sampled_value', 'id', 'allocated_bucket', 'complete',
+             'completed_at', 'created_at', 'updated_at')}
+
+
+def merge_newest_first(pages: Sequence[List[dict]], limit: int, seen: Optional[set] = None) -> List[BucketedSample]:
+    """
+    Merge per-shard timeline pages, each already newest first, into at most `limit` samples
+
+    A sample re-sent without its `created_at` gets a timeline row per write, possibly
+    on different days; only the newest, matching its `samples` row, is kept. Pass
+    the same `seen` set for every day of a listing to skip ids already listed on a
+    newer day.
+    """
+    merged = heapq.merge(*pages, key=lambda row: row['created_at'], reverse=True)
+    seen = set() if seen is None else seen
+    unique = (row for row in merged if not (row['id'] in seen or seen.add(row['id'])))
+    return map_rows(BucketedSample, islice(unique, limit))
+
+
+# Inserts leave `complete` unset, so re-sending a sample never reopens it once completed
+_SAMPLE_COLUMNS = ('id', 'experiment_id', 'sampled_entity', 'sampled_value', 'allocated_bucket', 'created_at',
+                   'updated_at')
+_TIMELINE_COLUMNS = ('experiment_id', 'shard', 'day', 'created_at', 'id', 'sampled_entity', 'sampled_value',
+                     'allocated_bucket', 'updated_at')
+_ASSIGNMENT_COLUMNS = ('experiment_id', 'sampled_entity', 'sampled_value', 'id', 'allocated_bucket', 'created_at',
+                       'updated_at')
 
-    def __init__(self):
+FIND_SAMPLE_BY_ID = statements.register(
+    "samples.find_by_id",
+    "SELECT * FROM samples WHERE id = ?"
+)
+FIND_SAMPLE_BY_ENTITY_VALUE = statements.register(
+    "samples.find_by_entity_value",
+    "SELECT * FROM sample_assignments WHERE experiment_id = ? AND sampled_entity = ? AND sampled_value = ?"
+)
+LIST_SAMPLE_TIMELINE = statements.register(
+    "samples.list_timeline",
+    "SELECT * FROM samples_by_experiment_day WHERE experiment_id = ? AND shard = ? AND day = ? LIMIT ?"
+)
+INSERT_SAMPLE = statements.register(
+    "samples.insert",
+    f"INSERT INTO samples ({', '.join(_SAMPLE_COLUMNS)}) VALUES ({', '.join('?' * len(_SAMPLE_COLUMNS))})"
+)
+MARK_SAMPLE_COMPLETE = statements.register(
+    "samples.mark_complete",
+    "UPDATE samples SET complete = true, completed_at = ?, updated_at = ? WHERE id = ?"
+)
+INSERT_SAMPLE_TIMELINE = statements.register(
+    "samples.insert_timeline",
+    f"INSERT INTO samples_by_experiment_day ({', '.join(_TIMELINE_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(_TIMELINE_COLUMNS))})"
+)
+INSERT_SAMPLE_ASSIGNMENT = statements.register(
+    "samples.insert_assignment",
+    f"INSERT INTO sample_assignments ({', '.join(_ASSIGNMENT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(_ASSIGNMENT_COLUMNS))})"
+)
+MARK_TIMELINE_COMPLETE = statements.register(
+    "samples.mark_timeline_complete",
+    "UPDATE samples_by_experiment_day SET complete = true, completed_at = ?, updated_at = ? "
+    "WHERE experiment_id = ? AND shard = ? AND day = ? AND created_at = ? AND id = ?"
+)
+MARK_ASSIGNMENT_COMPLETE = statements.register(
+    "samples.mark_assignment_complete",
+    "UPDATE sample_assignments SET complete = true, completed_at = ?, updated_at = ? "
+    "WHERE experiment_id = ? AND sampled_entity = ? AND sampled_value = ?"
+)
+
+
+class BucketedSampleRepository(BaseRepository):
+    def __init__(self, result_repo: ExperimentResultRepository = None):
         self.session: Session = CassandraSessionManager.get_session()
         super().__init__()
+        # Bucket counters follow every sample written and completed
+        self.result_repo = result_repo or ExperimentResultRepository()
 
     def find_by_id(self, bucketed_sample_id: UUID) -> Optional[BucketedSample]:
-        sample = BucketedSampleModel.objects(id=bucketed_sample_id).first()
-        return BucketedSample(**sample)
+        return map_row(BucketedSample, self._execute(FIND_SAMPLE_BY_ID, (bucketed_sample_id,), profile=HOT_READ))
 
     def update(self, entity: T) -> T:
         pass
 
-    def _sync_table(self):
-        sync_table(BucketedSampleModel)
-
     def create(self, sample: BucketedSampleCreate) -> BucketedSample:
-        sample_model = BucketedSampleModel.create(
-            experiment_id=sample.experiment_id,
-            sampled_entity=sample.sampled_entity,
-            sampled_value=sample.sampled_value,
-            allocated_bucket=sample.allocated_bucket,
-            created_at=datetime.now(),
-            updated_at=datetime.now()
-        )
-        return BucketedSample(**sample_model)
+        """
+        Record a sample with a single logged batch, without reading it first
 
-    def mark_complete(self, experiment_id: UUID, sampled_entity: str, sampled_value: str) -> BucketedSample:
-        sample = BucketedSampleModel.objects(
-            experiment_id=experiment_id,
-            sampled_entity=sampled_entity,
-            sampled_value=sampled_value
-        ).allow_filtering().first()
+        Every write of a sample upserts the same rows, the newest write's bucket and
+        created_at winning; a completed sample stays complete, though the sample
+        returned, being what this write stored, does not say so.
+        """
+        sample_row = self._sample_row(sample, datetime.now())
+        self.session.execute(self._insert_batch([sample_row], StatementBatchType.LOGGED),
+                             execution_profile=SAMPLE_WRITE)
+        created = BucketedSample(**sample_row)
+        self.result_repo.record(assigned=[created])
+        return created
 
+    def create_many(self, samples: List[BucketedSampleCreate]) -> List[BucketedSample]:
+        """Record several samples in one unlogged batch"""
+        if not samples:
+            return []
+
+        now = datetime.now()
+        sample_rows = [self._sample_row(sample, now) for sample in samples]
+        self.session.execute(self._insert_batch(sample_rows, StatementBatchType.UNLOGGED),
+                             execution_profile=SAMPLE_WRITE)
+        created = [BucketedSample(**row) for row in sample_rows]
+        self.result_repo.record(assigned=created)
+        return created
+
+    def mark_complete(self, experiment_id: UUID, sampled_entity: str, sampled_value: str) -> BucketedSample:
+        sample = self.find_by_entity_value(experiment_id, sampled_entity, sampled_value)
         if not sample:
             raise ValueError("Sample not found")
 
-        sample.update(
-            complete=True,
-            completed_at=datetime.now(),
-            updated_at=datetime.now()
-        )
-        return BucketedSample(**sample)
+        now = datetime.now()
+        self.session.execute(self._completion_batch(sample, now), execution_profile=SAMPLE_WRITE)
+        if not sample.complete:
+            self.result_repo.record(completed=[sample])
+        return sample.model_copy(update={'complete': True, 'completed_at': now, 'updated_at': now})
 
     def find_by_entity_value(self, experiment_id: UUID, sampled_entity: str, sampled_value: str) -> Optional[
         BucketedSample]:
-        sample = BucketedSampleModel.objects(
-            experiment_id=experiment_id,
-            sampled_entity=sampled_entity,
-            sampled_value=sampled_value
-        ).allow_filtering().first()
-        return BucketedSample(**sample) if sample else None
+        rows = self._execute(FIND_SAMPLE_BY_ENTITY_VALUE, (experiment_id, sampled_entity, sampled_value),
+                             profile=HOT_READ)
+        return map_row(BucketedSample, rows)
+
+    def find_assignments(self, experiment_ids: Iterable[UUID], sampled_entity: str,
+                         sampled_value: str) -> Dict[UUID, BucketedSample]:
+        """Existing samples of an (entity, value) pair, keyed by experiment"""
+        assignments = {}
+        for experiment_id in experiment_ids:
+            sample = self.find_by_entity_value(experiment_id, sampled_entity, sampled_value)
+            if sample:
+                assignments[experiment_id] = sample
+        return assignments
+
+    async def find_by_id_async(self, bucketed_sample_id: UUID) -> Optional[BucketedSample]:
+        rows = await self._execute_async(self._bind(FIND_SAMPLE_BY_ID, (bucketed_sample_id,)), profile=HOT_READ)
+        return map_row(BucketedSample, rows)
+
+    async def find_by_entity_value_async(self, experiment_id: UUID, sampled_entity: str,
+                                         sampled_value: str) -> Optional[BucketedSample]:
+        rows = await self._execute_async(
+            self._bind(FIND_SAMPLE_BY_ENTITY_VALUE, (experiment_id, sampled_entity, sampled_value)),
+            profile=HOT_READ
+        )
+        return map_row(BucketedSample, rows)
+
+    async def find_assignments_async(self, experiment_ids: Iterable[UUID], sampled_entity: str,
+                                     sampled_value: str) -> Dict[UUID, BucketedSample]:
+        """Existing samples of an (entity, value) pair, keyed by experiment, looked up concurrently"""
+        experiment_ids = list(experiment_ids)
+        samples = await asyncio.gather(*(
+            self.find_by_entity_value_async(experiment_id, sampled_entity, sampled_value)
+            for experiment_id in experiment_ids
+        ))
+        return {
+            experiment_id: sample
+            for experiment_id, sample in zip(experiment_ids, samples)
+            if sample
+        }
+
+    @staticmethod
+    def _sample_row(sample: BucketedSampleCreate, now: datetime) -> dict:
+        """The row a sample would be written as if it were new"""
+        return {
+            'id': sample_id(sample.experiment_id, sample.sampled_entity, sample.sampled_value),
+            'experiment_id': sample.experiment_id,
+            'sampled_entity': sample.sampled_entity,
+            'sampled_value': sample.sampled_value,
+            'allocated_bucket': sample.allocated_bucket,
+            'complete': False,
+            'completed_at': None,
+            'created_at': sample.created_at or now,
+            'updated_at': now
+        }
+
+    def _insert_statements(self, sample_row: dict) -> List[BoundStatement]:
+        """The samples, timeline and assignment inserts of a sample row"""
+        timeline_row = timeline_values(sample_row)
+        return [
+            self._bind(INSERT_SAMPLE, tuple(sample_row[c] for c in _SAMPLE_COLUMNS)),
+            self._bind(INSERT_SAMPLE_TIMELINE, tuple(timeline_row[c] for c in _TIMELINE_COLUMNS)),
+            self._bind(INSERT_SAMPLE_ASSIGNMENT, tuple(sample_row[c] for c in _ASSIGNMENT_COLUMNS))
+        ]
+
+    def _insert_batch(self, sample_rows: List[dict], batch_type) -> BatchStatement:
+        batch = BatchStatement(batch_type=batch_type)
+        for sample_row in sample_rows:
+            for statement in self._insert_statements(sample_row):
+                batch.add(statement)
+        return batch
+
+    async def create_async(self, sample: BucketedSampleCreate) -> BucketedSample:
+        """
+        Record a sample with a single logged batch, like `create`
+
+        Counter updates cannot share a batch with other writes, so the sample is counted
+        alongside the batch rather than after it and a write costs one round trip.
+        """
+        sample_row = self._sample_row(sample, datetime.now())
+        created = BucketedSample(**sample_row)
+        await asyncio.gather(
+            self._execute_async(self._insert_batch([sample_row], StatementBatchType.LOGGED), profile=SAMPLE_WRITE),
+            self.result_repo.record_async(assigned=[created])
+        )
+        return created
+
+    async def create_many_async(self, samples: List[BucketedSampleCreate]) -> List[BucketedSample]:
+        """Record several samples in one unlogged batch"""
+        if not samples:
+            return []
+
+        now = datetime.now()
+        sample_rows = [self._sample_row(sample, now) for sample in samples]
+        await self._execute_async(self._insert_batch(sample_rows, StatementBatchType.UNLOGGED), profile=SAMPLE_WRITE)
+        created = [BucketedSample(**row) for row in sample_rows]
+        await self.result_repo.record_async(assigned=created)
+        return created
+
+    def _completion_statements(self, sample: BucketedSample, now: datetime) -> List[BoundStatement]:
+        """Mark a sample complete in samples and in both of its lookup tables"""
+        return [
+            self._bind(MARK_SAMPLE_COMPLETE, (now, now, sample.id)),
+            self._bind(
+                MARK_TIMELINE_COMPLETE,
+                (now, now, sample.experiment_id, sample_shard(sample.sampled_entity), sample.created_at.date(),
+                 sample.created_at, sample.id)
+            ),
+            self._bind(
+                MARK_ASSIGNMENT_COMPLETE,
+                (now, now, sample.experiment_id, sample.sampled_entity, sample.sampled_value)
+            )
+        ]
+
+    def _completion_batch(self, sample: BucketedSample, now: datetime) -> BatchStatement:
+        batch = BatchStatement(batch_type=StatementBatchType.LOGGED)
+        for statement in self._completion_statements(sample, now):
+            batch.add(statement)
+        return batch
+
+    async def _write_grouped(self, tagged: List[Tuple[int, BoundStatement]], count: int,
+                             concurrency: Optional[int] = None) -> List[Optional[Exception]]:
+        """
+        Run statements tagged with item indexes as partition-grouped unlogged batches
+
+        At most `concurrency` batches are in flight. An item fails if any batch holding
+        one of its statements fails.
+
+        Returns:
+            For each of the `count` items, the error that stopped it or None
+        """
+        errors: List[Optional[Exception]] = [None] * count
+        in_flight = asyncio.Semaphore(concurrency or settings.sample_batch_concurrency)
+
+        async def write(group):
+            if len(group) == 1:
+                statement = group[0][1]
+            else:
+                statement = BatchStatement(batch_type=StatementBatchType.UNLOGGED)
+                for _, member in group:
+                    statement.add(member)
+            async with in_flight:
+                try:
+                    await self._execute_async(statement, profile=SAMPLE_WRITE)
+                except Exception as e:
+                    for index, _ in group:
+                        errors[index] = errors[index] or e
+
+        await asyncio.gather(*(write(group)
+                               for group in partition_groups(tagged, settings.sample_batch_partition_size)))
+        return errors
+
+    async def ingest_async(self, samples: List[BucketedSampleCreate],
+                           concurrency: Optional[int] = None) -> List[Tuple[BucketedSample, Optional[Exception]]]:
+        """
+        Record many samples at once, reporting the outcome of each
+
+        The samples' inserts are grouped by the partition they write into unlogged
+        batches, with at most `concurrency` batches in flight. A sample fails if any
+        batch holding one of its rows fails; being idempotent, it can simply be
+        re-sent. Written samples are counted, so a re-sent or replayed one counts again.
+
+        Returns:
+            Each sample with the error that stopped it, or None when it was written
+        """
+        now = datetime.now()
+        sample_rows = [self._sample_row(sample, now) for sample in samples]
+        tagged = [(index, statement) for index, row in enumerate(sample_rows)
+                  for statement in self._insert_statements(row)]
+        errors = await self._write_grouped(tagged, len(samples), concurrency)
+        written = [BucketedSample(**row) for row in sample_rows]
+        await self.result_repo.record_async(assigned=[
+            sample for sample, error in zip(written, errors) if error is None
+        ])
+        return list(zip(written, errors))
+
+    async def complete_many_async(self, experiment_id: UUID, keys: List[Union[UUID, Tuple[str, str]]],
+                                  concurrency: Optional[int] = None
+                                  ) -> List[Tuple[Optional[BucketedSample], Optional[Exception]]]:
+        """
+        Mark many samples of an experiment complete, reporting the outcome of each
+
+        Keys are sample ids or (sampled_entity, sampled_value) pairs. Each is resolved
+        with a single-partition read, then the completions are written like
+        `ingest_async` writes samples. Unlike `mark_complete_async` the three rows of a
+        sample are not updated atomically, but re-sending a failed key repairs them.
+
+        Returns:
+            Each completed sample, or None when the key matches no sample of the
+            experiment, with the error that stopped it or None
+        """
+        in_flight = asyncio.Semaphore(concurrency or settings.sample_batch_concurrency)
+
+        async def resolve(key) -> Optional[BucketedSample]:
+            async with in_flight:
+                if isinstance(key, UUID):
+                    sample = await self.find_by_id_async(key)
+                    return sample if sample and sample.experiment_id == experiment_id else None
+                return await self.find_by_entity_value_async(experiment_id, *key)
+
+        resolved = await asyncio.gather(*(resolve(key) for key in keys), return_exceptions=True)
+        errors: List[Optional[Exception]] = [r if isinstance(r, Exception) else None for r in resolved]
+
+        now = datetime.now()
+        tagged = []
+        for index, sample in enumerate(resolved):
+            if isinstance(sample, BucketedSample):
+                tagged.extend((index, statement) for statement in self._completion_statements(sample, now))
+
+        write_errors = await self._write_grouped(tagged, len(keys), concurrency)
+        results = []
+        newly_completed = []
+        for sample, error, write_error in zip(resolved, errors, write_errors):
+            if not isinstance(sample, BucketedSample):
+                results.append((None, error))
+            elif write_error is not None:
+                results.append((sample, write_error))
+            else:
+                if not sample.complete:
+                    newly_completed.append(sample)
+                results.append((sample.model_copy(update={'complete': True, 'completed_at': now,
+                                                           'updated_at': now}), None))
+        await self.result_repo.record_async(completed=newly_completed)
+        return results
+
+    async def mark_complete_async(self, sample: BucketedSample) -> BucketedSample:
+        now = datetime.now()
+        await self._execute_async(self._completion_batch(sample, now), profile=SAMPLE_WRITE)
+        if not sample.complete:
+            await self.result_repo.record_async(completed=[sample])
+        return sample.model_copy(update={'complete': True, 'completed_at': now, 'updated_at': now})
+
+    @staticmethod
+    def _timeline_days() -> List[date]:
+        """Days a listing walks back through, newest first"""
+        today = datetime.now().date()
+        return [today - timedelta(days=offset) for offset in range(settings.sample_timeline_lookback_days + 1)]
+
+    def _timeline_queries(self, experiment_id: UUID, day: date, limit: int):
+        return [self._bind(LIST_SAMPLE_TIMELINE, (experiment_id, shard, day, limit))
+                for shard in range(settings.sample_shard_count)]
 
     def list_by_experiment(self, experiment_id: UUID, limit: int = 100) -> List[BucketedSample]:
-        samples = BucketedSampleModel.objects(
-            experiment_id=experiment_id
-        ).allow_filtering().limit(limit)
-        return [BucketedSample(**s) for s in samples]
+        """
+        The newest `limit` samples of an experiment
+
+        Each day's shards are read in parallel and merged by `created_at`, walking back
+        a day at a time until enough samples are found or the lookback is exhausted.
+        """
+        samples: List[BucketedSample] = []
+        seen = set()
+        for day in self._timeline_days():
+            futures = [self.session.execute_async(query, execution_profile=HOT_READ)
+                       for query in self._timeline_queries(experiment_id, day, limit - len(samples))]
+            samples.extend(merge_newest_first([list(f.result()) for f in futures], limit - len(samples), seen))
+            if len(samples) >= limit:
+                break
+        return samples
+
+    async def list_by_experiment_async(self, experiment_id: UUID, limit: int = 100) -> List[BucketedSample]:
+        samples: List[BucketedSample] = []
+        seen = set()
+        for day in self._timeline_days():
+            pages = await asyncio.gather(*(
+                self._execute_async(query, profile=HOT_READ)
+                for query in self._timeline_queries(experiment_id, day, limit - len(samples))
+            ))
+            samples.extend(merge_newest_first(pages, limit - len(samples), seen))
+            if len(samples) >= limit:
+                break
+        return samples
 
     def delete(self, experiment_id: UUID) -> bool:
         pass
@@ -7,12 +7,12 @@ from cassandra.cluster import Session
 from cassandra.cqlengine import columns
 from cassandra.cqlengine.models import Model
 
-from app.db.cassandra import CassandraSessionManager
+from app.db.cassandra import ADMIN, CONFIG_READ, CassandraSessionManager
 from app.models.schemas import Service, ServiceCreate
-from app.repositories.cassandra.base_repository import BaseRepository, T
+from app.db.statements import statements
+from app.repositories.cassandra.base_repository import BaseRepository, T, map_row, map_rows
 from uuid import UUID
 from cassandra.cqlengine.query import DoesNotExist
-from cassandra.cqlengine.management import sync_table
 
 
 class ServiceModel(Model):
@@ -26,23 +26,28 @@ class ServiceModel(Model):
     updated_at = columns.DateTime()
 
 
-class ServiceRepository(BaseRepository):
+FIND_SERVICE_BY_ID = statements.register(
+    "services.find_by_id",
+    "SELECT * FROM services WHERE id = ?"
+)
+LIST_SERVICES = statements.register(
+    "services.list",
+    "SELECT * FROM services"
+)
+LIST_ACTIVE_SERVICES = statements.register(
+    "services.list_active",
+    "SELECT * FROM services WHERE active = true ALLOW FILTERING"
+)
 
-    def list_services_paginated(self, active_only: bool or False, limit: int, paging_state: bytes = None):
-        rows, paging_state = self.list_paginated(
-            session=self.session,
-            table_name="services",
-            has_active_only=True,
-            active_only=active_only,
-            limit=limit,
-            paging_state=paging_state)
 
-        # Convert rows to Service objects
-        services = [Service(**row) for row in rows]
-        return services, paging_state
+class ServiceRepository(BaseRepository):
+    def list_services_paginated(self, active_only: bool or False, limit: int, paging_state: bytes = None):
+        statement = self._bind(LIST_ACTIVE_SERVICES if active_only else LIST_SERVICES, fetch_size=limit)
 
-    def _sync_table(self):
-        sync_table(ServiceModel)
+        # Execute query with paging state
+        result_set = self.session.execute(statement, paging_state=paging_state, execution_profile=ADMIN)
+        services = map_rows(Service, result_set.current_rows)
+        return services, result_set.paging_state
 
     def create(self, service: ServiceCreate) -> Service:
         service_model = ServiceModel.create(
@@ -55,8 +60,7 @@ class ServiceRepository(BaseRepository):
         return Service(**service_model)
 
     def find_by_id(self, id: UUID) -> Optional[Service]:
-        service = ServiceModel.objects(id=id).first()
-        return Service(**service) if service else None
+        return map_row(Service, self._execute(FIND_SERVICE_BY_ID, (id,), profile=CONFIG_READ))
 
     def find_by_name(self, name: str) -> Optional[Service]:
         service = ServiceModel.objects(name=name).first()
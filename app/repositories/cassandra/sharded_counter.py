@@ -0,0 +1,76 @@
+# app/repositories/cassandra/sharded_counter.py
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import xxhash
+
+from app.config import settings
+from app.db.statements import statements
+
+# Keeps counter shards independent of the sample timeline shards, which hash the same entities
+COUNTER_SHARD_SEED = 0x5C0A7E
+
+
+def counter_shard(entity: str, shard_count: int) -> int:
+    """The shard an entity's increments go to"""
+    return xxhash.xxh32_intdigest(entity, seed=COUNTER_SHARD_SEED) % shard_count
+
+
+class ShardedCounter:
+    """
+    Counters of a table spread over shard partitions, so no single cell takes every increment
+
+    The table's partition key ends with an INT `shard` column and its primary key holds
+    every one of `key_columns`. An increment goes to the shard its entity hashes to, so a
+    hot key's increments land on `shard_count` partitions, each on its own replicas. A
+    read fans out over the shard partitions (see `shards`) and sums the shards of each
+    key. Reads only cover shards below `shard_count`, so it may be raised but never
+    lowered.
+    """
+
+    def __init__(self, table: str, key_columns: Sequence[str], counter_columns: Sequence[str],
+                 shard_count: Optional[int] = None):
+        self.table = table
+        self.key_columns = tuple(key_columns)
+        self.counter_columns = tuple(counter_columns)
+        self._shard_count = shard_count
+        self.increment = statements.register(
+            f"{table}.increment",
+            f"UPDATE {table} SET {', '.join(f'{c} = {c} + ?' for c in self.counter_columns)} "
+            f"WHERE {' AND '.join(f'{c} = ?' for c in self.key_columns + ('shard',))}"
+        )
+
+    @property
+    def shard_count(self) -> int:
+        return self._shard_count or settings.result_counter_shards
+
+    @property
+    def shards(self) -> range:
+        """The shard partitions a read has to cover"""
+        return range(self.shard_count)
+
+    def increments(self, counts: Iterable[Tuple[tuple, str, Sequence[int]]]) -> List[tuple]:
+        """
+        Parameters of the `increment` statement for (key, entity, amounts) entries
+
+        Entries landing on the same shard of a key are added together first, so each
+        shard row gets at most one update.
+        """
+        shard_count = self.shard_count
+        totals: Dict[tuple, List[int]] = defaultdict(lambda: [0] * len(self.counter_columns))
+        for key, entity, amounts in counts:
+            row = totals[tuple(key) + (counter_shard(entity, shard_count),)]
+            for index, amount in enumerate(amounts):
+                row[index] += amount
+        return [tuple(amounts) + key for key, amounts in totals.items()]
+
+    def totals(self, rows: Iterable[Dict[str, Any]]) -> Dict[tuple, List[int]]:
+        """Sum the shard rows of a read by key, keeping the order the keys were first read in"""
+        totals: Dict[tuple, List[int]] = {}
+        for row in rows:
+            key = tuple(row[c] for c in self.key_columns)
+            sums = totals.setdefault(key, [0] * len(self.counter_columns))
+            for index, column in enumerate(self.counter_columns):
+                # A counter never incremented reads back as null
+                sums[index] += row[column] or 0
+        return totals
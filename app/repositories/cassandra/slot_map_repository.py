@@ -0,0 +1,69 @@
+# app/repositories/cassandra/slot_map_repository.py
+import sys
+from array import array
+from uuid import UUID
+from datetime import datetime
+from typing import List, Optional
+from cassandra.cqlengine import columns
+from cassandra.cqlengine.models import Model
+
+from app.models.schemas import ExperimentSlotMap
+from app.repositories.cassandra.base_repository import BaseRepository, T
+
+
+class ExperimentSlotMapModel(Model):
+    __keyspace__ = "experimentation"
+    __table_name__ = "experiment_slot_maps"
+    experiment_id = columns.UUID(primary_key=True)  # Partition key
+    bucket_names = columns.List(columns.Text)
+    owners = columns.Blob(required=True)  # array('H') of indexes into bucket_names, one per slot
+    updated_at = columns.DateTime(default=datetime.now)
+
+
+class SlotMapRepository(BaseRepository):
+    """Stores which bucket owns each fixed slot of experiments allocated in slot map mode"""
+
+
+    @staticmethod
+    def _to_schema(slot_map: ExperimentSlotMapModel) -> ExperimentSlotMap:
+        owners = array('H')
+        owners.frombytes(slot_map.owners)
+        if sys.byteorder != 'little':
+            owners.byteswap()
+        names = slot_map.bucket_names
+        return ExperimentSlotMap(
+            experiment_id=slot_map.experiment_id,
+            owners=[names[index] for index in owners],
+            updated_at=slot_map.updated_at
+        )
+
+    def save(self, experiment_id: UUID, owners: List[str]) -> ExperimentSlotMap:
+        names = sorted(set(owners))
+        index = {name: i for i, name in enumerate(names)}
+        encoded = array('H', (index[owner] for owner in owners))
+        if sys.byteorder != 'little':
+            encoded.byteswap()
+        slot_map = ExperimentSlotMapModel.create(
+            experiment_id=experiment_id,
+            bucket_names=names,
+            owners=encoded.tobytes(),
+            updated_at=datetime.now()
+        )
+        return self._to_schema(slot_map)
+
+    def create(self, slot_map: ExperimentSlotMap) -> ExperimentSlotMap:
+        return self.save(slot_map.experiment_id, slot_map.owners)
+
+    def find_by_id(self, experiment_id: UUID) -> Optional[ExperimentSlotMap]:
+        slot_map = ExperimentSlotMapModel.objects(experiment_id=experiment_id).first()
+        return self._to_schema(slot_map) if slot_map else None
+
+    def list_all(self) -> List[ExperimentSlotMap]:
+        return [self._to_schema(m) for m in ExperimentSlotMapModel.objects.all()]
+
+    def update(self, slot_map: ExperimentSlotMap) -> ExperimentSlotMap:
+        return self.save(slot_map.experiment_id, slot_map.owners)
+
+    def delete(self, experiment_id: UUID) -> bool:
+        ExperimentSlotMapModel.objects(experiment_id=experiment_id).delete()
+        return True
@@ -5,6 +5,12 @@ from .bucket_routes import router as bucket_router
 from .criterion_routes import router as criterion_router
 from .condition_routes import router as condition_router
 from .sample_routes import router as sample_router
+from .allocation_routes import router as allocation_router
+from .assignment_routes import router as assignment_router
+from .layer_routes import router as layer_router
+from .layer_experiment_routes import router as layer_experiment_router
+from .eligibility_routes import router as eligibility_router
+from .result_routes import router as result_router
 
 router = APIRouter()
 router.include_router(service_router)
@@ -12,4 +18,10 @@ router.include_router(experiment_router)
 router.include_router(criterion_router)
 router.include_router(condition_router)
 router.include_router(bucket_router)
-router.include_router(sample_router)
\ No newline at end of file
+router.include_router(sample_router)
+router.include_router(allocation_router)
+router.include_router(assignment_router)
+router.include_router(layer_router)
+router.include_router(layer_experiment_router)
+router.include_router(eligibility_router)
+router.include_router(result_router)
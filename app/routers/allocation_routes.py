@@ -0,0 +1,96 @@
+# app/routers/allocation_routes.py
+from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
+from uuid import UUID
+from typing import List, Union
+from app.config import settings
+from app.dependencies import get_allocator, get_sample_repository, get_sample_writer
+from app.models.schemas import (
+    AllocationBatch,
+    AllocationBatchRequest,
+    AllocationRequest,
+    BucketedSampleCreate,
+    EntityAllocation,
+    SampleAllocation
+)
+from app.repositories.cassandra.sample_repository import BucketedSampleRepository
+from app.services.bucket_allocator import BucketAllocator, ExperimentSnapshot
+from app.services.sample_buffer import SampleWriteBuffer
+
+router = APIRouter(prefix="/api/v1/experiments/{experiment_id}", tags=["allocations"])
+
+
+@router.post("/allocations:batch", response_model=AllocationBatch)
+async def allocate_batch(
+        experiment_id: UUID,
+        request: AllocationBatchRequest,
+        allocator: BucketAllocator = Depends(get_allocator)
+):
+    """
+    Allocate a batch of entities to buckets without recording samples.
+
+    Entities outside the experiment's layer segment get no bucket.
+    """
+    if len(request.entity_ids) > settings.allocation_batch_max_size:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.allocation_batch_max_size} entities can be allocated per batch"
+        )
+
+    snapshot = allocator.find_snapshot(str(experiment_id))
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Experiment not configured")
+    # Hashing a large batch and building its response takes long enough to stall the event loop
+    return await run_in_threadpool(_allocate_batch, allocator, snapshot, experiment_id, request.entity_ids)
+
+
+def _allocate_batch(allocator: BucketAllocator, snapshot: ExperimentSnapshot, experiment_id: UUID,
+                    entity_ids: List[str]) -> AllocationBatch:
+    buckets = snapshot.allocate_many(entity_ids)
+    layer = allocator.layer_of(snapshot.experiment_id)
+    if layer is not None:
+        members = layer.members(snapshot.experiment_id, entity_ids)
+        buckets = [bucket if member else None for bucket, member in zip(buckets, members.tolist())]
+
+    return AllocationBatch(
+        experiment_id=experiment_id,
+        config_version=snapshot.version,
+        allocations=[
+            EntityAllocation(entity_id=entity_id, allocated_bucket=bucket)
+            for entity_id, bucket in zip(entity_ids, buckets)
+        ]
+    )
+
+
+@router.post("/allocate", response_model=SampleAllocation)
+async def allocate_sample(
+        experiment_id: UUID,
+        request: AllocationRequest,
+        allocator: BucketAllocator = Depends(get_allocator),
+        repo: BucketedSampleRepository = Depends(get_sample_repository),
+        writer: Union[BucketedSampleRepository, SampleWriteBuffer] = Depends(get_sample_writer)
+):
+    """
+    Assign an entity to a bucket and record the sample, returning any earlier assignment unchanged.
+
+    The bucket is derived from `sampled_entity`, exactly as `allocations:batch` does, so
+    pre-assigned entities land in the same bucket when they are first recorded. A request
+    costs one primary-key read and, for a new assignment, one write.
+    """
+    snapshot = allocator.find_snapshot(str(experiment_id))
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Experiment not configured")
+    if not allocator.in_layer_segment(snapshot.experiment_id, request.sampled_entity):
+        raise HTTPException(status_code=409, detail="Entity belongs to another experiment of the layer")
+
+    existing = await repo.find_by_entity_value_async(experiment_id, request.sampled_entity, request.sampled_value)
+    if existing:
+        return SampleAllocation(**existing.model_dump(), new_assignment=False)
+
+    sample = await writer.create_async(BucketedSampleCreate(
+        experiment_id=experiment_id,
+        sampled_entity=request.sampled_entity,
+        sampled_value=request.sampled_value,
+        allocated_bucket=snapshot.allocate(request.sampled_entity)
+    ))
+    return SampleAllocation(**sample.model_dump(), config_version=snapshot.version, new_assignment=True)
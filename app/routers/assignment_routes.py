@@ -0,0 +1,73 @@
+# app/routers/assignment_routes.py
+from fastapi import APIRouter, Depends
+from uuid import UUID
+from typing import Union
+from app.dependencies import get_allocator, get_criteria_engine, get_sample_repository, get_sample_writer
+from app.models.schemas import (
+    BucketedSampleCreate,
+    ExperimentAssignment,
+    ServiceAssignmentRequest,
+    ServiceAssignments
+)
+from app.repositories.cassandra.sample_repository import BucketedSampleRepository
+from app.services.bucket_allocator import BucketAllocator
+from app.services.criteria_engine import CriteriaEngine
+from app.services.sample_buffer import SampleWriteBuffer
+
+router = APIRouter(prefix="/api/v1/services/{service_id}/assignments", tags=["assignments"])
+
+
+@router.post("", response_model=ServiceAssignments)
+async def assign_service_experiments(
+        service_id: UUID,
+        request: ServiceAssignmentRequest,
+        allocator: BucketAllocator = Depends(get_allocator),
+        engine: CriteriaEngine = Depends(get_criteria_engine),
+        repo: BucketedSampleRepository = Depends(get_sample_repository),
+        writer: Union[BucketedSampleRepository, SampleWriteBuffer] = Depends(get_sample_writer)
+):
+    """
+    Assign an entity to a bucket in every active experiment of a service.
+
+    Experiments and buckets come from the allocator's in-memory snapshots, and only the
+    experiment owning the entity's segment is assigned in each layer. Existing
+    assignments are returned unchanged and new ones are recorded in a single batch
+    unless `record` is false. When `attributes` are given, experiments whose sampling
+    criteria the entity does not satisfy are skipped.
+    """
+    snapshots = {UUID(snapshot.experiment_id): snapshot for snapshot in allocator.assignable_snapshots(str(service_id), request.sampled_entity)}
+    if request.attributes is not None:
+        eligible = {UUID(c.experiment_id) for c in engine.eligible_experiments(str(service_id), request.attributes)}
+        snapshots = {experiment_id: s for experiment_id, s in snapshots.items() if experiment_id in eligible}
+
+    existing = {}
+    if request.record and snapshots:
+        existing = await repo.find_assignments_async(snapshots.keys(), request.sampled_entity, request.sampled_value)
+
+    assignments = {}
+    new_samples = []
+    for experiment_id, snapshot in snapshots.items():
+        if experiment_id in existing:
+            assignments[experiment_id] = ExperimentAssignment(
+                allocated_bucket=existing[experiment_id].allocated_bucket,
+                new_assignment=False
+            )
+            continue
+
+        bucket = snapshot.allocate(request.sampled_entity)
+        assignments[experiment_id] = ExperimentAssignment(
+            allocated_bucket=bucket,
+            config_version=snapshot.version,
+            new_assignment=True
+        )
+        new_samples.append(BucketedSampleCreate(
+            experiment_id=experiment_id,
+            sampled_entity=request.sampled_entity,
+            sampled_value=request.sampled_value,
+            allocated_bucket=bucket
+        ))
+
+    if request.record:
+        await writer.create_many_async(new_samples)
+
+    return ServiceAssignments(service_id=service_id, assignments=assignments)
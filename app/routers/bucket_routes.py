@@ -1,25 +1,44 @@
 # app/routers/bucket_routes.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from uuid import UUID
 from typing import List
-from app.dependencies import get_bucket_repository
-from app.models.schemas import ExperimentBucket, ExperimentBucketCreate
+from app.dependencies import get_bucket_repository, get_allocator_loader
+from app.models.schemas import ExperimentBucket, ExperimentBucketCreate, ExperimentBucketUpdate
 from app.repositories.cassandra.bucket_repository import BucketRepository
+from app.services.allocator_loader import AllocatorLoader
 
 router = APIRouter(prefix="/api/v1/experiments/{experiment_id}/buckets", tags=["buckets"])
 
 @router.post("", response_model=ExperimentBucket)
-async def create_bucket(
+def create_bucket(
     experiment_id: UUID,
     bucket: ExperimentBucketCreate,
-    repo: BucketRepository = Depends(get_bucket_repository)
+    repo: BucketRepository = Depends(get_bucket_repository),
+    loader: AllocatorLoader = Depends(get_allocator_loader)
 ):
     bucket.experiment_id = experiment_id
-    return repo.create(bucket)
+    created = repo.create(bucket)
+    loader.refresh_experiment(experiment_id)
+    return created
 
 @router.get("", response_model=List[ExperimentBucket])
-async def list_buckets(
+def list_buckets(
     experiment_id: UUID,
     repo: BucketRepository = Depends(get_bucket_repository)
 ):
-    return repo.list_by_experiment(experiment_id)
\ No newline at end of file
+    return repo.list_by_experiment(experiment_id)
+
+@router.put("/{bucket_name}", response_model=ExperimentBucket)
+def update_bucket_distribution(
+    experiment_id: UUID,
+    bucket_name: str,
+    update: ExperimentBucketUpdate,
+    repo: BucketRepository = Depends(get_bucket_repository),
+    loader: AllocatorLoader = Depends(get_allocator_loader)
+):
+    try:
+        updated = repo.update_distribution(experiment_id, bucket_name, update.percentage_distribution)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Bucket not found")
+    loader.refresh_experiment(experiment_id)
+    return updated
@@ -2,23 +2,27 @@
 from fastapi import APIRouter, Depends, HTTPException
 from uuid import UUID
 from typing import List
-from app.dependencies import get_condition_repository
+from app.dependencies import get_condition_repository, get_criteria_loader
 from app.models.schemas import ExperimentSamplingCondition, ExperimentSamplingConditionCreate
 from app.repositories.cassandra.condition_repository import ExperimentSamplingConditionRepository
+from app.services.criteria_loader import CriteriaLoader
 
 router = APIRouter(prefix="/api/v1/criteria/{criterion_id}/conditions", tags=["sampling conditions"])
 
 @router.post("", response_model=ExperimentSamplingCondition)
-async def create_condition(
+def create_condition(
     criterion_id: UUID,
     condition: ExperimentSamplingConditionCreate,
-    repo: ExperimentSamplingConditionRepository = Depends(get_condition_repository)
+    repo: ExperimentSamplingConditionRepository = Depends(get_condition_repository),
+    loader: CriteriaLoader = Depends(get_criteria_loader)
 ):
     condition.criterion_id = criterion_id
-    return repo.create(condition)
+    created = repo.create(condition)
+    loader.refresh_experiment(condition.experiment_id)
+    return created
 
 @router.get("", response_model=List[ExperimentSamplingCondition])
-async def list_conditions(
+def list_conditions(
     criterion_id: UUID,
     repo: ExperimentSamplingConditionRepository = Depends(get_condition_repository)
 ):
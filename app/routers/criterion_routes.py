@@ -5,30 +5,34 @@ import starlette
 from fastapi import APIRouter, Depends, Query, HTTPException
 from uuid import UUID
 from typing import List, Optional
-from app.dependencies import get_criterion_repository
+from app.dependencies import get_criterion_repository, get_criteria_loader
 from app.models.schemas import (
     ExperimentSamplingCriterion,
     ExperimentSamplingCriterionCreate,
     ExperimentSamplingCondition, ExperimentSamplingConditionCreate, ExperimentSamplingCriterionList
 )
 from app.repositories.cassandra.criterion_repository import ExperimentSamplingCriterionRepository
+from app.services.criteria_loader import CriteriaLoader
 
 router = APIRouter(prefix="/api/v1/experiments/{experiment_id}/criteria", tags=["sampling criteria"])
 
 
 @router.post("", response_model=ExperimentSamplingCriterion)
-async def create_criterion(
+def create_criterion(
         experiment_id: UUID,
         criterion: ExperimentSamplingCriterionCreate,
         conditions: List[ExperimentSamplingConditionCreate],
-        repo: ExperimentSamplingCriterionRepository = Depends(get_criterion_repository)
+        repo: ExperimentSamplingCriterionRepository = Depends(get_criterion_repository),
+        loader: CriteriaLoader = Depends(get_criteria_loader)
 ):
     criterion.experiment_id = experiment_id
-    return repo.create_with_conditions(criterion, conditions)
+    created = repo.create_with_conditions(criterion, conditions)
+    loader.refresh_experiment(experiment_id)
+    return created
 
 
 @router.get("", response_model=ExperimentSamplingCriterionList)
-async def list_criterions(
+def list_criterions(
         experiment_id: UUID,
         limit: int = Query(10, ge=1, le=100, description="Number of criterions to return"),
         page_token: Optional[str] = Query(None, description="Token for fetching the next page"),
@@ -59,9 +63,10 @@ async def list_criterions(
 
 
 @router.delete("/{criterion_id}", status_code=starlette.status.HTTP_202_ACCEPTED)
-async def delete_criterion(
+def delete_criterion(
         criterion_id: UUID,
-        repo: ExperimentSamplingCriterionRepository = Depends(get_criterion_repository)
+        repo: ExperimentSamplingCriterionRepository = Depends(get_criterion_repository),
+        loader: CriteriaLoader = Depends(get_criteria_loader)
 ):
     result = False
     if not result:
@@ -70,5 +75,6 @@ async def delete_criterion(
         if not criterion:
             raise HTTPException(status_code=404, detail="Criterion not found")
         else:
+            loader.refresh_experiment(criterion.experiment_id)
             return {"message": f"criterion {criterion_id} deleted successfully"}
     return None
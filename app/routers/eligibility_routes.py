@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
+from uuid import UUID
+from app.dependencies import get_criteria_engine, get_criteria_loader
+from app.models.schemas import Eligibility, EligibilityRequest, ServiceEligibility
+from app.services.criteria_engine import CriteriaEngine
+from app.services.criteria_loader import CriteriaLoader
+
+router = APIRouter(prefix="/api/v1", tags=["eligibility"])
+
+
+@router.post("/experiments/{experiment_id}/eligibility", response_model=Eligibility)
+async def check_eligibility(
+        experiment_id: UUID,
+        request: EligibilityRequest,
+        engine: CriteriaEngine = Depends(get_criteria_engine),
+        loader: CriteriaLoader = Depends(get_criteria_loader)
+):
+    """
+    Evaluate an entity's attributes against the experiment's compiled sampling criteria.
+
+    Criteria are compiled once per config version; an experiment compiled by another
+    instance is compiled here on first use.
+    """
+    compiled = engine.find_compiled(str(experiment_id))
+    if compiled is None:
+        compiled = await run_in_threadpool(loader.refresh_experiment, experiment_id)
+        if compiled is None:
+            raise HTTPException(status_code=404, detail="Sampling criteria not available")
+
+    failed = compiled.first_failure(request.attributes)
+    return Eligibility(
+        experiment_id=experiment_id,
+        eligible=failed is None,
+        config_version=compiled.version,
+        failed_criterion_id=failed
+    )
+
+
+@router.post("/services/{service_id}/eligibility", response_model=ServiceEligibility)
+async def check_service_eligibility(
+        service_id: UUID,
+        request: EligibilityRequest,
+        engine: CriteriaEngine = Depends(get_criteria_engine)
+):
+    """
+    Find every experiment of a service an entity is eligible for.
+
+    Candidates come from the service's inverted index over `equals`/`in` conditions,
+    so only they are checked against their full criteria.
+    """
+    eligible = engine.eligible_experiments(str(service_id), request.attributes)
+    return ServiceEligibility(
+        service_id=service_id,
+        experiment_ids=sorted(UUID(compiled.experiment_id) for compiled in eligible)
+    )
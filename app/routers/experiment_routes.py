@@ -5,25 +5,32 @@ import starlette
 from fastapi import APIRouter, Depends, HTTPException, Query
 from uuid import UUID
 from typing import List, Optional
-from app.dependencies import get_experiment_repository
-from app.models.schemas import Experiment, ExperimentCreate, ExperimentList
+from app.dependencies import get_allocator_loader, get_criteria_loader, get_experiment_repository
+from app.models.schemas import Experiment, ExperimentCreate, ExperimentList, ExperimentStatusUpdate
 from app.repositories.cassandra.experiment_repository import ExperimentRepository
+from app.services.allocator_loader import AllocatorLoader
+from app.services.criteria_loader import CriteriaLoader
 
 router = APIRouter(prefix="/api/v1/services/{service_id}/experiments", tags=["experiments"])
 
 
 @router.post("", response_model=Experiment)
-async def create_experiment(
+def create_experiment(
         service_id: UUID,
         experiment: ExperimentCreate,
-        repo: ExperimentRepository = Depends(get_experiment_repository)
+        repo: ExperimentRepository = Depends(get_experiment_repository),
+        loader: AllocatorLoader = Depends(get_allocator_loader),
+        criteria_loader: CriteriaLoader = Depends(get_criteria_loader)
 ):
     experiment.service_id = service_id
-    return repo.create(experiment)
+    created = repo.create(experiment)
+    loader.refresh_experiment(created.id)
+    criteria_loader.refresh_experiment(created.id)
+    return created
 
 
 @router.get("", response_model=ExperimentList)
-async def list_experiments(
+def list_experiments(
         service_id: UUID,
         active_only: bool = False,
         limit: int = Query(10, ge=1, le=100, description="Number of services to return"),
@@ -53,18 +60,39 @@ async def list_experiments(
     return ExperimentList(experiments=services, next_page_token=next_page_token)
 
 
+@router.put("/{experiment_id}/status", response_model=Experiment)
+def update_experiment_status(
+        experiment_id: UUID,
+        update: ExperimentStatusUpdate,
+        repo: ExperimentRepository = Depends(get_experiment_repository),
+        loader: AllocatorLoader = Depends(get_allocator_loader),
+        criteria_loader: CriteriaLoader = Depends(get_criteria_loader)
+):
+    """Activate or deactivate an experiment; only active experiments are allocated and sampled"""
+    try:
+        experiment = repo.update_status(experiment_id, update.active)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    loader.refresh_experiment(experiment_id)
+    criteria_loader.refresh_experiment(experiment_id)
+    return experiment
+
+
 @router.delete("/{experiment_id}", status_code=starlette.status.HTTP_202_ACCEPTED)
-async def delete_experiment(
+def delete_experiment(
         experiment_id: UUID,
-        repo: ExperimentRepository = Depends(get_experiment_repository)
+        repo: ExperimentRepository = Depends(get_experiment_repository),
+        loader: AllocatorLoader = Depends(get_allocator_loader),
+        criteria_loader: CriteriaLoader = Depends(get_criteria_loader)
 ):
     result = False
     if not result:
         experiment = repo.find_by_id(experiment_id=experiment_id)
         result = repo.delete(experiment_id=experiment_id)
+        loader.refresh_experiment(experiment_id)
+        criteria_loader.refresh_experiment(experiment_id)
         if not experiment:
             raise HTTPException(status_code=404, detail="Experiment not found")
         else:
             return {"message": f"experiment {experiment_id} deleted successfully"}
     return None
-
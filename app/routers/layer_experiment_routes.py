@@ -0,0 +1,47 @@
+# app/routers/layer_experiment_routes.py
+from fastapi import APIRouter, Depends, HTTPException
+from uuid import UUID
+from typing import List
+from app.dependencies import get_layer_repository, get_experiment_repository, get_allocator_loader
+from app.models.schemas import LayerExperiment, LayerExperimentCreate
+from app.repositories.cassandra.experiment_repository import ExperimentRepository
+from app.repositories.cassandra.layer_repository import LayerRepository
+from app.services.allocator_loader import AllocatorLoader
+
+router = APIRouter(prefix="/api/v1/layers/{layer_id}/experiments", tags=["layers"])
+
+
+@router.post("", response_model=LayerExperiment)
+def assign_layer_experiment(
+        layer_id: UUID,
+        assignment: LayerExperimentCreate,
+        repo: LayerRepository = Depends(get_layer_repository),
+        experiment_repo: ExperimentRepository = Depends(get_experiment_repository),
+        loader: AllocatorLoader = Depends(get_allocator_loader)
+):
+    """
+    Give an experiment a disjoint segment range `[segment_start, segment_end)` of the layer.
+    """
+    layer = repo.find_by_id(layer_id)
+    if not layer:
+        raise HTTPException(status_code=404, detail="Layer not found")
+    experiment = experiment_repo.find_by_id(assignment.experiment_id)
+    if not experiment:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    if experiment.service_id != layer.service_id:
+        raise HTTPException(status_code=422, detail="Experiment and layer belong to different services")
+
+    try:
+        member = repo.assign_experiment(layer_id, assignment)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    loader.refresh_layer(layer_id)
+    return member
+
+
+@router.get("", response_model=List[LayerExperiment])
+def list_layer_experiments(
+        layer_id: UUID,
+        repo: LayerRepository = Depends(get_layer_repository)
+):
+    return repo.list_experiments(layer_id)
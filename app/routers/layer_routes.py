@@ -0,0 +1,27 @@
+# app/routers/layer_routes.py
+from fastapi import APIRouter, Depends, status
+from uuid import UUID
+from typing import List
+from app.dependencies import get_layer_repository
+from app.models.schemas import ExperimentLayer, ExperimentLayerCreate
+from app.repositories.cassandra.layer_repository import LayerRepository
+
+router = APIRouter(prefix="/api/v1/services/{service_id}/layers", tags=["layers"])
+
+
+@router.post("", response_model=ExperimentLayer, status_code=status.HTTP_201_CREATED)
+def create_layer(
+        service_id: UUID,
+        layer: ExperimentLayerCreate,
+        repo: LayerRepository = Depends(get_layer_repository)
+):
+    layer.service_id = service_id
+    return repo.create(layer)
+
+
+@router.get("", response_model=List[ExperimentLayer])
+def list_layers(
+        service_id: UUID,
+        repo: LayerRepository = Depends(get_layer_repository)
+):
+    return repo.list_by_service(service_id)
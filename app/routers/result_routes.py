@@ -0,0 +1,32 @@
+# app/routers/result_routes.py
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from app.dependencies import get_result_repository
+from app.models.schemas import ExperimentResults
+from app.repositories.cassandra.result_repository import ExperimentResultRepository, bucket_totals
+
+router = APIRouter(prefix="/api/v1/experiments/{experiment_id}/results", tags=["results"])
+
+
+@router.get("", response_model=ExperimentResults)
+async def get_experiment_results(
+        experiment_id: UUID,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        repo: ExperimentResultRepository = Depends(get_result_repository)
+):
+    """
+    Samples assigned and completed per bucket, in total and per time window.
+
+    Answered from the experiment's bucket counters, whose `settings.result_counter_shards`
+    partitions are read in parallel, so the cost does not grow with the number of
+    samples. Windows starting in [since, until) are included, all of them by default.
+    """
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(status_code=422, detail="since must be before until")
+    windows = await repo.find_by_experiment_async(experiment_id, since, until)
+    return ExperimentResults(experiment_id=experiment_id, since=since, until=until,
+                             buckets=bucket_totals(windows), windows=windows)
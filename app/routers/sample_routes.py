@@ -1,10 +1,21 @@
 # app/routers/sample_routes.py
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from uuid import UUID
-from typing import List
-from app.dependencies import get_sample_repository
-from app.models.schemas import BucketedSample, BucketedSampleCreate
+from typing import AsyncIterator, List, Union
+from app.config import settings
+from app.dependencies import get_sample_repository, get_sample_writer
+from app.models.schemas import (
+    BucketedSample,
+    BucketedSampleCreate,
+    SampleBatch,
+    SampleBatchItem,
+    SampleBatchRequest,
+    SampleCompletionItem,
+    SampleCompletionRequest
+)
 from app.repositories.cassandra.sample_repository import BucketedSampleRepository
+from app.services.sample_buffer import SampleWriteBuffer
 
 router = APIRouter(prefix="/api/v1/experiments/{experiment_id}/samples", tags=["samples"])
 
@@ -12,10 +23,75 @@ router = APIRouter(prefix="/api/v1/experiments/{experiment_id}/samples", tags=["
 async def create_sample(
     experiment_id: UUID,
     sample: BucketedSampleCreate,
-    repo: BucketedSampleRepository = Depends(get_sample_repository)
+    writer: Union[BucketedSampleRepository, SampleWriteBuffer] = Depends(get_sample_writer)
 ):
     sample.experiment_id = experiment_id
-    return repo.create(sample)
+    return await writer.create_async(sample)
+
+@router.post(":batch", response_model=SampleBatch)
+async def create_samples_batch(
+    experiment_id: UUID,
+    request: SampleBatchRequest,
+    repo: BucketedSampleRepository = Depends(get_sample_repository)
+):
+    """
+    Record a batch of samples, reporting each one's outcome.
+
+    Sample ids are deterministic, so the failed items of a response can be re-sent as they are.
+    """
+    if len(request.samples) > settings.sample_batch_max_size:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.sample_batch_max_size} samples can be recorded per batch"
+        )
+
+    for sample in request.samples:
+        sample.experiment_id = experiment_id
+    results = await repo.ingest_async(request.samples)
+    items = [
+        SampleBatchItem(index=index, status="created", sample=sample) if error is None
+        else SampleBatchItem(index=index, status="failed", error=str(error) or type(error).__name__)
+        for index, (sample, error) in enumerate(results)
+    ]
+    failed = sum(1 for item in items if item.status == "failed")
+    return SampleBatch(experiment_id=experiment_id, created=len(items) - failed, failed=failed, items=items)
+
+@router.post(":complete", response_class=StreamingResponse,
+             responses={200: {"content": {"application/x-ndjson": {}},
+                              "description": "One SampleCompletionItem per line"}})
+async def complete_samples_batch(
+    experiment_id: UUID,
+    request: SampleCompletionRequest,
+    repo: BucketedSampleRepository = Depends(get_sample_repository)
+):
+    """
+    Mark many samples complete, by sample id or by (sampled_entity, sampled_value).
+
+    Results stream back as newline-delimited JSON, a chunk of keys at a time, so the
+    first outcomes arrive before the whole burst has been written.
+    """
+    if len(request.keys) > settings.sample_batch_max_size:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.sample_batch_max_size} samples can be completed per batch"
+        )
+    keys = [key.sample_id or (key.sampled_entity, key.sampled_value) for key in request.keys]
+
+    async def results() -> AsyncIterator[str]:
+        chunk_size = settings.sample_complete_chunk_size
+        for start in range(0, len(keys), chunk_size):
+            outcomes = await repo.complete_many_async(experiment_id, keys[start:start + chunk_size])
+            for index, (sample, error) in enumerate(outcomes, start):
+                if error is not None:
+                    item = SampleCompletionItem(index=index, status="failed", sample=sample,
+                                                error=str(error) or type(error).__name__)
+                elif sample is None:
+                    item = SampleCompletionItem(index=index, status="not_found")
+                else:
+                    item = SampleCompletionItem(index=index, status="completed", sample=sample)
+                yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
 
 @router.get("", response_model=List[BucketedSample])
 async def list_samples(
@@ -23,14 +99,14 @@ async def list_samples(
     limit: int = 100,
     repo: BucketedSampleRepository = Depends(get_sample_repository)
 ):
-    return repo.list_by_experiment(experiment_id, limit=limit)
+    return await repo.list_by_experiment_async(experiment_id, limit=limit)
 
 @router.post("/{sample_id}/complete", response_model=BucketedSample)
 async def mark_sample_complete(
     sample_id: UUID,
     repo: BucketedSampleRepository = Depends(get_sample_repository)
 ):
-    sample = repo.find_by_id(sample_id)
+    sample = await repo.find_by_id_async(sample_id)
     if not sample:
         raise HTTPException(status_code=404, detail="Sample not found")
-    return repo.mark_complete(sample.experiment_id, sample.sampled_entity, sample.sampled_value)
\ No newline at end of file
+    return await repo.mark_complete_async(sample)
\ No newline at end of file
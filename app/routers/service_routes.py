@@ -13,14 +13,14 @@ from app.repositories.cassandra.service_repository import ServiceRepository
 router = APIRouter(prefix="/api/v1/services", tags=["services"])
 
 @router.post("", response_model=Service, status_code=status.HTTP_201_CREATED)
-async def create_service(
+def create_service(
     service: ServiceCreate,
     repo: ServiceRepository = Depends(get_service_repository)
 ):
     return repo.create(service)
 
 @router.get("", response_model=ServiceList)
-async def list_services(
+def list_services(
         active_only: bool = False,
         limit: int = Query(10, ge=1, le=100, description="Number of services to return"),
         page_token: Optional[str] = Query(None, description="Token for fetching the next page"),
@@ -49,7 +49,7 @@ async def list_services(
 
 
 @router.get("/{service_id}", response_model=Service)
-async def get_service(
+def get_service(
     service_id: UUID,
     repo: ServiceRepository = Depends(get_service_repository)
 ):
@@ -59,7 +59,7 @@ async def get_service(
     return service
 
 @router.delete("/{service_id}", status_code=starlette.status.HTTP_202_ACCEPTED)
-async def delete_service(
+def delete_service(
     service_id: UUID,
     repo: ServiceRepository = Depends(get_service_repository)
 ):
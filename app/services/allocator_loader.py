@@ -0,0 +1,146 @@
+# app/services/allocator_loader.py
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from app.models.schemas import Experiment, ExperimentBucket, ExperimentLayer, ExperimentSlotMap, LayerExperiment
+from app.repositories.cassandra.bucket_repository import BucketRepository
+from app.repositories.cassandra.experiment_repository import ExperimentRepository
+from app.repositories.cassandra.layer_repository import LayerRepository
+from app.repositories.cassandra.slot_map_repository import SlotMapRepository
+from app.services.bucket_allocator import BucketAllocator, ExperimentSnapshot, LayerSnapshot, rebalance_slot_map
+
+logger = logging.getLogger(__name__)
+
+
+class AllocatorLoader:
+    """
+    Keeps the in-memory BucketAllocator in sync with experiments, buckets and layers stored in Cassandra
+
+    Experiments in slot map mode also get their slot ownership rebalanced and persisted
+    here whenever their buckets change.
+    """
+
+    def __init__(self, allocator: BucketAllocator, experiment_repo: ExperimentRepository,
+                 bucket_repo: BucketRepository, layer_repo: LayerRepository, slot_map_repo: SlotMapRepository):
+        self.allocator = allocator
+        self.experiment_repo = experiment_repo
+        self.bucket_repo = bucket_repo
+        self.layer_repo = layer_repo
+        self.slot_map_repo = slot_map_repo
+
+    def load_all(self) -> int:
+        """
+        Build snapshots for every active experiment and every layer
+
+        Experiments, buckets, slot maps, layers and layer memberships are each read with
+        one bulk scan, issued in parallel, and joined in memory rather than fetched per
+        experiment.
+
+        Returns:
+            The number of experiments the allocator can serve
+        """
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            experiments_future = pool.submit(self.experiment_repo.list_all, True)
+            buckets_future = pool.submit(self.bucket_repo.list_all)
+            slot_maps_future = pool.submit(self.slot_map_repo.list_all)
+            layers_future = pool.submit(self.layer_repo.list_all)
+            members_future = pool.submit(self.layer_repo.list_all_experiments)
+            experiments = experiments_future.result()
+            buckets = buckets_future.result()
+            slot_maps = {slot_map.experiment_id: slot_map for slot_map in slot_maps_future.result()}
+            layers = layers_future.result()
+            members = members_future.result()
+
+        buckets_by_experiment: Dict[UUID, List[ExperimentBucket]] = defaultdict(list)
+        for bucket in buckets:
+            buckets_by_experiment[bucket.experiment_id].append(bucket)
+
+        active_ids = {str(experiment.id) for experiment in experiments}
+        for experiment_id in self.allocator.experiment_ids():
+            if experiment_id not in active_ids:
+                self.allocator.remove_experiment(experiment_id)
+
+        loaded = 0
+        for experiment in experiments:
+            if self._apply(experiment, buckets_by_experiment.get(experiment.id, []), slot_maps.get(experiment.id)):
+                loaded += 1
+
+        members_by_layer: Dict[UUID, List[LayerExperiment]] = defaultdict(list)
+        for member in members:
+            members_by_layer[member.layer_id].append(member)
+
+        layer_ids = {str(layer.id) for layer in layers}
+        for layer_id in self.allocator.layer_ids():
+            if layer_id not in layer_ids:
+                self.allocator.remove_layer(layer_id)
+        for layer in layers:
+            self._apply_layer(layer, members_by_layer.get(layer.id, []))
+
+        logger.info("Loaded allocator snapshots for %d of %d active experiments and %d layers",
+                    loaded, len(experiments), len(layers))
+        return loaded
+
+    def refresh_experiment(self, experiment_id: UUID) -> Optional[ExperimentSnapshot]:
+        """Re-read one experiment's buckets and publish a new snapshot if they are valid"""
+        experiment = self.experiment_repo.find_by_id(experiment_id)
+        if experiment is None or not experiment.active:
+            self.allocator.remove_experiment(str(experiment_id))
+            return None
+
+        slot_map = None
+        if experiment.allocation_mode == "slot_map":
+            slot_map = self.slot_map_repo.find_by_id(experiment_id)
+        self._apply(experiment, self.bucket_repo.list_by_experiment(experiment_id), slot_map)
+        return self.allocator.find_snapshot(str(experiment_id))
+
+    def refresh_layer(self, layer_id: UUID) -> Optional[LayerSnapshot]:
+        """Re-read one layer's segment assignments and publish a new layer snapshot"""
+        layer = self.layer_repo.find_by_id(layer_id)
+        if layer is None:
+            self.allocator.remove_layer(str(layer_id))
+            return None
+        self._apply_layer(layer, self.layer_repo.list_experiments(layer_id))
+        return self.allocator.find_layer(str(layer_id))
+
+    def _apply_layer(self, layer: ExperimentLayer, members: List[LayerExperiment]) -> bool:
+        try:
+            self.allocator.configure_layer(str(layer.id), layer.segment_count, [
+                (str(m.experiment_id), m.segment_start, m.segment_end) for m in members
+            ])
+        except ValueError as e:
+            logger.warning("Skipping allocator snapshot for layer %s: %s", layer.id, e)
+            return False
+        return True
+
+    def _apply(self, experiment: Experiment, buckets: List[ExperimentBucket],
+               slot_map: Optional[ExperimentSlotMap] = None) -> bool:
+        if not buckets:
+            return False
+
+        configs = [
+            {'bucket_name': b.bucket_name, 'percentage_distribution': b.percentage_distribution}
+            for b in buckets
+        ]
+        try:
+            slot_owners = None
+            if experiment.allocation_mode == "slot_map":
+                slot_owners = self._rebalance(experiment.id, configs, slot_map)
+            self.allocator.configure_experiment(str(experiment.id), configs, service_id=str(experiment.service_id),
+                                                slot_owners=slot_owners)
+        except ValueError as e:
+            # Buckets are usually created one at a time, so keep serving the last valid snapshot
+            logger.warning("Skipping allocator snapshot for experiment %s: %s", experiment.id, e)
+            return False
+        return True
+
+    def _rebalance(self, experiment_id: UUID, configs: List[dict],
+                   slot_map: Optional[ExperimentSlotMap]) -> List[str]:
+        """Slot owners for the current buckets, persisted only when ownership changes"""
+        previous = slot_map.owners if slot_map else None
+        owners = rebalance_slot_map(configs, previous)
+        if owners != previous:
+            self.slot_map_repo.save(experiment_id, owners)
+        return owners
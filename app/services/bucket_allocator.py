@@ -1,11 +1,259 @@
+import sys
 import xxhash
-from typing import Dict, List
-from functools import lru_cache
+import numpy as np
+from array import array
+from bisect import bisect_right
+from fractions import Fraction
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 import threading
 
 BUCKET_HASH_SEED = 42  # Must be identical across all instances
-HASH_MAX = 4294967296.0  # 2^32 for 32-bit hashing
+HASH_SPACE = 1 << 32  # 2^32 for 32-bit hashing
 FLOAT_TOLERANCE = 1e-6
+NO_EXPERIMENT = -1  # Owner of layer segments not assigned to any experiment
+SLOT_MAP_SIZE = 10000  # Fixed slots of an experiment allocated in slot map mode
+
+
+def hash_entities(namespace: str, entity_ids: Sequence[str]) -> np.ndarray:
+    """32-bit hashes of `namespace:entity_id` keys as a uint64 array, aligned with `entity_ids`"""
+    digest = xxhash.xxh32_intdigest
+    prefix = f"{namespace}:"
+    return np.fromiter(
+        (digest(f"{prefix}{entity_id}", seed=BUCKET_HASH_SEED) for entity_id in entity_ids),
+        dtype=np.uint64,
+        count=len(entity_ids)
+    )
+
+
+class SlotTable:
+    """
+    Immutable bucket lookup table over the 32-bit hash space.
+
+    Bucket ``i`` owns the half-open hash range ``[cut_points[i - 1], cut_points[i])``;
+    the last bucket owns everything from the final cut point up to 2^32, so its
+    upper bound is implicit and a lookup is a single integer bisection.
+    """
+    __slots__ = ('cut_points', 'names', '_cut_array')
+
+    def __init__(self, cut_points: array, names: Tuple[str, ...]):
+        if len(cut_points) != len(names) - 1:
+            raise ValueError("A slot table needs exactly one cut point between consecutive buckets")
+        object.__setattr__(self, 'cut_points', cut_points)
+        object.__setattr__(self, 'names', names)
+        object.__setattr__(self, '_cut_array', np.frombuffer(cut_points, dtype=np.uint64))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SlotTable is immutable")
+
+    @classmethod
+    def from_buckets(cls, buckets: List[Dict]) -> 'SlotTable':
+        """Build the table from buckets ordered by name, using exact rational cut points"""
+        ordered = sorted(buckets, key=lambda x: x['bucket_name'])
+        cut_points = array('Q')
+        cumulative = Fraction(0)
+
+        for bucket in ordered[:-1]:
+            cumulative += Fraction(bucket['percentage_distribution'])
+            # ceil(cumulative% of 2^32): a bucket owns every hash strictly below its share
+            boundary = -((-cumulative * HASH_SPACE) // 100)
+            cut_points.append(min(int(boundary), HASH_SPACE))
+
+        names = tuple(sys.intern(bucket['bucket_name']) for bucket in ordered)
+        return cls(cut_points, names)
+
+    def same_as(self, other) -> bool:
+        """Whether another table allocates exactly like this one"""
+        return isinstance(other, SlotTable) and other.names == self.names and other.cut_points == self.cut_points
+
+    def lookup(self, hash_value: int) -> str:
+        return self.names[bisect_right(self.cut_points, hash_value)]
+
+    def lookup_many(self, hash_values: np.ndarray) -> List[str]:
+        names = self.names
+        indexes = np.searchsorted(self._cut_array, hash_values, side='right')
+        return [names[index] for index in indexes.tolist()]
+
+
+class SlotMapTable:
+    """
+    Immutable bucket lookup table of SLOT_MAP_SIZE fixed slots, each owned by one bucket.
+
+    Unlike SlotTable the owner of every slot is stored explicitly, so a distribution
+    change can hand over exactly the slots it needs to (see `rebalance_slot_map`)
+    instead of shifting every range after the bucket that changed.
+    """
+    __slots__ = ('owners', 'names', '_owner_array')
+
+    def __init__(self, owners: array, names: Tuple[str, ...]):
+        if len(owners) != SLOT_MAP_SIZE:
+            raise ValueError(f"A slot map needs exactly {SLOT_MAP_SIZE} slots")
+        object.__setattr__(self, 'owners', owners)
+        object.__setattr__(self, 'names', names)
+        object.__setattr__(self, '_owner_array', np.frombuffer(owners, dtype=np.uint16))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SlotMapTable is immutable")
+
+    @classmethod
+    def from_owners(cls, owners: Sequence[str], buckets: List[Dict]) -> 'SlotMapTable':
+        """Build the table from the bucket name owning each slot"""
+        names = tuple(sorted(sys.intern(b['bucket_name']) for b in buckets))
+        index = {name: i for i, name in enumerate(names)}
+        try:
+            return cls(array('H', (index[owner] for owner in owners)), names)
+        except KeyError as e:
+            raise ValueError(f"Slot map references unknown bucket {e}")
+
+    def same_as(self, other) -> bool:
+        """Whether another table allocates exactly like this one"""
+        return isinstance(other, SlotMapTable) and other.names == self.names and other.owners == self.owners
+
+    @staticmethod
+    def slot_of(hash_value: int) -> int:
+        return (hash_value * SLOT_MAP_SIZE) >> 32
+
+    def lookup(self, hash_value: int) -> str:
+        return self.names[self.owners[(hash_value * SLOT_MAP_SIZE) >> 32]]
+
+    def lookup_many(self, hash_values: np.ndarray) -> List[str]:
+        names = self.names
+        slots = (hash_values * np.uint64(SLOT_MAP_SIZE)) >> np.uint64(32)
+        return [names[index] for index in self._owner_array[slots.astype(np.intp)].tolist()]
+
+
+def slot_targets(buckets: List[Dict]) -> Dict[str, int]:
+    """
+    Number of slots each bucket should own, by largest remainder so they sum to SLOT_MAP_SIZE
+    """
+    ordered = sorted(buckets, key=lambda x: x['bucket_name'])
+    total = sum(b['percentage_distribution'] for b in ordered)
+    if not ordered or abs(total - 100.0) > FLOAT_TOLERANCE:
+        raise ValueError(f"Bucket percentages must sum to 100 (got {total})")
+
+    quotas = [Fraction(b['percentage_distribution']) * SLOT_MAP_SIZE / 100 for b in ordered]
+    targets = [int(quota) for quota in quotas]
+    by_remainder = sorted(range(len(ordered)), key=lambda i: quotas[i] - targets[i], reverse=True)
+    for i in by_remainder[:max(SLOT_MAP_SIZE - sum(targets), 0)]:
+        targets[i] += 1
+    return {b['bucket_name']: target for b, target in zip(ordered, targets)}
+
+
+def rebalance_slot_map(buckets: List[Dict], previous: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Assign SLOT_MAP_SIZE slots to buckets, moving as few slots as possible from `previous`
+
+    Every bucket keeps its lowest-numbered slots up to its new target; only the slots
+    released by shrinking or removed buckets are handed to growing ones. Without a
+    previous map the buckets get contiguous runs in name order.
+
+    Returns:
+        The bucket name owning each slot
+    """
+    targets = slot_targets(buckets)
+    owners: List[Optional[str]] = [None] * SLOT_MAP_SIZE
+    owned = dict.fromkeys(targets, 0)
+
+    if previous is not None:
+        for slot, owner in enumerate(previous[:SLOT_MAP_SIZE]):
+            if owner in targets and owned[owner] < targets[owner]:
+                owners[slot] = owner
+                owned[owner] += 1
+
+    free_slots = (slot for slot, owner in enumerate(owners) if owner is None)
+    for name, target in targets.items():
+        for _ in range(target - owned[name]):
+            owners[next(free_slots)] = name
+    return owners
+
+
+class ExperimentSnapshot:
+    """
+    Immutable, versioned allocation state for one experiment.
+
+    Snapshots are never modified in place: reconfiguring an experiment publishes a
+    new snapshot with a higher version, so a reader holding one keeps a consistent
+    view for the whole request.
+    """
+    __slots__ = ('experiment_id', 'version', 'buckets', 'slots', 'service_id')
+
+    def __init__(self, experiment_id: str, version: int, buckets: Tuple[Tuple[str, float], ...],
+                 slots: Union[SlotTable, SlotMapTable], service_id: Optional[str] = None):
+        object.__setattr__(self, 'experiment_id', experiment_id)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'buckets', buckets)
+        object.__setattr__(self, 'slots', slots)
+        object.__setattr__(self, 'service_id', service_id)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ExperimentSnapshot is immutable")
+
+    def allocate(self, entity_id: str) -> str:
+        key = f"{self.experiment_id}:{entity_id}"
+        return self.slots.lookup(xxhash.xxh32_intdigest(key, seed=BUCKET_HASH_SEED))
+
+    def allocate_many(self, entity_ids: Sequence[str]) -> List[str]:
+        return self.slots.lookup_many(hash_entities(self.experiment_id, entity_ids))
+
+
+class LayerSnapshot:
+    """
+    Immutable, versioned segment table of a layer (namespace of mutually exclusive experiments).
+
+    The layer hash space is cut into `segment_count` equal segments and every segment
+    is owned by at most one experiment. An entity is hashed once against the layer,
+    so resolving its experiment is a single table lookup however many experiments
+    share the layer.
+    """
+    __slots__ = ('layer_id', 'version', 'segment_count', 'owners', 'experiment_ids')
+
+    def __init__(self, layer_id: str, version: int, segment_count: int, owners: array,
+                 experiment_ids: Tuple[str, ...]):
+        object.__setattr__(self, 'layer_id', layer_id)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'segment_count', segment_count)
+        object.__setattr__(self, 'owners', owners)
+        object.__setattr__(self, 'experiment_ids', experiment_ids)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LayerSnapshot is immutable")
+
+    @classmethod
+    def build(cls, layer_id: str, version: int, segment_count: int,
+              segments: List[Tuple[str, int, int]]) -> 'LayerSnapshot':
+        """Precompute segment ownership from (experiment_id, segment_start, segment_end) ranges"""
+        if segment_count <= 0:
+            raise ValueError("A layer needs at least one segment")
+
+        owners = array('i', [NO_EXPERIMENT]) * segment_count
+        experiment_ids = []
+        for experiment_id, start, end in segments:
+            if not 0 <= start < end <= segment_count:
+                raise ValueError(f"Segment range [{start}, {end}) is outside the layer's {segment_count} segments")
+            if any(owner != NO_EXPERIMENT for owner in owners[start:end]):
+                raise ValueError(f"Segment range [{start}, {end}) overlaps another experiment in the layer")
+            owners[start:end] = array('i', [len(experiment_ids)]) * (end - start)
+            experiment_ids.append(sys.intern(experiment_id))
+
+        return cls(layer_id, version, segment_count, owners, tuple(experiment_ids))
+
+    def segment_of(self, entity_id: str) -> int:
+        key = f"{self.layer_id}:{entity_id}"
+        return (xxhash.xxh32_intdigest(key, seed=BUCKET_HASH_SEED) * self.segment_count) >> 32
+
+    def resolve(self, entity_id: str) -> Optional[str]:
+        """The experiment owning the entity's segment, if any"""
+        owner = self.owners[self.segment_of(entity_id)]
+        return self.experiment_ids[owner] if owner != NO_EXPERIMENT else None
+
+    def members(self, experiment_id: str, entity_ids: Sequence[str]) -> np.ndarray:
+        """Boolean mask of the entities whose segment is owned by an experiment"""
+        if experiment_id not in self.experiment_ids:
+            return np.zeros(len(entity_ids), dtype=bool)
+
+        hashes = hash_entities(self.layer_id, entity_ids)
+        segments = (hashes * np.uint64(self.segment_count)) >> np.uint64(32)
+        owners = np.frombuffer(self.owners, dtype=np.int32)
+        return owners[segments.astype(np.intp)] == self.experiment_ids.index(experiment_id)
 
 
 class BucketAllocator:
@@ -16,20 +264,86 @@ class BucketAllocator:
         with cls._lock:
             if cls._instance is None:
                 cls._instance = super(BucketAllocator, cls).__new__(cls)
-                cls._instance._experiments: Dict[str, List[Dict]] = {}
-                cls._instance._locks: Dict[str, threading.Lock] = {}
+                cls._instance._experiments: Dict[str, ExperimentSnapshot] = {}
+                cls._instance._services: Dict[str, Tuple[str, ...]] = {}
+                cls._instance._layers: Dict[str, LayerSnapshot] = {}
+                cls._instance._experiment_layers: Dict[str, str] = {}
+                cls._instance._write_lock = threading.Lock()
+                cls._instance._version = 0
         return cls._instance
 
-    def configure_experiment(self, experiment_id: str, buckets: List[Dict]):
-        """Configure buckets for an experiment in a thread-safe way"""
-        if experiment_id not in self._locks:
-            with self._lock:
-                if experiment_id not in self._locks:
-                    self._locks[experiment_id] = threading.Lock()
+    def configure_experiment(self, experiment_id: str, buckets: List[Dict], service_id: Optional[str] = None,
+                             slot_owners: Optional[Sequence[str]] = None) -> ExperimentSnapshot:
+        """
+        Publish a new snapshot for an experiment
+
+        Writers serialise on a single lock and swap in a fresh copy of the snapshot
+        map, so readers never lock and see either the old or the new configuration.
+        When `service_id` is omitted the experiment keeps the service it was last
+        configured with. Passing `slot_owners` (see `rebalance_slot_map`) allocates the
+        experiment in slot map mode instead of cumulative percentage ranges.
+
+        Reconfiguring an experiment exactly as it is served publishes nothing and
+        returns the current snapshot, so its version only changes with its allocation.
+        """
+        self._validate_buckets(buckets)
+        normalized = self._normalize_buckets(buckets)
+        if slot_owners is not None:
+            slots = SlotMapTable.from_owners(slot_owners, normalized)
+        else:
+            slots = SlotTable.from_buckets(normalized)
+        frozen = tuple((b['bucket_name'], b['percentage_distribution']) for b in normalized)
+
+        with self._write_lock:
+            previous = self._experiments.get(experiment_id)
+            previous_service = previous.service_id if previous else None
+            if service_id is None:
+                service_id = previous_service
+            if (previous is not None and sorted(previous.buckets) == sorted(frozen)
+                    and previous.slots.same_as(slots) and service_id == previous_service):
+                return previous
+
+            self._version += 1
+            snapshot = ExperimentSnapshot(experiment_id, self._version, frozen, slots, service_id)
+            experiments = dict(self._experiments)
+            experiments[experiment_id] = snapshot
+            if service_id != previous_service:
+                self._services = self._reindex_service(experiment_id, previous_service, service_id)
+            if experiment_id not in self._experiment_layers:
+                # An experiment served again rejoins the layer that still holds its segments
+                layer_id = next((l.layer_id for l in self._layers.values() if experiment_id in l.experiment_ids), None)
+                if layer_id is not None:
+                    self._experiment_layers = {**self._experiment_layers, experiment_id: layer_id}
+            self._experiments = experiments
+        return snapshot
 
-        with self._locks[experiment_id]:
-            self._validate_buckets(buckets)
-            self._experiments[experiment_id] = self._normalize_buckets(buckets)
+    def remove_experiment(self, experiment_id: str) -> bool:
+        """Stop serving allocations for an experiment"""
+        with self._write_lock:
+            if experiment_id not in self._experiments:
+                return False
+            experiments = dict(self._experiments)
+            removed = experiments.pop(experiment_id)
+            if removed.service_id is not None:
+                self._services = self._reindex_service(experiment_id, removed.service_id, None)
+            if experiment_id in self._experiment_layers:
+                self._experiment_layers = {e: l for e, l in self._experiment_layers.items() if e != experiment_id}
+            self._experiments = experiments
+        return True
+
+    def _reindex_service(self, experiment_id: str, old_service: Optional[str],
+                         new_service: Optional[str]) -> Dict[str, Tuple[str, ...]]:
+        """Copy of the service index with an experiment moved between services"""
+        services = dict(self._services)
+        if old_service is not None:
+            remaining = tuple(e for e in services.get(old_service, ()) if e != experiment_id)
+            if remaining:
+                services[old_service] = remaining
+            else:
+                services.pop(old_service, None)
+        if new_service is not None:
+            services[new_service] = services.get(new_service, ()) + (experiment_id,)
+        return services
 
     @staticmethod
     def _validate_buckets(buckets: List[Dict]):
@@ -44,35 +358,112 @@ class BucketAllocator:
     @staticmethod
     def _normalize_buckets(buckets: List[Dict]) -> List[Dict]:
         """Ensure percentages sum exactly to 100 accounting for floating point"""
-        total = sum(b['percentage_distribution'] for b in buckets)
+        normalized = [dict(b) for b in buckets]
+        total = sum(b['percentage_distribution'] for b in normalized)
         if abs(total - 100.0) <= FLOAT_TOLERANCE:
-            return buckets.copy()
+            return normalized
 
-        normalized = buckets.copy()
         normalized[-1]['percentage_distribution'] += (100.0 - total)
         return normalized
 
-    @lru_cache(maxsize=1024)
-    def _get_slots(self, experiment_id: str) -> List[Dict]:
-        """Calculate slots for an experiment with caching"""
-        buckets = sorted(
-            self._experiments[experiment_id],
-            key=lambda x: x['bucket_name']
-        )
-        slots = []
-        threshold = 0.0
+    def configure_layer(self, layer_id: str, segment_count: int,
+                        segments: List[Tuple[str, int, int]]) -> LayerSnapshot:
+        """
+        Publish a new snapshot for a layer
+
+        Args:
+            layer_id: ID of the layer
+            segment_count: Number of equal segments the layer hash space is cut into
+            segments: (experiment_id, segment_start, segment_end) ranges, end exclusive
+
+        Like `configure_experiment`, an unchanged layer keeps its current snapshot.
+        """
+        with self._write_lock:
+            layer = LayerSnapshot.build(layer_id, self._version + 1, segment_count, segments)
+            previous = self._layers.get(layer_id)
+            if (previous is not None and previous.segment_count == layer.segment_count
+                    and previous.owners == layer.owners and previous.experiment_ids == layer.experiment_ids):
+                return previous
+            self._version += 1
+            layers = dict(self._layers)
+            layers[layer_id] = layer
+            experiment_layers = {e: l for e, l in self._experiment_layers.items() if l != layer_id}
+            experiment_layers.update((experiment_id, layer_id) for experiment_id in layer.experiment_ids)
+            self._layers = layers
+            self._experiment_layers = experiment_layers
+        return layer
 
-        for bucket in buckets:
-            threshold += bucket['percentage_distribution']
-            slots.append({
-                'name': bucket['bucket_name'],
-                'end': threshold
-            })
+    def remove_layer(self, layer_id: str) -> bool:
+        """Release every experiment of a layer back to independent allocation"""
+        with self._write_lock:
+            if layer_id not in self._layers:
+                return False
+            layers = dict(self._layers)
+            del layers[layer_id]
+            self._experiment_layers = {e: l for e, l in self._experiment_layers.items() if l != layer_id}
+            self._layers = layers
+        return True
 
-        if slots:
-            slots[-1]['end'] = 100.0
+    def layer_ids(self) -> List[str]:
+        """IDs of every layer currently served"""
+        return list(self._layers)
 
-        return slots
+    def find_layer(self, layer_id: str) -> Optional[LayerSnapshot]:
+        return self._layers.get(layer_id)
+
+    def layer_of(self, experiment_id: str) -> Optional[LayerSnapshot]:
+        """Layer snapshot an experiment belongs to, or None when it is allocated independently"""
+        layer_id = self._experiment_layers.get(experiment_id)
+        return self._layers.get(layer_id) if layer_id is not None else None
+
+    def in_layer_segment(self, experiment_id: str, entity_id: str) -> bool:
+        """Whether the entity may be allocated in the experiment given its layer, if any"""
+        layer = self.layer_of(experiment_id)
+        return layer is None or layer.resolve(entity_id) == experiment_id
+
+    def assignable_snapshots(self, service_id: str, entity_id: str) -> List[ExperimentSnapshot]:
+        """
+        Snapshots of the service's experiments the entity can be allocated in
+
+        Each layer is resolved once per entity, so experiments sharing a layer are
+        filtered with a single segment lookup.
+        """
+        resolved: Dict[str, Optional[str]] = {}
+        snapshots = []
+        for snapshot in self.service_snapshots(service_id):
+            layer = self.layer_of(snapshot.experiment_id)
+            if layer is not None:
+                if layer.layer_id not in resolved:
+                    resolved[layer.layer_id] = layer.resolve(entity_id)
+                if resolved[layer.layer_id] != snapshot.experiment_id:
+                    continue
+            snapshots.append(snapshot)
+        return snapshots
+
+    def experiment_ids(self) -> List[str]:
+        """IDs of every experiment currently served"""
+        return list(self._experiments)
+
+    def service_snapshots(self, service_id: str) -> List[ExperimentSnapshot]:
+        """Current snapshots of every experiment served for a service"""
+        experiments = self._experiments
+        snapshots = (experiments.get(e) for e in self._services.get(service_id, ()))
+        return [snapshot for snapshot in snapshots if snapshot is not None]
+
+    def find_snapshot(self, experiment_id: str) -> Optional[ExperimentSnapshot]:
+        """Current snapshot for an experiment, or None when it is not configured"""
+        return self._experiments.get(experiment_id)
+
+    def get_snapshot(self, experiment_id: str) -> ExperimentSnapshot:
+        """Current snapshot for an experiment; pin it to serve a request from one version"""
+        snapshot = self._experiments.get(experiment_id)
+        if snapshot is None:
+            raise ValueError(f"Experiment {experiment_id} not configured")
+        return snapshot
+
+    def _get_slots(self, experiment_id: str) -> SlotTable:
+        """Slot table of the current snapshot"""
+        return self.get_snapshot(experiment_id).slots
 
     def allocate(self, experiment_id: str, sample: Dict) -> str:
         """
@@ -85,22 +476,20 @@ class BucketAllocator:
         Returns:
             The allocated bucket name
         """
-        if experiment_id not in self._experiments:
-            raise ValueError(f"Experiment {experiment_id} not configured")
+        return self.get_snapshot(experiment_id).allocate(sample['entity_id'])
 
-        slots = self._get_slots(experiment_id)
-        key = f"{experiment_id}:{sample['entity_id']}"
-        point = (xxhash.xxh32_intdigest(key, seed=BUCKET_HASH_SEED) / HASH_MAX) * 100.0
-
-        # Binary search for efficient allocation
-        low, high = 0, len(slots) - 1
-        while low <= high:
-            mid = (low + high) // 2
-            if point <= slots[mid]['end'] + FLOAT_TOLERANCE:
-                if mid == 0 or point > slots[mid - 1]['end'] - FLOAT_TOLERANCE:
-                    return slots[mid]['name']
-                high = mid - 1
-            else:
-                low = mid + 1
+    def allocate_many(self, experiment_id: str, entity_ids: Sequence[str]) -> List[str]:
+        """
+        Allocate a batch of entities to buckets in the specified experiment
+
+        Produces exactly the same buckets as calling `allocate` per entity, but resolves
+        the whole batch with a single vectorized search over the slot table.
 
-        return slots[-1]['name']
\ No newline at end of file
+        Args:
+            experiment_id: ID of the experiment to allocate within
+            entity_ids: Entity IDs to allocate, in request order
+
+        Returns:
+            The allocated bucket names, aligned with `entity_ids`
+        """
+        return self.get_snapshot(experiment_id).allocate_many(entity_ids)
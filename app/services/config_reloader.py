@@ -0,0 +1,53 @@
+# app/services/config_reloader.py
+import asyncio
+import logging
+from typing import Optional, Sequence, Union
+
+from app.config import settings
+from app.services.allocator_loader import AllocatorLoader
+from app.services.criteria_loader import CriteriaLoader
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigReloader:
+    """
+    Periodically reloads in-memory configuration from Cassandra
+
+    Routes refresh the experiments they change, but a change made by another worker
+    or straight in Cassandra only reaches this process through a full `load_all`. A
+    background task runs every loader's `load_all` in a worker thread each `interval`
+    seconds; a failed reload is logged and the last loaded configuration kept.
+    """
+
+    def __init__(self, loaders: Sequence[Union[AllocatorLoader, CriteriaLoader]], interval: Optional[float] = None):
+        self.loaders = loaders
+        self.interval = settings.config_reload_interval_seconds if interval is None else interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the reload task on the running event loop, unless the interval disables it"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="config-reloader")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def reload(self):
+        """Run every loader once"""
+        for loader in self.loaders:
+            try:
+                await asyncio.to_thread(loader.load_all)
+            except Exception:
+                logger.exception("Periodic reload of %s failed", type(loader).__name__)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.reload()
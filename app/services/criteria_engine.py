@@ -0,0 +1,425 @@
+import re
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+from app.models.schemas import ExperimentSamplingCondition, ExperimentSamplingCriterion
+
+Attributes = Mapping[str, Mapping[str, Any]]  # model -> property -> value
+Predicate = Callable[[Any], bool]
+ConditionPredicate = Callable[[Attributes], bool]
+CompiledCriterion = Tuple[str, Tuple[ConditionPredicate, ...]]  # criterion id, its condition predicates
+Term = Tuple[str, str, Union[str, float]]  # model, property, normalised value
+Source = FrozenSet[Tuple[str, FrozenSet[Tuple[str, str, str, str]]]]  # criterion id, its stored conditions
+
+_MISSING = object()
+
+
+def _parse_number(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_text(value: Any) -> str:
+    # JSON booleans arrive as True/False but are stored in conditions as "true"/"false"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return _parse_number(value)
+
+
+def _equals(value: str) -> Predicate:
+    number = _parse_number(value)
+    if number is None:
+        return lambda actual: _as_text(actual) == value
+
+    def predicate(actual):
+        actual_number = _as_number(actual)
+        if actual_number is None:
+            return _as_text(actual) == value
+        return actual_number == number
+    return predicate
+
+
+def _not_equals(value: str) -> Predicate:
+    equals = _equals(value)
+    return lambda actual: not equals(actual)
+
+
+def _comparison(compare: Callable[[float, float], bool]) -> Callable[[str], Predicate]:
+    def compile_comparison(value: str) -> Predicate:
+        number = _parse_number(value)
+        if number is None:
+            raise ValueError(f"'{value}' is not a number")
+
+        def predicate(actual):
+            actual_number = _as_number(actual)
+            return actual_number is not None and compare(actual_number, number)
+        return predicate
+    return compile_comparison
+
+
+def _in(value: str) -> Predicate:
+    members = frozenset(member.strip() for member in value.split(","))
+    return lambda actual: _as_text(actual) in members
+
+
+def _not_in(value: str) -> Predicate:
+    members = frozenset(member.strip() for member in value.split(","))
+    return lambda actual: _as_text(actual) not in members
+
+
+def _contains(value: str) -> Predicate:
+    def predicate(actual):
+        if isinstance(actual, (list, tuple, set, frozenset)):
+            return value in {_as_text(item) for item in actual}
+        return value in _as_text(actual)
+    return predicate
+
+
+def _regex(value: str) -> Predicate:
+    try:
+        pattern = re.compile(value)
+    except re.error as e:
+        raise ValueError(f"'{value}' is not a valid regular expression: {e}")
+    search = pattern.search
+    return lambda actual: search(_as_text(actual)) is not None
+
+
+# Condition name -> compiler turning the stored text value into a predicate over one attribute value
+OPERATORS: Dict[str, Callable[[str], Predicate]] = {
+    "equals": _equals,
+    "not_equals": _not_equals,
+    "gt": _comparison(lambda actual, expected: actual > expected),
+    "gte": _comparison(lambda actual, expected: actual >= expected),
+    "lt": _comparison(lambda actual, expected: actual < expected),
+    "lte": _comparison(lambda actual, expected: actual <= expected),
+    "in": _in,
+    "not_in": _not_in,
+    "contains": _contains,
+    "regex": _regex,
+}
+
+
+def compile_condition(condition: ExperimentSamplingCondition) -> ConditionPredicate:
+    """
+    Compile one stored condition into a closure over an entity's attributes
+
+    Numbers, member sets and regular expressions are parsed here, once, so evaluation
+    is a couple of dict lookups and one comparison. An entity without the attribute
+    never matches.
+
+    Raises:
+        ValueError: If the condition is unknown or its value does not parse
+    """
+    compile_operator = OPERATORS.get(condition.condition)
+    if compile_operator is None:
+        raise ValueError(f"Unknown sampling condition '{condition.condition}'")
+    try:
+        check = compile_operator(condition.value)
+    except ValueError as e:
+        raise ValueError(f"Invalid value for {condition.model}.{condition.property} {condition.condition}: {e}")
+
+    model, prop = condition.model, condition.property
+
+    def predicate(attributes: Attributes) -> bool:
+        actual = attributes.get(model, {}).get(prop, _MISSING)
+        return actual is not _MISSING and actual is not None and check(actual)
+    return predicate
+
+
+def compile_criteria(criteria: List[ExperimentSamplingCriterion]) -> Tuple[CompiledCriterion, ...]:
+    """(criterion id, condition predicates) pairs for every criterion"""
+    return tuple(
+        (str(criterion.id), tuple(compile_condition(c) for c in criterion.conditions))
+        for criterion in criteria
+    )
+
+
+def criteria_source(criteria: List[ExperimentSamplingCriterion]) -> Source:
+    """The stored criteria an experiment's compiled form depends on, in any order"""
+    return frozenset(
+        (str(criterion.id), frozenset((c.model, c.property, c.condition, c.value) for c in criterion.conditions))
+        for criterion in criteria
+    )
+
+
+def index_terms(criteria: List[ExperimentSamplingCriterion]) -> Optional[FrozenSet[Term]]:
+    """
+    Terms under which an experiment is indexed for targeting, or None if it cannot be
+
+    Every condition must hold, so one `equals` or `in` condition is enough to rule an
+    experiment out: an entity carrying none of that condition's terms is never eligible.
+    The condition with the fewest terms is used to keep posting lists short.
+    """
+    best: Optional[FrozenSet[Term]] = None
+    for criterion in criteria:
+        for c in criterion.conditions:
+            if c.condition == "equals":
+                number = _parse_number(c.value)
+                terms = frozenset({(c.model, c.property, c.value if number is None else number)})
+            elif c.condition == "in":
+                terms = frozenset((c.model, c.property, member.strip()) for member in c.value.split(","))
+            else:
+                continue
+            if best is None or len(terms) < len(best):
+                best = terms
+    return best
+
+
+def attribute_terms(attributes: Attributes) -> Iterable[Term]:
+    """Every term an entity's attributes can match, in both text and numeric form"""
+    for model, properties in attributes.items():
+        for prop, value in properties.items():
+            if value is None:
+                continue
+            yield model, prop, _as_text(value)
+            number = _as_number(value) if not isinstance(value, (list, tuple, set, frozenset, dict)) else None
+            if number is not None:
+                yield model, prop, number
+
+
+class CompiledCriteria:
+    """
+    Immutable, compiled sampling criteria of one experiment at one config version
+
+    An entity is eligible when it satisfies every condition of every criterion; an
+    experiment without criteria admits everyone.
+    """
+    __slots__ = ('experiment_id', 'version', 'criteria', 'service_id', 'terms', 'source')
+
+    def __init__(self, experiment_id: str, version: int, criteria: Tuple[CompiledCriterion, ...],
+                 service_id: Optional[str] = None, terms: Optional[FrozenSet[Term]] = None,
+                 source: Optional[Source] = None):
+        object.__setattr__(self, 'experiment_id', experiment_id)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'criteria', criteria)
+        object.__setattr__(self, 'service_id', service_id)
+        object.__setattr__(self, 'terms', terms)
+        object.__setattr__(self, 'source', source)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledCriteria is immutable")
+
+    @classmethod
+    def compile(cls, experiment_id: str, version: int, criteria: List[ExperimentSamplingCriterion],
+                service_id: Optional[str] = None) -> 'CompiledCriteria':
+        return cls(experiment_id, version, compile_criteria(criteria), service_id, index_terms(criteria),
+                   criteria_source(criteria))
+
+    def first_failure(self, attributes: Attributes) -> Optional[str]:
+        """Id of the first criterion the entity does not satisfy, or None if it is eligible"""
+        for criterion_id, predicates in self.criteria:
+            for predicate in predicates:
+                if not predicate(attributes):
+                    return criterion_id
+        return None
+
+    def evaluate(self, attributes: Attributes) -> bool:
+        return self.first_failure(attributes) is None
+
+
+class TargetingIndex:
+    """
+    Immutable inverted index from (model, property, value) terms to a service's experiments
+
+    Candidates for an entity are found with one dict lookup per attribute term plus
+    the experiments that have no indexable condition, so only those candidates need
+    a full predicate check however many experiments the service runs.
+    """
+    __slots__ = ('postings', 'unindexed')
+
+    def __init__(self, postings: Dict[Term, Tuple[str, ...]], unindexed: Tuple[str, ...]):
+        object.__setattr__(self, 'postings', postings)
+        object.__setattr__(self, 'unindexed', unindexed)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TargetingIndex is immutable")
+
+    @classmethod
+    def build(cls, experiments: Iterable[CompiledCriteria]) -> 'TargetingIndex':
+        postings: Dict[Term, List[str]] = {}
+        unindexed = []
+        for compiled in experiments:
+            if compiled.terms is None:
+                unindexed.append(compiled.experiment_id)
+                continue
+            for term in compiled.terms:
+                postings.setdefault(term, []).append(compiled.experiment_id)
+        return cls({term: tuple(ids) for term, ids in postings.items()}, tuple(unindexed))
+
+    def candidates(self, attributes: Attributes) -> Set[str]:
+        found = set(self.unindexed)
+        postings = self.postings
+        for term in attribute_terms(attributes):
+            experiment_ids = postings.get(term)
+            if experiment_ids:
+                found.update(experiment_ids)
+        return found
+
+
+class CriteriaEngine:
+    """
+    Process-wide cache of compiled sampling criteria
+
+    Like the BucketAllocator, writers compile outside the lock and swap in a fresh
+    map, so evaluation never locks and never recompiles. Each service also gets a
+    TargetingIndex, rebuilt whenever one of its experiments changes.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(CriteriaEngine, cls).__new__(cls)
+                cls._instance._compiled: Dict[str, CompiledCriteria] = {}
+                cls._instance._services: Dict[str, Tuple[str, ...]] = {}
+                cls._instance._indexes: Dict[str, TargetingIndex] = {}
+                cls._instance._write_lock = threading.Lock()
+                cls._instance._version = 0
+        return cls._instance
+
+    def configure_experiment(self, experiment_id: str, criteria: List[ExperimentSamplingCriterion],
+                             service_id: Optional[str] = None) -> CompiledCriteria:
+        """
+        Compile and publish an experiment's criteria under a new config version
+
+        When `service_id` is omitted the experiment keeps the service it was last
+        configured with. Criteria unchanged since they were last compiled, of an
+        unchanged service, keep serving their current version.
+
+        Raises:
+            ValueError: If any condition cannot be compiled; the previous version keeps serving
+        """
+        published, errors = self.configure_experiments([(experiment_id, criteria, service_id)])
+        if experiment_id in errors:
+            raise errors[experiment_id]
+        return published[experiment_id]
+
+    def configure_experiments(
+            self, experiments: Iterable[Tuple[str, List[ExperimentSamplingCriterion], Optional[str]]]
+    ) -> Tuple[Dict[str, CompiledCriteria], Dict[str, ValueError]]:
+        """
+        Compile and publish the criteria of many (experiment_id, criteria, service_id) at once
+
+        Only experiments whose criteria or service changed are compiled and get a new
+        config version, and every service they belong to has its TargetingIndex
+        rebuilt once, however many of its experiments changed.
+
+        Returns:
+            The compiled criteria now serving each experiment, and the error of each
+            experiment whose criteria cannot be compiled and keeps its previous version
+        """
+        current = self._compiled
+        published: Dict[str, CompiledCriteria] = {}
+        errors: Dict[str, ValueError] = {}
+        changed = []
+        for experiment_id, criteria, service_id in experiments:
+            source = criteria_source(criteria)
+            previous = current.get(experiment_id)
+            if previous is not None and previous.source == source and service_id in (None, previous.service_id):
+                published[experiment_id] = previous
+                continue
+            try:
+                changed.append((experiment_id, compile_criteria(criteria), index_terms(criteria), source, service_id))
+            except ValueError as e:
+                errors[experiment_id] = e
+        if not changed:
+            return published, errors
+
+        with self._write_lock:
+            compiled = dict(self._compiled)
+            services = None
+            touched: Set[Optional[str]] = set()
+            for experiment_id, predicates, terms, source, service_id in changed:
+                previous = compiled.get(experiment_id)
+                previous_service = previous.service_id if previous else None
+                if service_id is None:
+                    service_id = previous_service
+
+                self._version += 1
+                compiled[experiment_id] = published[experiment_id] = CompiledCriteria(
+                    experiment_id, self._version, predicates, service_id, terms, source
+                )
+                if service_id != previous_service:
+                    if services is None:
+                        services = {s: list(ids) for s, ids in self._services.items()}
+                    self._move_service(services, experiment_id, previous_service, service_id)
+                touched.update((previous_service, service_id))
+            if services is not None:
+                self._services = {s: tuple(ids) for s, ids in services.items()}
+            self._indexes = self._reindex(compiled, touched)
+            self._compiled = compiled
+        return published, errors
+
+    def remove_experiment(self, experiment_id: str) -> bool:
+        with self._write_lock:
+            if experiment_id not in self._compiled:
+                return False
+            compiled = dict(self._compiled)
+            removed = compiled.pop(experiment_id)
+            services = {s: list(ids) for s, ids in self._services.items()}
+            self._move_service(services, experiment_id, removed.service_id, None)
+            self._services = {s: tuple(ids) for s, ids in services.items()}
+            self._indexes = self._reindex(compiled, {removed.service_id})
+            self._compiled = compiled
+        return True
+
+    @staticmethod
+    def _move_service(services: Dict[str, List[str]], experiment_id: str, old_service: Optional[str],
+                      new_service: Optional[str]):
+        """Move an experiment between services in a working copy of the service membership map"""
+        if old_service is not None:
+            members = services.get(old_service, [])
+            if experiment_id in members:
+                members.remove(experiment_id)
+            if not members:
+                services.pop(old_service, None)
+        if new_service is not None:
+            services.setdefault(new_service, []).append(experiment_id)
+
+    def _reindex(self, compiled: Dict[str, CompiledCriteria],
+                 service_ids: Set[Optional[str]]) -> Dict[str, TargetingIndex]:
+        """Copy of the service indexes with the given services rebuilt from `compiled`"""
+        indexes = dict(self._indexes)
+        for service_id in service_ids - {None}:
+            experiment_ids = self._services.get(service_id, ())
+            if experiment_ids:
+                indexes[service_id] = TargetingIndex.build(compiled[e] for e in experiment_ids)
+            else:
+                indexes.pop(service_id, None)
+        return indexes
+
+    def experiment_ids(self) -> List[str]:
+        return list(self._compiled)
+
+    def find_compiled(self, experiment_id: str) -> Optional[CompiledCriteria]:
+        return self._compiled.get(experiment_id)
+
+    def evaluate(self, experiment_id: str, attributes: Attributes) -> bool:
+        compiled = self._compiled.get(experiment_id)
+        if compiled is None:
+            raise ValueError(f"Sampling criteria of experiment {experiment_id} are not compiled")
+        return compiled.evaluate(attributes)
+
+    def eligible_experiments(self, service_id: str, attributes: Attributes) -> List[CompiledCriteria]:
+        """Compiled criteria of every experiment of the service the entity is eligible for"""
+        index = self._indexes.get(service_id)
+        if index is None:
+            return []
+        compiled = self._compiled
+        eligible = []
+        for experiment_id in index.candidates(attributes):
+            criteria = compiled.get(experiment_id)
+            if criteria is not None and criteria.service_id == service_id and criteria.evaluate(attributes):
+                eligible.append(criteria)
+        return eligible
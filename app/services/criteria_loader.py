@@ -0,0 +1,86 @@
+# app/services/criteria_loader.py
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from app.models.schemas import Experiment, ExperimentSamplingCondition, ExperimentSamplingCriterion
+from app.repositories.cassandra.condition_repository import ExperimentSamplingConditionRepository
+from app.repositories.cassandra.criterion_repository import ExperimentSamplingCriterionRepository
+from app.repositories.cassandra.experiment_repository import ExperimentRepository
+from app.services.criteria_engine import CompiledCriteria, CriteriaEngine
+
+logger = logging.getLogger(__name__)
+
+
+class CriteriaLoader:
+    """Keeps the CriteriaEngine in sync with the sampling criteria and conditions stored in Cassandra"""
+
+    def __init__(self, engine: CriteriaEngine, experiment_repo: ExperimentRepository,
+                 criterion_repo: ExperimentSamplingCriterionRepository,
+                 condition_repo: ExperimentSamplingConditionRepository):
+        self.engine = engine
+        self.experiment_repo = experiment_repo
+        self.criterion_repo = criterion_repo
+        self.condition_repo = condition_repo
+
+    def load_all(self) -> int:
+        """
+        Compile the criteria of every active experiment
+
+        Experiments, criteria and conditions are each read with one bulk scan, in
+        parallel, and joined in memory. Only experiments whose criteria changed are
+        recompiled, and each service's targeting index is rebuilt once.
+
+        Returns:
+            The number of experiments with compiled criteria
+        """
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            experiments_future = pool.submit(self.experiment_repo.list_all, True)
+            criteria_future = pool.submit(self.criterion_repo.list_all)
+            conditions_future = pool.submit(self.condition_repo.list_all)
+            experiments = experiments_future.result()
+            criteria = criteria_future.result()
+            conditions = conditions_future.result()
+
+        conditions_by_criterion: Dict[UUID, List[ExperimentSamplingCondition]] = defaultdict(list)
+        for condition in conditions:
+            conditions_by_criterion[condition.criterion_id].append(condition)
+        criteria_by_experiment: Dict[UUID, List[ExperimentSamplingCriterion]] = defaultdict(list)
+        for criterion in criteria:
+            criteria_by_experiment[criterion.experiment_id].append(
+                criterion.model_copy(update={'conditions': conditions_by_criterion.get(criterion.id, [])})
+            )
+
+        active_ids = {str(experiment.id) for experiment in experiments}
+        for experiment_id in self.engine.experiment_ids():
+            if experiment_id not in active_ids:
+                self.engine.remove_experiment(experiment_id)
+
+        published, errors = self.engine.configure_experiments(
+            (str(experiment.id), criteria_by_experiment.get(experiment.id, []), str(experiment.service_id))
+            for experiment in experiments
+        )
+        for experiment_id, error in errors.items():
+            logger.warning("Skipping sampling criteria of experiment %s: %s", experiment_id, error)
+
+        logger.info("Compiled sampling criteria for %d of %d active experiments", len(published), len(experiments))
+        return len(published)
+
+    def refresh_experiment(self, experiment_id: UUID) -> Optional[CompiledCriteria]:
+        """Re-read and recompile one experiment's criteria, keeping the last version if they do not compile"""
+        experiment = self.experiment_repo.find_by_id(experiment_id)
+        if experiment is None or not experiment.active:
+            self.engine.remove_experiment(str(experiment_id))
+            return None
+        self._apply(experiment, self.criterion_repo.find_by_experiment(experiment_id))
+        return self.engine.find_compiled(str(experiment_id))
+
+    def _apply(self, experiment: Experiment, criteria: List[ExperimentSamplingCriterion]) -> bool:
+        try:
+            self.engine.configure_experiment(str(experiment.id), criteria, service_id=str(experiment.service_id))
+        except ValueError as e:
+            logger.warning("Skipping sampling criteria of experiment %s: %s", experiment.id, e)
+            return False
+        return True
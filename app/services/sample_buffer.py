@@ -0,0 +1,226 @@
+# app/services/sample_buffer.py
+import asyncio
+import logging
+from collections import Counter, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.config import settings
+from app.models.schemas import BucketedSample, BucketedSampleCreate
+from app.repositories.cassandra.sample_repository import BucketedSampleRepository, sample_id
+from app.services.sample_log import SampleLog
+
+logger = logging.getLogger(__name__)
+
+
+class SampleBufferFull(Exception):
+    """Raised when the write-behind buffer cannot take a sample, because it is full or shutting down"""
+
+
+class SampleWriteBuffer:
+    """
+    Write-behind buffer for new samples
+
+    Samples are accepted into a bounded in-memory queue and answered straight away; a
+    background task writes them with `BucketedSampleRepository.ingest_async`, in
+    partition-grouped batches of up to `flush_size` once that many are queued or
+    `flush_interval` seconds after the first one arrived. Writers wait up to
+    `put_timeout` seconds for room when the queue is full and are then shed with
+    `SampleBufferFull`.
+
+    Sample ids are deterministic, so a sample re-sent while its write is pending, or
+    written twice after a retry, is the same upsert. Nothing is read before answering:
+    a sample is answered with the bucket and created_at its write will store, replacing
+    those of any earlier write of it, and as not complete, although a completed sample
+    stays complete.
+
+    Without a `log`, queued samples are lost if the process dies before they are
+    flushed; with one, every sample is appended to it before being queued and
+    acknowledged once written, so a restart replays whatever was not. `stop` drains
+    the queue on a clean shutdown.
+    """
+
+    def __init__(self, repo: BucketedSampleRepository, max_size: Optional[int] = None,
+                 flush_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 put_timeout: Optional[float] = None, max_attempts: Optional[int] = None,
+                 log: Optional[SampleLog] = None):
+        self.repo = repo
+        self.log = log
+        self.max_size = max_size or settings.sample_buffer_max_size
+        self.flush_size = flush_size or settings.sample_buffer_flush_size
+        self.flush_interval = settings.sample_buffer_flush_interval if flush_interval is None else flush_interval
+        self.put_timeout = settings.sample_buffer_put_timeout if put_timeout is None else put_timeout
+        self.max_attempts = max_attempts or settings.sample_buffer_max_attempts
+        # Samples waiting to be written, with the number of failed attempts so far and their log segment
+        self._queue: Deque[Tuple[BucketedSampleCreate, int, Optional[int]]] = deque()
+        self._pending: Dict[UUID, BucketedSample] = {}
+        self._changed = asyncio.Condition()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.failed = 0
+        self.shed = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        """Start the background flush task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="sample-write-buffer")
+
+    async def stop(self, timeout: Optional[float] = None) -> int:
+        """
+        Stop accepting samples and wait for the queued ones to be flushed
+
+        Returns:
+            The number of samples still queued when `timeout` ran out, and so never written
+        """
+        async with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, settings.sample_buffer_drain_timeout if timeout is None else timeout)
+            except asyncio.TimeoutError:
+                logger.error("Sample buffer drain timed out with %d samples unwritten", len(self._queue))
+        lost = len(self._queue)
+        self._queue.clear()
+        self._pending.clear()
+        if self.log is not None:
+            await self.log.close()
+        return lost
+
+    async def create_async(self, sample: BucketedSampleCreate) -> BucketedSample:
+        return (await self.create_many_async([sample]))[0]
+
+    async def create_many_async(self, samples: List[BucketedSampleCreate]) -> List[BucketedSample]:
+        """
+        Queue samples for writing and return them as they will be stored
+
+        A sample already pending is answered with its queued row. Stored samples are not
+        looked up, so a completed one is returned as not complete. All of the samples
+        are queued or, when there is no room for them in time, none are.
+
+        Raises:
+            SampleBufferFull: If the buffer is closed or stays full for `put_timeout` seconds
+        """
+        now = datetime.now()
+        rows = []
+        fresh = {}
+        for sample in samples:
+            row = self._pending.get(sample_id(sample.experiment_id, sample.sampled_entity, sample.sampled_value))
+            if row is None:
+                # Stamp created_at now so the row written later matches the one returned
+                sample = sample.model_copy(update={'created_at': sample.created_at or now})
+                row = BucketedSample(**sample.model_dump(),
+                                     id=sample_id(sample.experiment_id, sample.sampled_entity, sample.sampled_value),
+                                     updated_at=now)
+                fresh.setdefault(row.id, (sample, row))
+            rows.append(row)
+        if not fresh:
+            return rows
+
+        segment = None
+        if self.log is not None:
+            if self._closed:
+                raise SampleBufferFull("Sample buffer is closed")
+            segment = await self.log.append([sample for sample, _ in fresh.values()])
+        async with self._changed:
+            if not await self._wait_for_room(len(fresh)):
+                self.shed += len(fresh)
+                if segment is not None:
+                    # The caller is told to retry, so the logged copies need not be replayed
+                    self.log.ack(segment, len(fresh))
+                raise SampleBufferFull("Sample buffer is closed" if self._closed else "Sample buffer is full")
+            for sample, row in fresh.values():
+                self._queue.append((sample, 0, segment))
+                self._pending[row.id] = row
+            self._changed.notify_all()
+        return rows
+
+    async def _wait_for_room(self, count: int) -> bool:
+        def has_room():
+            return self._closed or len(self._queue) + count <= self.max_size
+
+        if count > self.max_size:
+            return False
+        if not has_room() and self.put_timeout > 0:
+            try:
+                await asyncio.wait_for(self._changed.wait_for(has_room), self.put_timeout)
+            except asyncio.TimeoutError:
+                pass
+        return not self._closed and has_room()
+
+    async def flush(self) -> int:
+        """
+        Write up to `flush_size` queued samples
+
+        Failed samples go back to the front of the queue until they have been tried
+        `max_attempts` times, and are then dropped, staying in the sample log if any.
+
+        Returns:
+            The number of samples written
+        """
+        async with self._changed:
+            batch = [self._queue.popleft() for _ in range(min(self.flush_size, len(self._queue)))]
+            # Writers blocked on a full queue can go ahead
+            self._changed.notify_all()
+        if not batch:
+            return 0
+
+        samples = [sample for sample, _, _ in batch]
+        try:
+            errors = [error for _, error in await self.repo.ingest_async(samples)]
+        except Exception as e:
+            errors = [e] * len(batch)
+
+        written = 0
+        acked = Counter()
+        retry = []
+        for (sample, attempts, segment), error in zip(batch, errors):
+            if error is None:
+                written += 1
+                if segment is not None:
+                    acked[segment] += 1
+            elif attempts + 1 < self.max_attempts:
+                retry.append((sample, attempts + 1, segment))
+                continue
+            else:
+                self.failed += 1
+                logger.error("Dropping sample %s/%s of experiment %s after %d attempts: %s",
+                             sample.sampled_entity, sample.sampled_value, sample.experiment_id, attempts + 1, error)
+            self._pending.pop(sample_id(sample.experiment_id, sample.sampled_entity, sample.sampled_value), None)
+        self.written += written
+        if self.log is not None:
+            self.log.ack_all(acked)
+
+        if retry:
+            async with self._changed:
+                self._queue.extendleft(reversed(retry))
+                self._changed.notify_all()
+        return written
+
+    async def _run(self):
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                if not self._closed and len(self._queue) < self.flush_size:
+                    # Let the batch fill up for at most the flush interval
+                    try:
+                        await asyncio.wait_for(
+                            self._changed.wait_for(lambda: self._closed or len(self._queue) >= self.flush_size),
+                            self.flush_interval
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+            try:
+                failed = self.failed
+                if not await self.flush() and (self._queue or self.failed > failed):
+                    # Nothing went through, give Cassandra a moment before retrying
+                    await asyncio.sleep(self.flush_interval)
+            except Exception:
+                logger.exception("Sample buffer flush failed")
@@ -0,0 +1,248 @@
+# app/services/sample_log.py
+import asyncio
+import fcntl
+import logging
+import os
+from collections import Counter
+from contextlib import contextmanager
+from typing import IO, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from app.config import settings
+from app.models.schemas import BucketedSampleCreate
+from app.repositories.cassandra.sample_repository import BucketedSampleRepository
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".log"
+LOCK_FILE = "LOCK"
+
+
+def segment_name(segment: int) -> str:
+    return f"segment-{segment:020d}{SEGMENT_SUFFIX}"
+
+
+def _lock(directory: str) -> Optional[IO]:
+    """Take the lock of a directory, or None when another process holds it"""
+    lock_file = open(os.path.join(directory, LOCK_FILE), "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+@contextmanager
+def _root_locked(root: str):
+    """Hold the root's lock while worker directories are created, claimed or removed"""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK_FILE), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+class SampleLog:
+    """
+    Local append-only log of samples not yet written to Cassandra
+
+    Samples are appended to numbered segment files as JSON lines and fsynced before
+    `append` returns; concurrent appends share one fsync. Each written sample is
+    acknowledged with `ack`, and a segment is deleted once it is no longer the one
+    being appended to and all of its samples are acknowledged. Whatever is left
+    behind by a crash, or by samples that could not be written, is replayed by
+    `recover` at the next startup.
+
+    A directory belongs to a single process, which holds a lock on it while open.
+    Worker processes sharing a `root` each log to their own subdirectory of it (see
+    `for_worker`), and `recover` also replays the subdirectories no live worker holds,
+    left behind by workers that have since exited.
+    """
+
+    def __init__(self, directory: str, segment_bytes: Optional[int] = None, root: Optional[str] = None):
+        self.directory = directory
+        self.root = root
+        self.segment_bytes = segment_bytes or settings.sample_log_segment_bytes
+        self._segment = 0
+        self._file = None
+        self._lock_file = None
+        # Samples appended to each live segment and not acknowledged yet
+        self._unacked: Dict[int, int] = {}
+        self._append_lock = asyncio.Lock()
+        self._appended = 0
+        self._synced = 0
+        self._syncing: Optional[asyncio.Future] = None
+
+    @classmethod
+    def for_worker(cls, root: str, worker: Optional[str] = None, segment_bytes: Optional[int] = None) -> 'SampleLog':
+        """The log of one worker process under `root`, named after its pid unless `worker` is given"""
+        return cls(os.path.join(root, worker or str(os.getpid())), segment_bytes, root=root)
+
+    def segments(self) -> List[int]:
+        return sorted(int(name[len("segment-"):-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+                      if name.startswith("segment-") and name.endswith(SEGMENT_SUFFIX))
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, segment_name(segment))
+
+    async def recover(self, repo: BucketedSampleRepository, chunk_size: Optional[int] = None) -> int:
+        """
+        Lock the directory, replay every segment left by an earlier run and open a new one
+
+        Segments whose samples are all written are deleted; one with a sample that
+        fails is kept, to be replayed again next time. With a `root`, the logs of
+        exited workers under it are replayed too, and removed once fully written.
+
+        Returns:
+            The number of samples replayed
+        """
+        if self.root:
+            with _root_locked(self.root):
+                os.makedirs(self.directory, exist_ok=True)
+                self._lock_file = _lock(self.directory)
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_file = _lock(self.directory)
+        if self._lock_file is None:
+            raise RuntimeError(f"Sample log {self.directory} is in use by another process")
+
+        chunk_size = chunk_size or settings.sample_buffer_flush_size
+        existing = self.segments()
+        replayed = await self._replay(repo, chunk_size)
+        if self.root:
+            replayed += await self._recover_orphans(repo, chunk_size)
+        self._open(existing[-1] + 1 if existing else 1)
+        return replayed
+
+    async def _replay(self, repo: BucketedSampleRepository, chunk_size: int) -> int:
+        replayed = 0
+        existing = self.segments()
+        for segment in existing:
+            samples = self._read(segment)
+            failed = 0
+            for start in range(0, len(samples), chunk_size):
+                results = await repo.ingest_async(samples[start:start + chunk_size])
+                failed += sum(1 for _, error in results if error is not None)
+            replayed += len(samples) - failed
+            if failed:
+                logger.error("Keeping sample log segment %d of %s: %d of %d samples failed to replay",
+                             segment, self.directory, failed, len(samples))
+            else:
+                os.remove(self._path(segment))
+        if existing:
+            logger.info("Replayed %d samples from %d sample log segments of %s", replayed, len(existing),
+                        self.directory)
+        return replayed
+
+    async def _recover_orphans(self, repo: BucketedSampleRepository, chunk_size: int) -> int:
+        """Replay the logs under `root` that no live worker holds, removing those fully written"""
+        replayed = 0
+        for name in sorted(os.listdir(self.root)):
+            directory = os.path.join(self.root, name)
+            if directory == self.directory or not os.path.isdir(directory):
+                continue
+            with _root_locked(self.root):
+                lock_file = _lock(directory) if os.path.isdir(directory) else None
+            if lock_file is None:
+                continue
+            try:
+                orphan = SampleLog(directory, self.segment_bytes)
+                replayed += await orphan._replay(repo, chunk_size)
+                if not orphan.segments():
+                    with _root_locked(self.root):
+                        os.remove(os.path.join(directory, LOCK_FILE))
+                        os.rmdir(directory)
+            finally:
+                lock_file.close()
+        return replayed
+
+    def _read(self, segment: int) -> List[BucketedSampleCreate]:
+        samples = []
+        with open(self._path(segment), "rb") as file:
+            for line in file:
+                try:
+                    samples.append(BucketedSampleCreate.model_validate_json(line))
+                except ValidationError:
+                    # Only the last record can be torn, by a crash in the middle of an append
+                    logger.warning("Skipping unreadable record in sample log segment %d", segment)
+        return samples
+
+    def _open(self, segment: int):
+        self._segment = segment
+        self._file = open(self._path(segment), "ab")
+        self._unacked[segment] = 0
+        # Make the new file's directory entry durable too
+        directory = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    async def append(self, samples: List[BucketedSampleCreate]) -> int:
+        """
+        Durably append samples, returning the segment to acknowledge them against
+
+        Samples must carry their created_at, so a replay writes the same rows.
+        """
+        async with self._append_lock:
+            if self._file.tell() >= self.segment_bytes:
+                await self._roll()
+            self._file.write(b"".join(sample.model_dump_json().encode() + b"\n" for sample in samples))
+            self._unacked[self._segment] += len(samples)
+            self._appended += 1
+            segment, target = self._segment, self._appended
+        await self._sync(target)
+        return segment
+
+    async def _sync(self, target: int):
+        # Group commit: appends made while an fsync is running wait for the next one
+        while self._synced < target:
+            if self._syncing is None:
+                self._syncing = asyncio.ensure_future(self._fsync())
+            await asyncio.shield(self._syncing)
+
+    async def _fsync(self):
+        try:
+            upto, file = self._appended, self._file
+            file.flush()
+            await asyncio.to_thread(os.fsync, file.fileno())
+            self._synced = max(self._synced, upto)
+        finally:
+            self._syncing = None
+
+    async def _roll(self):
+        await self._sync(self._appended)
+        previous = self._segment
+        self._file.close()
+        self._open(previous + 1)
+        self._release(previous)
+
+    def ack(self, segment: int, count: int = 1):
+        """Acknowledge samples of a segment as written to Cassandra"""
+        if segment not in self._unacked:
+            return
+        self._unacked[segment] -= count
+        if segment != self._segment:
+            self._release(segment)
+
+    def ack_all(self, segments: Counter):
+        for segment, count in segments.items():
+            self.ack(segment, count)
+
+    def _release(self, segment: int):
+        if self._unacked.get(segment) == 0:
+            del self._unacked[segment]
+            os.remove(self._path(segment))
+
+    async def close(self):
+        """Sync and close the open segment, deleting it when nothing in it is left unwritten"""
+        if self._file is None:
+            return
+        await self._sync(self._appended)
+        self._file.close()
+        self._file = None
+        self._release(self._segment)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,114 @@
+# app/tools/backfill_lookup_tables.py
+"""
+Copy existing rows into the lookup tables that the repositories maintain on every write.
+
+Rows written after a lookup table's migration already have their copies; running this
+once after the migration covers everything created before it. Every write is an upsert,
+so the tool is safe to re-run or to interrupt.
+
+Usage:
+    python -m app.tools.backfill_lookup_tables [--table experiments_by_service] [--concurrency 50]
+"""
+import argparse
+import logging
+from typing import Callable, Dict, NamedTuple, Type
+
+from cassandra.cluster import Session
+from cassandra.concurrent import execute_concurrent_with_args
+from cassandra.cqlengine.models import Model
+from cassandra.query import UNSET_VALUE
+
+from app.db.cassandra import ADMIN, CassandraSessionManager
+from app.db.migrations import run_migrations
+from app.repositories.cassandra import (
+    bucket_repository,
+    condition_repository,
+    criterion_repository,
+    experiment_repository,
+    layer_repository,
+    sample_repository
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Backfill(NamedTuple):
+    source: Type[Model]
+    lookup: Type[Model]
+    values: Callable[[Model], dict]
+
+
+BACKFILLS: Dict[str, Backfill] = {
+    "experiments_by_service": Backfill(experiment_repository.ExperimentModel,
+                                       experiment_repository.ExperimentByServiceModel,
+                                       experiment_repository.lookup_values),
+    "buckets_by_experiment": Backfill(bucket_repository.ExperimentBucketModel,
+                                      bucket_repository.BucketByExperimentModel,
+                                      bucket_repository.lookup_values),
+    "criteria_by_experiment": Backfill(criterion_repository.ExperimentSamplingCriterionModel,
+                                       criterion_repository.CriterionByExperimentModel,
+                                       criterion_repository.lookup_values),
+    "conditions_by_criterion": Backfill(condition_repository.ExperimentSamplingConditionModel,
+                                        condition_repository.ConditionByCriterionModel,
+                                        condition_repository.lookup_values),
+    "layers_by_service": Backfill(layer_repository.ExperimentLayerModel,
+                                  layer_repository.LayerByServiceModel,
+                                  layer_repository.service_lookup_values),
+    "layers_by_experiment": Backfill(layer_repository.LayerExperimentModel,
+                                     layer_repository.LayerByExperimentModel,
+                                     layer_repository.experiment_lookup_values),
+    "samples": Backfill(sample_repository.BucketedSampleModel,
+                        sample_repository.SampleModel,
+                        sample_repository.sample_values),
+    "samples_by_experiment_day": Backfill(sample_repository.BucketedSampleModel,
+                                          sample_repository.SampleTimelineModel,
+                                          sample_repository.timeline_values),
+    "sample_assignments": Backfill(sample_repository.BucketedSampleModel,
+                                   sample_repository.SampleAssignmentModel,
+                                   sample_repository.assignment_values),
+}
+
+
+def backfill(session: Session, table: str, concurrency: int = 50) -> int:
+    """
+    Upsert a lookup row for every row of the source table
+
+    The source is scanned page by page and the inserts run `concurrency` at a time.
+
+    Returns:
+        The number of lookup rows written
+    """
+    source, lookup, values = BACKFILLS[table]
+    columns = list(lookup._columns)
+    insert = session.prepare(
+        f"INSERT INTO {lookup.__table_name__} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    )
+    # Empty columns are left unset rather than bound to null, which would write tombstones
+    rows = (tuple(UNSET_VALUE if value is None else value for value in map(values(row).get, columns))
+            for row in source.objects.all())
+
+    written = 0
+    for _ in execute_concurrent_with_args(session, insert, rows, concurrency=concurrency,
+                                          raise_on_first_error=True, results_generator=True,
+                                          execution_profile=ADMIN):
+        written += 1
+    logger.info("Backfilled %d rows into %s", written, table)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--table", choices=sorted(BACKFILLS), action="append",
+                        help="lookup table to backfill, repeatable (default: all of them)")
+    parser.add_argument("--concurrency", type=int, default=50, help="inserts in flight at once")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    session = CassandraSessionManager.get_session()
+    run_migrations(session)
+    for table in args.table or sorted(BACKFILLS):
+        print(f"{table}: {backfill(session, table, args.concurrency)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# app/tools/benchmark_counters.py
+"""
+Measure bucket counter throughput under contention for several shard counts.
+
+Every increment goes to the same experiment, window and bucket, the hot spot of a
+popular experiment, and is sent on its own as a request would send it. Each shard
+count runs against a scratch experiment whose total is checked, then deleted.
+
+Usage:
+    python -m app.tools.benchmark_counters [--shards 1,4,16] [--increments 20000] [--concurrency 128]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import List, NamedTuple
+from uuid import uuid4
+
+from cassandra.cluster import Session
+from cassandra.concurrent import execute_concurrent_with_args
+
+from app.db.cassandra import ADMIN, SAMPLE_WRITE, CassandraSessionManager
+from app.db.migrations import run_migrations
+from app.db.statements import statements
+from app.repositories.cassandra.result_repository import (
+    DELETE_BUCKET_COUNTERS,
+    LIST_BUCKET_COUNTERS,
+    bucket_counters,
+    counter_window
+)
+from app.repositories.cassandra.sharded_counter import ShardedCounter
+
+
+class BenchmarkResult(NamedTuple):
+    shards: int
+    increments: int
+    seconds: float
+    counted: int
+
+    @property
+    def per_second(self) -> float:
+        return self.increments / self.seconds
+
+
+def benchmark(session: Session, shard_count: int, increments: int, concurrency: int,
+              entities: int) -> BenchmarkResult:
+    counter = ShardedCounter(bucket_counters.table, bucket_counters.key_columns, bucket_counters.counter_columns,
+                             shard_count=shard_count)
+    experiment_id = uuid4()
+    window = counter_window(datetime.now())
+    parameters = [counter.increments([((experiment_id, window, "hot"), f"entity-{index % entities}", (1, 0))])[0]
+                  for index in range(increments)]
+
+    started = time.perf_counter()
+    for _ in execute_concurrent_with_args(session, statements.get(session, counter.increment), parameters,
+                                          concurrency=concurrency, raise_on_first_error=True,
+                                          results_generator=True, execution_profile=SAMPLE_WRITE):
+        pass
+    seconds = time.perf_counter() - started
+
+    rows = []
+    for shard in counter.shards:
+        read = statements.bind(session, LIST_BUCKET_COUNTERS,
+                               (experiment_id, shard, window, window + timedelta(seconds=1)))
+        rows.extend(session.execute(read, execution_profile=ADMIN))
+        session.execute(statements.bind(session, DELETE_BUCKET_COUNTERS, (experiment_id, shard)),
+                        execution_profile=ADMIN)
+    counted = sum(assigned for assigned, _ in counter.totals(rows).values())
+    return BenchmarkResult(shard_count, increments, seconds, counted)
+
+
+def parse_shards(spec: str) -> List[int]:
+    try:
+        shards = [int(item) for item in spec.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected comma separated shard counts, got '{spec}'")
+    if any(shard < 1 for shard in shards):
+        raise argparse.ArgumentTypeError("Shard counts must be positive")
+    return shards
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=parse_shards, default=[1, 4, 16], help="shard counts to compare")
+    parser.add_argument("--increments", type=int, default=20000, help="increments per shard count")
+    parser.add_argument("--concurrency", type=int, default=128, help="increments in flight at once")
+    parser.add_argument("--entities", type=int, default=10000, help="distinct entities the increments come from")
+    args = parser.parse_args(argv)
+
+    session = CassandraSessionManager.get_session()
+    run_migrations(session)
+    print(f"{'shards':>6} {'increments/s':>13} {'seconds':>8} {'counted':>9}")
+    for shard_count in args.shards:
+        result = benchmark(session, shard_count, args.increments, args.concurrency, args.entities)
+        print(f"{result.shards:>6} {result.per_second:>13.0f} {result.seconds:>8.2f} {result.counted:>9}")
+        if result.counted != result.increments:
+            print(f"warning: {result.increments} increments sent but {result.counted} counted")
+
+
+if __name__ == "__main__":
+    main()
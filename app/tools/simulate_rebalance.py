@@ -0,0 +1,80 @@
+# app/tools/simulate_rebalance.py
+"""
+Report the fraction of entities that change bucket for a proposed distribution change.
+
+Usage:
+    python -m app.tools.simulate_rebalance --current control=90,variant=10 \\
+        --proposed control=80,variant=20 --ids 5000000
+"""
+import argparse
+from typing import Dict, List, Union
+
+import numpy as np
+
+from app.services.bucket_allocator import (
+    SlotMapTable,
+    SlotTable,
+    hash_entities,
+    rebalance_slot_map,
+    slot_targets
+)
+
+CHUNK_SIZE = 1_000_000
+
+
+def parse_buckets(spec: str) -> List[Dict]:
+    """Parse `name=percentage,...` into bucket configurations"""
+    buckets = []
+    for item in spec.split(","):
+        name, _, percentage = item.partition("=")
+        if not name or not percentage:
+            raise argparse.ArgumentTypeError(f"Expected name=percentage, got '{item}'")
+        buckets.append({'bucket_name': name.strip(), 'percentage_distribution': float(percentage)})
+    return buckets
+
+
+def minimum_reassignment(current: List[Dict], proposed: List[Dict]) -> float:
+    """Lower bound on the reassigned fraction: the total share buckets have to gain"""
+    before, after = slot_targets(current), slot_targets(proposed)
+    gained = sum(max(after[name] - before.get(name, 0), 0) for name in after)
+    return gained / sum(after.values())
+
+
+def reassignment_fraction(current: List[Dict], proposed: List[Dict], mode: str, ids: int,
+                          experiment_id: str = "simulation") -> float:
+    """Fraction of `ids` synthetic entities allocated to a different bucket after the change"""
+    before: Union[SlotTable, SlotMapTable]
+    after: Union[SlotTable, SlotMapTable]
+    if mode == "slot_map":
+        current_owners = rebalance_slot_map(current)
+        before = SlotMapTable.from_owners(current_owners, current)
+        after = SlotMapTable.from_owners(rebalance_slot_map(proposed, current_owners), proposed)
+    else:
+        before, after = SlotTable.from_buckets(current), SlotTable.from_buckets(proposed)
+
+    moved = 0
+    for start in range(0, ids, CHUNK_SIZE):
+        hashes = hash_entities(experiment_id, [f"entity-{i}" for i in range(start, min(start + CHUNK_SIZE, ids))])
+        moved += int(np.count_nonzero(
+            np.array(before.lookup_many(hashes), dtype=object) != np.array(after.lookup_many(hashes), dtype=object)
+        ))
+    return moved / ids if ids else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--current", type=parse_buckets, required=True, help="current buckets, name=percentage,...")
+    parser.add_argument("--proposed", type=parse_buckets, required=True, help="proposed buckets, name=percentage,...")
+    parser.add_argument("--ids", type=int, default=1_000_000, help="number of synthetic entity IDs")
+    parser.add_argument("--mode", choices=["range", "slot_map", "both"], default="both")
+    args = parser.parse_args(argv)
+
+    print(f"minimum possible: {minimum_reassignment(args.current, args.proposed):.4%}")
+    modes = ["range", "slot_map"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        fraction = reassignment_fraction(args.current, args.proposed, mode, args.ids)
+        print(f"{mode}: {fraction:.4%} of {args.ids:,} entities reassigned")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,8 @@ def cassandra_session():
 def client(cassandra_session):
     """Override app dependencies with test session"""
     # Initialize your app with test configuration
+    from app.db.cassandra import CassandraSessionManager
+    from app.db.migrations import run_migrations
     from app.dependencies import get_service_repository
     from app.repositories.cassandra.service_repository import ServiceRepository
 
@@ -28,6 +30,8 @@ def client(cassandra_session):
         return ServiceRepository()
 
     app.dependency_overrides[get_service_repository] = get_test_service_repo
+    # Repositories no longer create their tables, so bring the schema up to date first
+    run_migrations(CassandraSessionManager.get_session())
 
     yield TestClient(app)
 
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.db.cassandra import bridge_response_future, execute_async
+
+
+class FakeResponseFuture:
+    """Stands in for the driver's ResponseFuture, firing callbacks from another thread"""
+
+    def __init__(self, pages=None, error=None):
+        self.pages = list(pages or [[]])
+        self.error = error
+        self.has_more_pages = len(self.pages) > 1
+        self.fetches = 0
+
+    def add_callbacks(self, callback, errback):
+        self.callback, self.errback = callback, errback
+        self._deliver()
+
+    def start_fetching_next_page(self):
+        self.fetches += 1
+        self._deliver()
+
+    def _deliver(self):
+        def run():
+            if self.error is not None:
+                self.errback(self.error)
+                return
+            page = self.pages.pop(0)
+            self.has_more_pages = len(self.pages) > 0
+            self.callback(page)
+        threading.Thread(target=run).start()
+
+
+@pytest.mark.asyncio
+async def test_bridge_collects_every_page():
+    response_future = FakeResponseFuture([[{'id': 1}, {'id': 2}], [{'id': 3}]])
+    rows = await bridge_response_future(response_future)
+    assert rows == [{'id': 1}, {'id': 2}, {'id': 3}]
+    assert response_future.fetches == 1
+
+
+@pytest.mark.asyncio
+async def test_bridge_raises_driver_errors():
+    with pytest.raises(RuntimeError, match="unavailable"):
+        await bridge_response_future(FakeResponseFuture(error=RuntimeError("unavailable")))
+
+
+@pytest.mark.asyncio
+async def test_execute_async_runs_queries_concurrently():
+    """Test awaiting several queries keeps the event loop free while the driver works"""
+    release = threading.Event()
+
+    class SlowSession:
+        def execute_async(self, query, parameters=None, execution_profile=None):
+            response_future = FakeResponseFuture([[{'query': query, 'parameters': parameters}]])
+            original = response_future._deliver
+
+            def deliver_when_released():
+                threading.Thread(target=lambda: (release.wait(), original())).start()
+            response_future._deliver = deliver_when_released
+            return response_future
+
+    tasks = [asyncio.ensure_future(execute_async(SlowSession(), "SELECT", (index,))) for index in range(100)]
+    await asyncio.sleep(0)
+    assert not any(task.done() for task in tasks)
+    release.set()
+    results = await asyncio.gather(*tasks)
+    assert [rows[0]['parameters'] for rows in results] == [(index,) for index in range(100)]
@@ -0,0 +1,99 @@
+import pytest
+from cassandra import ConsistencyLevel
+from cassandra.connection import DefaultEndPoint
+from cassandra.policies import (
+    ConstantSpeculativeExecutionPolicy,
+    DCAwareRoundRobinPolicy,
+    FallthroughRetryPolicy,
+    RetryPolicy,
+    SimpleConvictionPolicy,
+    TokenAwarePolicy
+)
+from cassandra.pool import Host
+
+from app.config import Settings
+from app.db.cassandra import ADMIN, HOT_READ, PROFILES, SAMPLE_WRITE, build_cluster, build_profile, cluster_report
+
+
+def test_cluster_follows_settings():
+    config = Settings(cassandra_contact_points="127.0.0.1, 127.0.0.2", cassandra_port=9142,
+                      cassandra_local_dc="dc1", cassandra_request_timeout=2.5, cassandra_speculative_delay_ms=50,
+                      cassandra_compression="none")
+    cluster = build_cluster(config)
+    profile = cluster.profile_manager.default
+
+    assert list(cluster.contact_points) == ["127.0.0.1", "127.0.0.2"]
+    assert cluster.port == 9142
+    assert isinstance(profile.load_balancing_policy, TokenAwarePolicy)
+    assert profile.request_timeout == 2.5
+    assert isinstance(profile.speculative_execution_policy, ConstantSpeculativeExecutionPolicy)
+    assert cluster.compression is False
+
+
+def test_contact_points_fall_back_to_host():
+    config = Settings(cassandra_host="localhost", cassandra_contact_points="", cassandra_token_aware=False)
+    cluster = build_cluster(config)
+
+    assert config.cassandra_hosts == ["localhost"]
+    assert isinstance(cluster.profile_manager.default.load_balancing_policy, DCAwareRoundRobinPolicy)
+
+
+def test_cluster_report():
+    cluster = build_cluster(Settings(cassandra_local_dc="dc1"))
+    assert cluster_report(cluster)["local_dc"] is None
+    # Hosts as discovered on connecting
+    for address, datacenter in (("10.0.0.1", "dc1"), ("10.0.0.2", "dc2")):
+        cluster.metadata.add_or_return_host(Host(DefaultEndPoint(address), SimpleConvictionPolicy,
+                                                 datacenter=datacenter, rack="rack1"))
+    report = cluster_report(cluster)
+
+    assert report["token_aware"] is True
+    assert report["load_balancing"] == "TokenAwarePolicy"
+    assert report["local_dc"] == "dc1"
+    assert report["protocol_version"] == 4
+    assert report["speculative_execution"] == "off"
+
+
+def test_named_profiles_follow_settings():
+    config = Settings(cassandra_hot_read_consistency="local_one", cassandra_hot_read_timeout=0.5,
+                      cassandra_sample_write_retry="fallthrough", cassandra_admin_consistency="EACH_QUORUM")
+    profiles = build_cluster(config).profile_manager.profiles
+
+    assert set(PROFILES) <= set(profiles)
+    assert profiles[HOT_READ].consistency_level == ConsistencyLevel.LOCAL_ONE
+    assert profiles[HOT_READ].request_timeout == 0.5
+    assert isinstance(profiles[HOT_READ].retry_policy, RetryPolicy)
+    assert isinstance(profiles[SAMPLE_WRITE].retry_policy, FallthroughRetryPolicy)
+    assert profiles[ADMIN].consistency_level == ConsistencyLevel.EACH_QUORUM
+    # Unnamed statements, including cqlengine, run at the admin consistency
+    assert build_cluster(config).profile_manager.default.consistency_level == ConsistencyLevel.EACH_QUORUM
+
+
+def test_profiles_share_routing_but_not_policy_instances():
+    profiles = build_cluster(Settings(cassandra_speculative_delay_ms=20)).profile_manager.profiles
+
+    assert all(isinstance(profiles[name].load_balancing_policy, TokenAwarePolicy) for name in PROFILES)
+    assert all(isinstance(profiles[name].speculative_execution_policy, ConstantSpeculativeExecutionPolicy)
+               for name in PROFILES)
+    assert profiles[HOT_READ].load_balancing_policy is not profiles[ADMIN].load_balancing_policy
+
+
+@pytest.mark.parametrize("overrides", [
+    {"cassandra_hot_read_consistency": "SOMETIMES"},
+    {"cassandra_hot_read_retry": "forever"},
+])
+def test_invalid_profile_settings(overrides):
+    with pytest.raises(ValueError):
+        build_profile(Settings(**overrides), HOT_READ)
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        build_profile(Settings(), "reporting")
+
+
+def test_cluster_report_lists_profiles():
+    report = cluster_report(build_cluster(Settings(cassandra_hot_read_timeout=1.5)))
+
+    assert report["profiles"][HOT_READ] == "LOCAL_ONE 1.5s RetryPolicy"
+    assert report["profiles"][ADMIN] == "QUORUM 10.0s RetryPolicy"
@@ -0,0 +1,70 @@
+import pytest
+
+from app.db.migrations import MIGRATIONS, Migration, run_migrations
+
+
+class FakeResult(list):
+    was_applied = True
+
+
+class FakeSession:
+    """Records statements and keeps schema_migrations / lock rows in memory"""
+
+    def __init__(self, applied=(), locked=False):
+        self.versions = set(applied)
+        self.locked = locked
+        self.statements = []
+
+    def execute(self, query, parameters=None):
+        self.statements.append(query)
+        result = FakeResult()
+        if query.startswith("SELECT version FROM schema_migrations"):
+            result.extend({'version': version} for version in sorted(self.versions))
+        elif query.startswith("INSERT INTO schema_migration_locks"):
+            result.was_applied = not self.locked
+            self.locked = True
+        elif query.startswith("DELETE FROM schema_migration_locks"):
+            self.locked = False
+        elif query.startswith("INSERT INTO schema_migrations"):
+            self.versions.add(parameters[0])
+        return result
+
+
+def recording(calls, version):
+    return Migration(version, f"migration {version}", lambda session: calls.append(version))
+
+
+def test_migrations_have_unique_increasing_versions():
+    versions = [m.version for m in MIGRATIONS]
+    assert versions == sorted(set(versions))
+
+
+def test_pending_migrations_apply_in_order_once():
+    calls = []
+    session = FakeSession(applied={1})
+    migrations = [recording(calls, 3), recording(calls, 1), recording(calls, 2)]
+
+    assert run_migrations(session, migrations) == [2, 3]
+    assert calls == [2, 3]
+    assert not session.locked
+
+    assert run_migrations(session, migrations) == []
+    assert calls == [2, 3]
+    assert not any(s.startswith("INSERT INTO schema_migration_locks") for s in session.statements[-3:])
+
+
+def test_lock_is_released_when_a_migration_fails():
+    def fail(session):
+        raise RuntimeError("boom")
+
+    session = FakeSession()
+    with pytest.raises(RuntimeError):
+        run_migrations(session, [Migration(1, "broken", fail)])
+    assert not session.locked
+    assert session.versions == set()
+
+
+def test_waits_for_the_lock_holder():
+    session = FakeSession(locked=True)
+    with pytest.raises(RuntimeError, match="Timed out"):
+        run_migrations(session, [recording([], 1)], timeout=0, poll_interval=0)
@@ -0,0 +1,49 @@
+from unittest.mock import MagicMock
+
+import pytest
+from cassandra import ConsistencyLevel
+
+from app.db.statements import StatementCatalog
+
+
+@pytest.fixture
+def catalog():
+    StatementCatalog._instance = None
+    yield StatementCatalog()
+    StatementCatalog._instance = None
+
+
+def test_register_rejects_conflicting_cql(catalog):
+    name = catalog.register("things.find", "SELECT * FROM things WHERE id = ?")
+    assert catalog.register(name, "SELECT * FROM things WHERE id = ?") == name
+    with pytest.raises(ValueError):
+        catalog.register(name, "SELECT * FROM other WHERE id = ?")
+
+
+def test_statements_are_prepared_once_per_session(catalog):
+    catalog.register("things.find", "SELECT * FROM things WHERE id = ?")
+    catalog.register("things.list", "SELECT * FROM things")
+    session = MagicMock()
+
+    assert catalog.prepare_all(session) == 2
+    catalog.get(session, "things.find")
+    catalog.bind(session, "things.find", (1,))
+    assert session.prepare.call_count == 2
+
+    other_session = MagicMock()
+    catalog.get(other_session, "things.find")
+    other_session.prepare.assert_called_once_with("SELECT * FROM things WHERE id = ?")
+
+    with pytest.raises(KeyError):
+        catalog.get(other_session, "things.missing")
+
+
+def test_bind_sets_paging_and_consistency(catalog):
+    catalog.register("things.find", "SELECT * FROM things WHERE id = ?")
+    session = MagicMock()
+
+    bound = catalog.bind(session, "things.find", (1,), fetch_size=10, consistency_level=ConsistencyLevel.QUORUM)
+
+    session.prepare.return_value.bind.assert_called_once_with((1,))
+    assert bound.fetch_size == 10
+    assert bound.consistency_level == ConsistencyLevel.QUORUM
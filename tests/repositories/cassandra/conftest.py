@@ -10,24 +10,42 @@ from app.repositories.cassandra.bucket_repository import BucketRepository
 from app.repositories.cassandra.sample_repository import BucketedSampleRepository
 
 from app.repositories.cassandra.service_repository import ServiceModel
-from app.repositories.cassandra.experiment_repository import ExperimentModel
-from app.repositories.cassandra.bucket_repository import ExperimentBucketModel
-from app.repositories.cassandra.sample_repository import BucketedSampleModel
+from app.repositories.cassandra.experiment_repository import ExperimentByServiceModel, ExperimentModel
+from app.repositories.cassandra.bucket_repository import BucketByExperimentModel, ExperimentBucketModel
+from app.repositories.cassandra.sample_repository import (
+    BucketedSampleModel,
+    SampleAssignmentModel,
+    SampleModel,
+    SampleTimelineModel
+)
 from app.repositories.cassandra.condition_repository import (
+    ConditionByCriterionModel,
     ExperimentSamplingConditionModel,
     ExperimentSamplingConditionRepository
 )
 from app.repositories.cassandra.criterion_repository import (
+    CriterionByExperimentModel,
     ExperimentSamplingCriterionModel,
     ExperimentSamplingCriterionRepository
 )
 
+from app.repositories.cassandra.layer_repository import (
+    ExperimentLayerModel,
+    LayerByExperimentModel,
+    LayerByServiceModel,
+    LayerExperimentModel,
+    LayerRepository
+)
+from app.repositories.cassandra.slot_map_repository import ExperimentSlotMapModel, SlotMapRepository
+from app.repositories.cassandra.result_repository import BucketCounterShardModel
+
 from app.models.schemas import (
     ServiceCreate,
     ExperimentCreate,
     ExperimentBucketCreate,
     ExperimentSamplingCriterionCreate,
-    BucketedSampleCreate, ExperimentSamplingConditionCreate
+    BucketedSampleCreate, ExperimentSamplingConditionCreate,
+    ExperimentLayerCreate
 )
 
 @pytest.fixture(scope="module")
@@ -47,22 +65,34 @@ def service_repo(cassandra_session):
 @pytest.fixture
 def experiment_repo(cassandra_session):
     sync_table(ExperimentModel)
+    sync_table(ExperimentByServiceModel)
     repo = ExperimentRepository()
     yield repo
+    drop_table(ExperimentByServiceModel)
     drop_table(ExperimentModel)
 
 @pytest.fixture
 def bucket_repo(cassandra_session):
     sync_table(ExperimentBucketModel)
+    sync_table(BucketByExperimentModel)
     repo = BucketRepository()
     yield repo
+    drop_table(BucketByExperimentModel)
     drop_table(ExperimentBucketModel)
 
 @pytest.fixture
 def sample_repo(cassandra_session):
     sync_table(BucketedSampleModel)
+    sync_table(SampleModel)
+    sync_table(SampleTimelineModel)
+    sync_table(SampleAssignmentModel)
+    sync_table(BucketCounterShardModel)
     repo = BucketedSampleRepository()
     yield repo
+    drop_table(BucketCounterShardModel)
+    drop_table(SampleAssignmentModel)
+    drop_table(SampleTimelineModel)
+    drop_table(SampleModel)
     drop_table(BucketedSampleModel)
 
 @pytest.fixture
@@ -109,15 +139,19 @@ def sample_bucketed_sample():
 @pytest.fixture
 def condition_repo(cassandra_session):
     sync_table(ExperimentSamplingConditionModel)
+    sync_table(ConditionByCriterionModel)
     repo = ExperimentSamplingConditionRepository()
     yield repo
+    drop_table(ConditionByCriterionModel)
     drop_table(ExperimentSamplingConditionModel)
 
 @pytest.fixture
 def criterion_repo(cassandra_session, condition_repo):
     sync_table(ExperimentSamplingCriterionModel)
+    sync_table(CriterionByExperimentModel)
     repo = ExperimentSamplingCriterionRepository(condition_repo=condition_repo)
     yield repo
+    drop_table(CriterionByExperimentModel)
     drop_table(ExperimentSamplingCriterionModel)
 
 @pytest.fixture
@@ -138,3 +172,31 @@ def sample_criterion():
         sampling_model="User",
         sampling_attribute="attributes"
     )
+
+@pytest.fixture
+def layer_repo(cassandra_session):
+    sync_table(ExperimentLayerModel)
+    sync_table(LayerExperimentModel)
+    sync_table(LayerByServiceModel)
+    sync_table(LayerByExperimentModel)
+    repo = LayerRepository()
+    yield repo
+    drop_table(LayerByExperimentModel)
+    drop_table(LayerByServiceModel)
+    drop_table(LayerExperimentModel)
+    drop_table(ExperimentLayerModel)
+
+@pytest.fixture
+def slot_map_repo(cassandra_session):
+    sync_table(ExperimentSlotMapModel)
+    repo = SlotMapRepository()
+    yield repo
+    drop_table(ExperimentSlotMapModel)
+
+@pytest.fixture
+def sample_layer():
+    return ExperimentLayerCreate(
+        name="test-layer",
+        service_id=uuid4(),
+        segment_count=100
+    )
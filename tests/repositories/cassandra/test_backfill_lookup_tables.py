@@ -0,0 +1,60 @@
+# tests/repositories/cassandra/test_backfill_lookup_tables.py
+from datetime import datetime
+from uuid import uuid4
+
+from app.db.cassandra import CassandraSessionManager
+from app.repositories.cassandra.bucket_repository import ExperimentBucketModel
+from app.repositories.cassandra.condition_repository import ExperimentSamplingConditionModel
+from app.repositories.cassandra.experiment_repository import ExperimentModel
+from app.repositories.cassandra.layer_repository import ExperimentLayerModel
+from app.tools.backfill_lookup_tables import backfill
+
+
+def test_backfill_experiments_by_service(experiment_repo):
+    service_id = uuid4()
+    # Written without the lookup copy, as rows created before the lookup tables existed were
+    legacy = [ExperimentModel.create(id=uuid4(), service_id=service_id, name=f"legacy-{index}", active=True,
+                                     created_at=datetime.now(), updated_at=datetime.now()) for index in range(3)]
+    assert experiment_repo.list_by_service(service_id) == []
+
+    session = CassandraSessionManager.get_session()
+    assert backfill(session, "experiments_by_service") >= len(legacy)
+    assert {e.id for e in experiment_repo.list_by_service(service_id)} == {e.id for e in legacy}
+    # Upserts only, re-running changes nothing
+    backfill(session, "experiments_by_service")
+    assert len(experiment_repo.list_by_service(service_id)) == len(legacy)
+
+
+def test_backfill_buckets_by_experiment(bucket_repo):
+    experiment_id = uuid4()
+    ExperimentBucketModel.create(id=uuid4(), experiment_id=experiment_id, bucket_name="control",
+                                 percentage_distribution=50, created_at=datetime.now(), updated_at=datetime.now())
+
+    backfill(CassandraSessionManager.get_session(), "buckets_by_experiment")
+
+    found = bucket_repo.find_by_experiment_and_name(experiment_id, "control")
+    assert found is not None
+    assert found.percentage_distribution == 50
+
+
+def test_backfill_conditions_by_criterion(condition_repo):
+    criterion_id = uuid4()
+    legacy = ExperimentSamplingConditionModel.create(id=uuid4(), criterion_id=criterion_id, experiment_id=uuid4(),
+                                                     model="User", property="country", value="US",
+                                                     condition="equals")
+    assert condition_repo.find_by_criterion(criterion_id) == []
+
+    backfill(CassandraSessionManager.get_session(), "conditions_by_criterion")
+
+    assert [c.id for c in condition_repo.find_by_criterion(criterion_id)] == [legacy.id]
+
+
+def test_backfill_layers_by_service(layer_repo):
+    service_id = uuid4()
+    legacy = ExperimentLayerModel.create(id=uuid4(), service_id=service_id, name="legacy", segment_count=100,
+                                         created_at=datetime.now(), updated_at=datetime.now())
+    assert layer_repo.list_by_service(service_id) == []
+
+    backfill(CassandraSessionManager.get_session(), "layers_by_service")
+
+    assert [l.id for l in layer_repo.list_by_service(service_id)] == [legacy.id]
@@ -0,0 +1,22 @@
+# tests/repositories/cassandra/test_benchmark_counters.py
+import argparse
+
+import pytest
+
+from app.tools.benchmark_counters import benchmark, parse_shards
+
+
+def test_parse_shards():
+    assert parse_shards("1,4,16") == [1, 4, 16]
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shards("1,x")
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shards("0")
+
+
+@pytest.mark.parametrize("shard_count", [1, 8])
+def test_benchmark_counts_every_increment(sample_repo, shard_count):
+    result = benchmark(sample_repo.session, shard_count, increments=500, concurrency=32, entities=100)
+
+    assert result.counted == 500
+    assert result.per_second > 0
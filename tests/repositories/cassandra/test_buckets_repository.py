@@ -49,4 +49,19 @@ def test_list_buckets(bucket_repo, sample_bucket):
     created_bucket = bucket_repo.create(sample_bucket)
 
     buckets = bucket_repo.list_by_experiment(created_bucket.experiment_id)
-    assert len(buckets) == initial_count + 1
\ No newline at end of file
+    assert len(buckets) == initial_count + 1
+
+def test_update_distribution_reaches_experiment_listing(bucket_repo, sample_bucket):
+    created_bucket = bucket_repo.create(sample_bucket)
+    bucket_repo.update_distribution(created_bucket.experiment_id, created_bucket.bucket_name, 25)
+
+    assert bucket_repo.find_by_id(created_bucket.id).percentage_distribution == 25
+    assert [b.percentage_distribution for b in bucket_repo.list_by_experiment(created_bucket.experiment_id)] == [25]
+
+
+def test_delete_buckets_of_experiment(bucket_repo, sample_bucket):
+    created_bucket = bucket_repo.create(sample_bucket)
+
+    assert bucket_repo.delete(created_bucket.experiment_id) is True
+    assert bucket_repo.list_by_experiment(created_bucket.experiment_id) == []
+    assert bucket_repo.find_by_id(created_bucket.id) is None
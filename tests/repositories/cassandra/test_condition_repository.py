@@ -33,4 +33,5 @@ def test_find_by_criterion(condition_repo, sample_condition):
 def test_delete_condition(condition_repo, sample_condition):
     created = condition_repo.create(sample_condition)
     assert condition_repo.delete(created.id) is True
-    assert condition_repo.find_by_id(created.id) is None
\ No newline at end of file
+    assert condition_repo.find_by_id(created.id) is None
+    assert condition_repo.find_by_criterion(sample_condition.criterion_id) == []
\ No newline at end of file
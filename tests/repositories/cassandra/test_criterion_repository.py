@@ -74,6 +74,7 @@ def test_delete_criterion_with_conditions(criterion_repo, sample_criterion):
     assert criterion_repo.find_by_id(created.id) is None
     # Verify conditions were also deleted
     assert len(criterion_repo.condition_repo.find_by_criterion(created.id)) == 0
+    assert criterion_repo.find_by_experiment(sample_criterion.experiment_id) == []
 
 
 @pytest.fixture(scope="function")
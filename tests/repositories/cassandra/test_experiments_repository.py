@@ -100,3 +100,19 @@ def test_find_by_service_and_name(experiment_repo, sample_experiment):
 
     assert found_experiment is not None
     assert found_experiment.id == created_experiment.id
+
+
+def test_status_change_reaches_service_listing(experiment_repo, sample_experiment):
+    created_experiment = experiment_repo.create(sample_experiment)
+    experiment_repo.update_status(created_experiment.id, False)
+
+    assert created_experiment.id not in {e.id for e in experiment_repo.list_by_service(sample_experiment.service_id)}
+    listed = experiment_repo.list_by_service(sample_experiment.service_id, active_only=False)
+    assert [e.active for e in listed if e.id == created_experiment.id] == [False]
+
+
+def test_delete_removes_service_lookup(experiment_repo, sample_experiment):
+    created_experiment = experiment_repo.create(sample_experiment)
+    experiment_repo.delete(created_experiment.id)
+
+    assert experiment_repo.find_by_service_and_name(created_experiment.service_id, created_experiment.name) is None
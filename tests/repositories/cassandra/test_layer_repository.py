@@ -0,0 +1,86 @@
+# tests/repositories/cassandra/test_layer_repository.py
+import pytest
+from uuid import uuid4
+from app.models.schemas import ExperimentLayer, LayerExperimentCreate
+
+
+def test_create_layer(layer_repo, sample_layer):
+    layer = layer_repo.create(sample_layer)
+
+    assert isinstance(layer, ExperimentLayer)
+    assert layer.segment_count == sample_layer.segment_count
+    assert layer_repo.find_by_id(layer.id).name == sample_layer.name
+
+
+def test_list_layers_by_service(layer_repo, sample_layer):
+    layer = layer_repo.create(sample_layer)
+
+    assert [l.id for l in layer_repo.list_by_service(sample_layer.service_id)] == [layer.id]
+
+
+def test_assign_experiments(layer_repo, sample_layer):
+    layer = layer_repo.create(sample_layer)
+    first = layer_repo.assign_experiment(layer.id, LayerExperimentCreate(
+        experiment_id=uuid4(), segment_start=0, segment_end=40))
+    second = layer_repo.assign_experiment(layer.id, LayerExperimentCreate(
+        experiment_id=uuid4(), segment_start=40, segment_end=100))
+
+    members = layer_repo.list_experiments(layer.id)
+    assert {m.experiment_id for m in members} == {first.experiment_id, second.experiment_id}
+
+
+def test_reassign_experiment_replaces_range(layer_repo, sample_layer):
+    layer = layer_repo.create(sample_layer)
+    experiment_id = uuid4()
+    layer_repo.assign_experiment(layer.id, LayerExperimentCreate(
+        experiment_id=experiment_id, segment_start=0, segment_end=40))
+    layer_repo.assign_experiment(layer.id, LayerExperimentCreate(
+        experiment_id=experiment_id, segment_start=20, segment_end=60))
+
+    members = layer_repo.list_experiments(layer.id)
+    assert [(m.segment_start, m.segment_end) for m in members] == [(20, 60)]
+
+
+def test_overlapping_segments_rejected(layer_repo, sample_layer):
+    layer = layer_repo.create(sample_layer)
+    layer_repo.assign_experiment(layer.id, LayerExperimentCreate(
+        experiment_id=uuid4(), segment_start=0, segment_end=50))
+
+    with pytest.raises(ValueError, match="overlaps"):
+        layer_repo.assign_experiment(layer.id, LayerExperimentCreate(
+            experiment_id=uuid4(), segment_start=49, segment_end=60))
+
+    with pytest.raises(ValueError):
+        layer_repo.assign_experiment(layer.id, LayerExperimentCreate(
+            experiment_id=uuid4(), segment_start=60, segment_end=101))
+
+
+def test_experiment_in_another_layer_rejected(layer_repo, sample_layer):
+    first = layer_repo.create(sample_layer)
+    second = layer_repo.create(sample_layer)
+    experiment_id = uuid4()
+    layer_repo.assign_experiment(first.id, LayerExperimentCreate(
+        experiment_id=experiment_id, segment_start=0, segment_end=10))
+
+    with pytest.raises(ValueError, match="another layer"):
+        layer_repo.assign_experiment(second.id, LayerExperimentCreate(
+            experiment_id=experiment_id, segment_start=0, segment_end=10))
+
+    # Once removed from its layer the experiment can join another
+    layer_repo.remove_experiment(first.id, experiment_id)
+    layer_repo.assign_experiment(second.id, LayerExperimentCreate(
+        experiment_id=experiment_id, segment_start=0, segment_end=10))
+
+
+def test_delete_layer_clears_its_lookups(layer_repo, sample_layer):
+    layer = layer_repo.create(sample_layer)
+    experiment_id = uuid4()
+    layer_repo.assign_experiment(layer.id, LayerExperimentCreate(
+        experiment_id=experiment_id, segment_start=0, segment_end=10))
+
+    layer_repo.delete(layer.id)
+
+    assert layer_repo.list_by_service(sample_layer.service_id) == []
+    other = layer_repo.create(sample_layer)
+    layer_repo.assign_experiment(other.id, LayerExperimentCreate(
+        experiment_id=experiment_id, segment_start=0, segment_end=10))
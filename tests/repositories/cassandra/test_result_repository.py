@@ -0,0 +1,106 @@
+# tests/repositories/cassandra/test_result_repository.py
+from datetime import datetime
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.models.schemas import BucketedSample, BucketedSampleCreate, BucketWindowResult
+from app.repositories.cassandra.result_repository import (
+    ExperimentResultRepository,
+    bucket_counters,
+    bucket_totals,
+    counter_window
+)
+from app.repositories.cassandra.sharded_counter import counter_shard
+
+
+def make_sample(experiment_id, bucket, created_at):
+    return BucketedSample(id=uuid4(), experiment_id=experiment_id, sampled_entity="user", sampled_value="US",
+                          allocated_bucket=bucket, created_at=created_at, updated_at=created_at)
+
+
+def test_counter_window_floors_to_the_window_width():
+    moment = datetime(2026, 3, 14, 15, 9, 26)
+
+    assert counter_window(moment, 60) == datetime(2026, 3, 14, 15)
+    assert counter_window(moment, 15) == datetime(2026, 3, 14, 15)
+    assert counter_window(moment, 24 * 60) == datetime(2026, 3, 14)
+
+
+def test_bucket_totals_sum_windows_per_bucket():
+    hour = datetime(2026, 3, 14, 15)
+    windows = [
+        BucketWindowResult(window_start=hour, bucket_name="variant", assigned=10, completed=5),
+        BucketWindowResult(window_start=hour, bucket_name="control", assigned=None, completed=None),
+        BucketWindowResult(window_start=datetime(2026, 3, 14, 14), bucket_name="variant", assigned=30, completed=5)
+    ]
+
+    totals = bucket_totals(windows)
+
+    assert [(t.bucket_name, t.assigned, t.completed, t.completion_rate) for t in totals] == [
+        ("control", 0, 0, None),
+        ("variant", 40, 10, 0.25)
+    ]
+
+
+def test_increments_are_aggregated_per_window_and_bucket():
+    repo = ExperimentResultRepository.__new__(ExperimentResultRepository)
+    repo._bind = lambda name, parameters: parameters
+    experiment_id = uuid4()
+    hour = datetime(2026, 3, 14, 15)
+    assigned = [make_sample(experiment_id, "a", hour.replace(minute=minute)) for minute in (1, 2, 3)]
+    completed = [assigned[0], make_sample(experiment_id, "b", hour)]
+
+    updates = repo._increments(assigned, completed)
+
+    shard = counter_shard("user", bucket_counters.shard_count)
+    assert sorted(updates) == [(0, 1, experiment_id, hour, "b", shard), (3, 1, experiment_id, hour, "a", shard)]
+    assert repo._counter_query([], []) is None
+
+
+@pytest.mark.asyncio
+async def test_reads_fan_out_over_every_shard_partition():
+    repo = ExperimentResultRepository.__new__(ExperimentResultRepository)
+    repo._bind = lambda name, parameters: parameters
+    experiment_id = uuid4()
+    newer, older = datetime(2026, 3, 14, 15), datetime(2026, 3, 14, 14)
+
+    async def execute(query, profile=None):
+        _, shard, _, _ = query
+        return [
+            {"experiment_id": experiment_id, "shard": shard, "window_start": older, "bucket_name": "a",
+             "assigned": 1, "completed": None},
+            {"experiment_id": experiment_id, "shard": shard, "window_start": newer, "bucket_name": "b",
+             "assigned": shard, "completed": 1}
+        ][shard % 2:]
+
+    repo._execute_async = AsyncMock(side_effect=execute)
+
+    windows = await repo.find_by_experiment_async(experiment_id)
+
+    shards = bucket_counters.shard_count
+    assert sorted(call.args[0][1] for call in repo._execute_async.await_args_list) == list(range(shards))
+    assert [(w.window_start, w.bucket_name, w.assigned, w.completed) for w in windows] == [
+        (newer, "b", sum(range(shards)), shards),
+        (older, "a", len(range(0, shards, 2)), 0)
+    ]
+
+
+def test_samples_are_counted_on_create_and_complete(sample_repo):
+    experiment_id = uuid4()
+    for index in range(3):
+        sample_repo.create(BucketedSampleCreate(experiment_id=experiment_id, sampled_entity=f"user{index}",
+                                                sampled_value="US", allocated_bucket="control"))
+    sample_repo.create_many([
+        BucketedSampleCreate(experiment_id=experiment_id, sampled_entity="user9", sampled_value="US",
+                             allocated_bucket="variant")
+    ])
+    sample_repo.mark_complete(experiment_id, "user0", "US")
+    # Completing a sample again is not counted again
+    sample_repo.mark_complete(experiment_id, "user0", "US")
+
+    totals = bucket_totals(sample_repo.result_repo.find_by_experiment(experiment_id))
+
+    assert [(t.bucket_name, t.assigned, t.completed) for t in totals] == [("control", 3, 1), ("variant", 1, 0)]
+
@@ -0,0 +1,134 @@
+# tests/repositories/cassandra/test_sample_ingest.py
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from app.config import settings
+from app.models.schemas import BucketedSample, BucketedSampleCreate
+from app.repositories.cassandra.base_repository import partition_groups
+from app.repositories.cassandra.sample_repository import (
+    _ASSIGNMENT_COLUMNS,
+    _SAMPLE_COLUMNS,
+    _TIMELINE_COLUMNS,
+    BucketedSampleRepository
+)
+
+
+def statement(table, key):
+    return SimpleNamespace(prepared_statement=SimpleNamespace(query_string=f"INSERT INTO {table}"), routing_key=key)
+
+
+def test_partition_groups_split_by_table_key_and_size():
+    tagged = [(index, statement("timeline", b"day-1")) for index in range(5)] + [
+        (5, statement("timeline", b"day-2")),
+        (6, statement("assignments", b"day-1"))
+    ]
+
+    groups = partition_groups(tagged, max_size=2)
+
+    assert sorted(len(group) for group in groups) == [1, 1, 1, 2, 2]
+    assert sorted(tag for group in groups for tag, _ in group) == list(range(7))
+    assert all(len({(s.prepared_statement.query_string, s.routing_key) for _, s in group}) == 1 for group in groups)
+
+
+@pytest.mark.asyncio
+async def test_ingest_reports_failed_samples(monkeypatch):
+    # One statement per group, so the fake statements never go into a BatchStatement
+    monkeypatch.setattr(settings, "sample_batch_partition_size", 1)
+    repo = BucketedSampleRepository.__new__(BucketedSampleRepository)
+    experiment_id = uuid4()
+    samples = [BucketedSampleCreate(experiment_id=experiment_id, sampled_entity=f"user{index}", sampled_value="US",
+                                    allocated_bucket="a") for index in range(4)]
+
+    def insert_statements(row):
+        return [statement("samples", row['id']), statement("timeline", row['sampled_entity'].encode())]
+
+    async def execute(query, profile=None):
+        if query.routing_key == b"user3":
+            raise TimeoutError("write timed out")
+        return []
+
+    repo._insert_statements = insert_statements
+    repo._execute_async = AsyncMock(side_effect=execute)
+    repo.result_repo = MagicMock(record_async=AsyncMock())
+
+    results = await repo.ingest_async(samples, concurrency=2)
+
+    assert [sample.sampled_entity for sample, _ in results] == ["user0", "user1", "user2", "user3"]
+    assert [error is None for _, error in results] == [True, True, True, False]
+    assert isinstance(results[3][1], TimeoutError)
+    assert repo._execute_async.await_count == 8
+    # No claim or read before the batches: only the inserts are executed, and only written samples are counted
+    counted = repo.result_repo.record_async.await_args.kwargs["assigned"]
+    assert [sample.sampled_entity for sample in counted] == ["user0", "user1", "user2"]
+
+
+@pytest.mark.asyncio
+async def test_complete_many_resolves_keys_and_reports_outcomes(monkeypatch):
+    monkeypatch.setattr(settings, "sample_batch_partition_size", 1)
+    repo = BucketedSampleRepository.__new__(BucketedSampleRepository)
+    experiment_id = uuid4()
+    now = datetime.now()
+
+    def sample(entity):
+        return BucketedSample(id=uuid4(), experiment_id=experiment_id, sampled_entity=entity, sampled_value="US",
+                              allocated_bucket="a", created_at=now, updated_at=now)
+
+    by_entity = {"user1": sample("user1"), "user2": sample("user2")}
+    by_id = {s.id: s for s in by_entity.values()}
+    foreign = sample("user3").model_copy(update={'experiment_id': uuid4()})
+    by_id[foreign.id] = foreign
+
+    async def find_by_entity_value(experiment, entity, value):
+        return by_entity.get(entity)
+
+    async def find_by_id(id):
+        return by_id.get(id)
+
+    async def execute(query, profile=None):
+        if query.routing_key == by_entity["user2"].id:
+            raise TimeoutError("write timed out")
+        return []
+
+    repo.find_by_entity_value_async = find_by_entity_value
+    repo.find_by_id_async = find_by_id
+    repo._completion_statements = lambda s, at: [statement("samples", s.id), statement("assignments", s.sampled_entity)]
+    repo._execute_async = AsyncMock(side_effect=execute)
+    repo.result_repo = MagicMock(record_async=AsyncMock())
+
+    results = await repo.complete_many_async(
+        experiment_id, [("user1", "US"), by_entity["user2"].id, ("missing", "US"), foreign.id]
+    )
+
+    assert results[0][0].complete is True and results[0][1] is None
+    assert results[1][0].id == by_entity["user2"].id and isinstance(results[1][1], TimeoutError)
+    assert results[2] == (None, None)
+    assert results[3] == (None, None)
+    assert repo._execute_async.await_count == 4
+    repo.result_repo.record_async.assert_awaited_once_with(completed=[by_entity["user1"]])
+
+
+def test_sample_inserts_leave_completion_unset():
+    # Re-sending a sample upserts its rows without reopening it once completed
+    for columns in (_SAMPLE_COLUMNS, _TIMELINE_COLUMNS, _ASSIGNMENT_COLUMNS):
+        assert not {'complete', 'completed_at'} & set(columns)
+    assert 'id' in _SAMPLE_COLUMNS and 'created_at' in _SAMPLE_COLUMNS
+
+
+@pytest.mark.asyncio
+async def test_create_writes_one_batch_counted_alongside_it():
+    repo = BucketedSampleRepository.__new__(BucketedSampleRepository)
+    repo._insert_batch = MagicMock(return_value="batch")
+    repo._execute_async = AsyncMock(return_value=[])
+    repo.result_repo = MagicMock(record_async=AsyncMock())
+    sample = BucketedSampleCreate(experiment_id=uuid4(), sampled_entity="user1", sampled_value="US",
+                                  allocated_bucket="a")
+
+    created = await repo.create_async(sample)
+
+    repo._execute_async.assert_awaited_once()
+    assert repo._execute_async.await_args.args == ("batch",)
+    repo.result_repo.record_async.assert_awaited_once_with(assigned=[created])
@@ -2,8 +2,14 @@
 
 import pytest
 from uuid import uuid4
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.models.schemas import BucketedSampleCreate
+from app.repositories.cassandra.sample_repository import (
+    SampleModel,
+    merge_newest_first,
+    sample_id,
+    sample_shard
+)
 
 @pytest.fixture
 def sample_data():
@@ -80,6 +86,57 @@ def test_find_nonexistent_entity_value(sample_repo, sample_data):
     ) is None
 
 
+def test_create_many(sample_repo, sample_data):
+    other_experiment = dict(sample_data, experiment_id=uuid4())
+    samples = sample_repo.create_many([BucketedSampleCreate(**sample_data), BucketedSampleCreate(**other_experiment)])
+
+    assert [s.experiment_id for s in samples] == [sample_data["experiment_id"], other_experiment["experiment_id"]]
+    assert sample_repo.create_many([]) == []
+
+
+def test_find_assignments(sample_repo, created_sample):
+    missing_experiment = uuid4()
+    assignments = sample_repo.find_assignments(
+        [created_sample.experiment_id, missing_experiment],
+        created_sample.sampled_entity,
+        created_sample.sampled_value
+    )
+
+    assert list(assignments) == [created_sample.experiment_id]
+    assert assignments[created_sample.experiment_id].id == created_sample.id
+
+
+@pytest.mark.asyncio
+async def test_create_and_find_async(sample_repo, sample_data):
+    created = await sample_repo.create_async(BucketedSampleCreate(**sample_data))
+
+    found = await sample_repo.find_by_entity_value_async(
+        sample_data["experiment_id"], sample_data["sampled_entity"], sample_data["sampled_value"]
+    )
+    assert found.id == created.id
+    assert (await sample_repo.find_by_id_async(created.id)).allocated_bucket == "test-bucket"
+    assert await sample_repo.find_by_id_async(uuid4()) is None
+
+    completed = await sample_repo.mark_complete_async(found)
+    assert completed.complete
+    assert (await sample_repo.find_by_id_async(created.id)).complete
+
+
+@pytest.mark.asyncio
+async def test_assignments_async(sample_repo, sample_data):
+    other_experiment = dict(sample_data, experiment_id=uuid4())
+    created = await sample_repo.create_many_async([
+        BucketedSampleCreate(**sample_data), BucketedSampleCreate(**other_experiment)
+    ])
+
+    assignments = await sample_repo.find_assignments_async(
+        [sample_data["experiment_id"], uuid4()], sample_data["sampled_entity"], sample_data["sampled_value"]
+    )
+    assert list(assignments) == [sample_data["experiment_id"]]
+    assert assignments[sample_data["experiment_id"]].id == created[0].id
+    assert await sample_repo.list_by_experiment_async(other_experiment["experiment_id"]) != []
+
+
 def test_list_by_experiment(sample_repo, sample_data):
     # Create multiple samples for same experiment
     sample1 = sample_repo.create(BucketedSampleCreate(**sample_data))
@@ -128,4 +185,138 @@ def test_sample_ordering(sample_repo, sample_data):
     # Should return newest first due to clustering_order="DESC"
     samples = sample_repo.list_by_experiment(sample_data["experiment_id"])
     assert samples[0].sampled_entity in ["user456", "user123"]
-    assert samples[1].sampled_entity in ["user456", "user123"]
\ No newline at end of file
+    assert samples[1].sampled_entity in ["user456", "user123"]
+
+def test_listing_spans_shards_newest_first(sample_repo, sample_data):
+    entities = [f"user{i}" for i in range(40)]
+    assert len({sample_shard(entity) for entity in entities}) > 1
+    for entity in entities:
+        sample_repo.create(BucketedSampleCreate(**dict(sample_data, sampled_entity=entity)))
+
+    samples = sample_repo.list_by_experiment(sample_data["experiment_id"], limit=100)
+    assert {s.sampled_entity for s in samples} == set(entities)
+    assert [s.created_at for s in samples] == sorted((s.created_at for s in samples), reverse=True)
+    assert [s.sampled_entity for s in sample_repo.list_by_experiment(sample_data["experiment_id"], limit=5)] == \
+        [s.sampled_entity for s in samples[:5]]
+
+
+@pytest.mark.asyncio
+async def test_completion_reaches_timeline(sample_repo, sample_data):
+    created = await sample_repo.create_async(BucketedSampleCreate(**sample_data))
+    await sample_repo.mark_complete_async(created)
+
+    listed = await sample_repo.list_by_experiment_async(sample_data["experiment_id"])
+    assert [(s.id, s.complete) for s in listed] == [(created.id, True)]
+
+
+def test_sample_shard_is_deterministic():
+    assert sample_shard("user123", 16) == sample_shard("user123", 16)
+    assert all(0 <= sample_shard(f"user{i}", 16) < 16 for i in range(100))
+
+
+def test_merge_newest_first():
+    now = datetime.now()
+
+    def row(entity, age):
+        return {"id": uuid4(), "experiment_id": uuid4(), "sampled_entity": entity, "sampled_value": "US",
+                "allocated_bucket": "a", "complete": False, "completed_at": None,
+                "created_at": now - timedelta(seconds=age), "updated_at": now}
+
+    pages = [[row("a", 1), row("b", 5)], [row("c", 2), row("d", 3)], []]
+    assert [s.sampled_entity for s in merge_newest_first(pages, 3)] == ["a", "c", "d"]
+
+
+def test_completion_reaches_assignment_lookup(sample_repo, created_sample):
+    sample_repo.mark_complete(created_sample.experiment_id, created_sample.sampled_entity,
+                              created_sample.sampled_value)
+
+    found = sample_repo.find_by_entity_value(created_sample.experiment_id, created_sample.sampled_entity,
+                                             created_sample.sampled_value)
+    assert found.id == created_sample.id
+    assert found.complete is True
+    assert sample_repo.find_by_id(created_sample.id).complete is True
+
+
+@pytest.mark.asyncio
+async def test_assignment_lookup_is_keyed_by_value(sample_repo, sample_data):
+    created = await sample_repo.create_async(BucketedSampleCreate(**sample_data))
+
+    found = await sample_repo.find_by_entity_value_async(sample_data["experiment_id"], sample_data["sampled_entity"],
+                                                         sample_data["sampled_value"])
+    assert found.id == created.id
+    assert found.allocated_bucket == sample_data["allocated_bucket"]
+    assert await sample_repo.find_by_entity_value_async(sample_data["experiment_id"], sample_data["sampled_entity"],
+                                                        "other-value") is None
+
+
+def test_sample_id_is_deterministic():
+    experiment_id = uuid4()
+
+    assert sample_id(experiment_id, "user123", "US") == sample_id(experiment_id, "user123", "US")
+    assert sample_id(experiment_id, "user123", "US") != sample_id(experiment_id, "user123", "UK")
+    assert sample_id(experiment_id, "a:b", "c") != sample_id(experiment_id, "a", "b:c")
+
+
+def test_merge_keeps_newest_row_of_a_sample():
+    now = datetime.now()
+    shared_id = uuid4()
+
+    def row(entity, age, id=None):
+        return {"id": id or uuid4(), "experiment_id": uuid4(), "sampled_entity": entity, "sampled_value": "US",
+                "allocated_bucket": "a", "complete": None, "completed_at": None,
+                "created_at": now - timedelta(seconds=age), "updated_at": now}
+
+    pages = [[row("retried", 1, shared_id), row("other", 2)], [row("retried", 3, shared_id)]]
+    merged = merge_newest_first(pages, 10)
+    assert [(s.sampled_entity, s.created_at) for s in merged] == [("retried", now - timedelta(seconds=1)),
+                                                                  ("other", now - timedelta(seconds=2))]
+    assert merged[0].complete is False
+
+
+def test_resending_without_created_at_keeps_one_row(sample_repo, sample_data):
+    first = sample_repo.create(BucketedSampleCreate(**sample_data))
+    sample_repo.mark_complete(sample_data["experiment_id"], sample_data["sampled_entity"], sample_data["sampled_value"])
+    resent = sample_repo.create(BucketedSampleCreate(**sample_data))
+
+    assert resent.id == first.id
+    assert SampleModel.objects(id=first.id).count() == 1
+    assert sample_repo.find_by_id(first.id).complete is True
+    assert sample_repo.find_by_entity_value(sample_data["experiment_id"], sample_data["sampled_entity"],
+                                            sample_data["sampled_value"]).complete is True
+    assert [s.id for s in sample_repo.list_by_experiment(sample_data["experiment_id"])] == [first.id]
+
+
+def test_merge_skips_samples_listed_on_a_newer_day():
+    now = datetime.now()
+    shared_id = uuid4()
+
+    def row(age):
+        return {"id": shared_id, "experiment_id": uuid4(), "sampled_entity": "retried", "sampled_value": "US",
+                "allocated_bucket": "a", "complete": None, "completed_at": None,
+                "created_at": now - timedelta(days=age), "updated_at": now}
+
+    seen = set()
+    assert len(merge_newest_first([[row(0)]], 10, seen)) == 1
+    assert merge_newest_first([[row(1)]], 10, seen) == []
+
+
+def test_retried_create_is_an_upsert(sample_repo, sample_data):
+    sample = BucketedSampleCreate(**sample_data, created_at=datetime.now().replace(microsecond=0))
+    first = sample_repo.create(sample)
+    retried = sample_repo.create(sample)
+
+    assert retried.id == first.id
+    assert [s.id for s in sample_repo.list_by_experiment(sample_data["experiment_id"])] == [first.id]
+
+
+@pytest.mark.asyncio
+async def test_retry_without_created_at_neither_duplicates_nor_reopens(sample_repo, sample_data):
+    first = await sample_repo.create_async(BucketedSampleCreate(**sample_data))
+    await sample_repo.mark_complete_async(first)
+    await sample_repo.create_async(BucketedSampleCreate(**sample_data))
+
+    listed = await sample_repo.list_by_experiment_async(sample_data["experiment_id"])
+    assert [s.id for s in listed] == [first.id]
+    found = await sample_repo.find_by_entity_value_async(sample_data["experiment_id"], sample_data["sampled_entity"],
+                                                         sample_data["sampled_value"])
+    assert found.complete is True
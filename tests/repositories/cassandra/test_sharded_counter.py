@@ -0,0 +1,67 @@
+# tests/repositories/cassandra/test_sharded_counter.py
+from collections import Counter
+
+import pytest
+
+from app.db.statements import statements
+from app.repositories.cassandra.sharded_counter import ShardedCounter, counter_shard
+
+
+@pytest.fixture(autouse=True)
+def scratch_catalog(monkeypatch):
+    # The test table does not exist, so keep its statement out of the process-wide catalog
+    monkeypatch.setattr(statements, "_cql", dict(statements._cql))
+
+
+def make_counter(shard_count=8):
+    return ShardedCounter("test_counter_shards", ("owner", "name"), ("hits", "misses"), shard_count=shard_count)
+
+
+def test_increment_statement_is_registered():
+    counter = make_counter()
+
+    assert statements._cql[counter.increment] == (
+        "UPDATE test_counter_shards SET hits = hits + ?, misses = misses + ? "
+        "WHERE owner = ? AND name = ? AND shard = ?"
+    )
+
+
+def test_entities_spread_evenly_over_shards():
+    shards = Counter(counter_shard(f"user{index}", 16) for index in range(16000))
+
+    assert set(shards) == set(range(16))
+    assert max(shards.values()) < 1.1 * min(shards.values())
+
+
+def test_increments_are_added_up_per_key_and_shard():
+    counter = make_counter()
+    counts = [(("o", "a"), "user1", (1, 0))] * 3 + [(("o", "a"), "user1", (0, 1)), (("o", "b"), "user1", (1, 0))]
+
+    increments = counter.increments(counts)
+
+    shard = counter_shard("user1", 8)
+    assert sorted(increments) == [(1, 0, "o", "b", shard), (3, 1, "o", "a", shard)]
+
+
+def test_many_entities_of_one_key_use_every_shard():
+    counter = make_counter(shard_count=4)
+
+    increments = counter.increments((("o", "a"), f"user{index}", (1, 0)) for index in range(1000))
+
+    assert sorted(parameters[-1] for parameters in increments) == [0, 1, 2, 3]
+    assert sum(parameters[0] for parameters in increments) == 1000
+
+
+def test_totals_sum_shards_in_read_order():
+    counter = make_counter()
+    rows = [
+        {"owner": "o", "name": "b", "shard": 0, "hits": 2, "misses": None},
+        {"owner": "o", "name": "b", "shard": 5, "hits": 3, "misses": 1},
+        {"owner": "o", "name": "a", "shard": 1, "hits": 7, "misses": 0}
+    ]
+
+    assert list(counter.totals(rows).items()) == [(("o", "b"), [5, 1]), (("o", "a"), [7, 0])]
+
+
+def test_reads_cover_every_shard_partition():
+    assert list(make_counter(shard_count=4).shards) == [0, 1, 2, 3]
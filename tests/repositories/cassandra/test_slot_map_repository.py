@@ -0,0 +1,23 @@
+from uuid import uuid4
+
+from app.services.bucket_allocator import SLOT_MAP_SIZE
+
+
+def test_save_and_find_slot_map(slot_map_repo):
+    experiment_id = uuid4()
+    owners = ["control"] * (SLOT_MAP_SIZE // 2) + ["variant"] * (SLOT_MAP_SIZE // 2)
+
+    slot_map_repo.save(experiment_id, owners)
+    found = slot_map_repo.find_by_id(experiment_id)
+
+    assert found.experiment_id == experiment_id
+    assert found.owners == owners
+    assert [m.experiment_id for m in slot_map_repo.list_all()] == [experiment_id]
+
+
+def test_delete_slot_map(slot_map_repo):
+    experiment_id = uuid4()
+    slot_map_repo.save(experiment_id, ["control"] * SLOT_MAP_SIZE)
+
+    assert slot_map_repo.delete(experiment_id)
+    assert slot_map_repo.find_by_id(experiment_id) is None
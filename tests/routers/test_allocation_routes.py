@@ -0,0 +1,66 @@
+# tests/routers/test_allocation_routes.py
+from uuid import uuid4
+
+from fastapi import status
+
+from app.services.bucket_allocator import BucketAllocator
+
+
+def test_allocate_batch(client):
+    experiment_id = str(uuid4())
+    allocator = BucketAllocator()
+    snapshot = allocator.configure_experiment(experiment_id, [
+        {"bucket_name": "control", "percentage_distribution": 50},
+        {"bucket_name": "variant", "percentage_distribution": 50}
+    ])
+    entity_ids = [f"user{index}" for index in range(100)]
+
+    response = client.post(
+        f"/api/v1/experiments/{experiment_id}/allocations:batch",
+        json={"entity_ids": entity_ids}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["config_version"] == snapshot.version
+    allocations = response.json()["allocations"]
+    assert [a["entity_id"] for a in allocations] == entity_ids
+    assert all(
+        a["allocated_bucket"] == allocator.allocate(experiment_id, {"entity_id": a["entity_id"]})
+        for a in allocations
+    )
+
+
+def test_allocate_batch_unconfigured_experiment(client):
+    response = client.post(
+        f"/api/v1/experiments/{uuid4()}/allocations:batch",
+        json={"entity_ids": ["user1"]}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_allocate_sample_is_sticky(create_temp_experiment, client):
+    experiment_id = create_temp_experiment['id']
+    for bucket_name in ("control", "variant"):
+        client.post(
+            f"/api/v1/experiments/{experiment_id}/buckets",
+            json={"experiment_id": experiment_id, "bucket_name": bucket_name, "percentage_distribution": 50}
+        )
+    request = {"sampled_entity": "user123", "sampled_value": "US"}
+
+    first = client.post(f"/api/v1/experiments/{experiment_id}/allocate", json=request)
+    assert first.status_code == status.HTTP_200_OK
+    assert first.json()["new_assignment"] is True
+    assert first.json()["config_version"] is not None
+
+    second = client.post(f"/api/v1/experiments/{experiment_id}/allocate", json=request)
+    assert second.status_code == status.HTTP_200_OK
+    assert second.json()["new_assignment"] is False
+    assert second.json()["allocated_bucket"] == first.json()["allocated_bucket"]
+
+
+def test_allocate_sample_unconfigured_experiment(client):
+    response = client.post(
+        f"/api/v1/experiments/{uuid4()}/allocate",
+        json={"sampled_entity": "user123", "sampled_value": "US"}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,26 @@
+# tests/routers/test_assignment_routes.py
+from fastapi import status
+
+
+def test_assign_service_experiments(sample_create_bulk_experiments, client):
+    test_service, test_experiments = sample_create_bulk_experiments
+    for test_experiment in test_experiments:
+        for bucket_name in ("control", "variant"):
+            client.post(
+                f"/api/v1/experiments/{test_experiment['id']}/buckets",
+                json={"experiment_id": test_experiment['id'], "bucket_name": bucket_name,
+                      "percentage_distribution": 50}
+            )
+    request = {"sampled_entity": "user123", "sampled_value": "US"}
+
+    first = client.post(f"/api/v1/services/{test_service['id']}/assignments", json=request)
+    assert first.status_code == status.HTTP_200_OK
+    assignments = first.json()["assignments"]
+    assert set(assignments) == {e['id'] for e in test_experiments}
+    assert all(a["new_assignment"] for a in assignments.values())
+
+    second = client.post(f"/api/v1/services/{test_service['id']}/assignments", json=request)
+    assert second.status_code == status.HTTP_200_OK
+    for experiment_id, assignment in second.json()["assignments"].items():
+        assert assignment["new_assignment"] is False
+        assert assignment["allocated_bucket"] == assignments[experiment_id]["allocated_bucket"]
@@ -26,3 +26,25 @@ def test_list_buckets(create_temp_experiment, client):
     response = client.get(f"/api/v1/experiments/{create_temp_experiment['id']}/buckets")
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) > 0
+
+
+def test_update_bucket_distribution(create_temp_experiment, client):
+    experiment_id = create_temp_experiment['id']
+    for bucket_name in ("control", "variant"):
+        client.post(
+            f"/api/v1/experiments/{experiment_id}/buckets",
+            json={"experiment_id": experiment_id, "bucket_name": bucket_name, "percentage_distribution": 50}
+        )
+
+    response = client.put(
+        f"/api/v1/experiments/{experiment_id}/buckets/control",
+        json={"percentage_distribution": 20}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["percentage_distribution"] == 20
+
+    response = client.put(
+        f"/api/v1/experiments/{experiment_id}/buckets/missing",
+        json={"percentage_distribution": 20}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
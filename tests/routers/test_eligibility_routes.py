@@ -0,0 +1,63 @@
+# tests/routers/test_eligibility_routes.py
+from uuid import uuid4
+
+from fastapi import status
+
+
+def test_check_eligibility(create_temp_experiment, client):
+    experiment_id = create_temp_experiment['id']
+    criterion = client.post(
+        f"/api/v1/experiments/{experiment_id}/criteria",
+        json={
+            "criterion": {"experiment_id": experiment_id, "sampling_model": "User", "sampling_attribute": "attributes"},
+            "conditions": [
+                {"experiment_id": experiment_id, "model": "User", "property": "country", "value": "US",
+                 "condition": "equals"},
+                {"experiment_id": experiment_id, "model": "User", "property": "age", "value": "18",
+                 "condition": "gte"}
+            ]
+        }
+    ).json()
+
+    eligible = client.post(
+        f"/api/v1/experiments/{experiment_id}/eligibility",
+        json={"attributes": {"User": {"country": "US", "age": 30}}}
+    )
+    ineligible = client.post(
+        f"/api/v1/experiments/{experiment_id}/eligibility",
+        json={"attributes": {"User": {"country": "US", "age": 16}}}
+    )
+
+    assert eligible.status_code == status.HTTP_200_OK
+    assert eligible.json()["eligible"] is True
+    assert ineligible.json()["eligible"] is False
+    assert ineligible.json()["failed_criterion_id"] == criterion["id"]
+
+
+def test_check_eligibility_unknown_experiment(client):
+    response = client.post(f"/api/v1/experiments/{uuid4()}/eligibility", json={"attributes": {}})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_check_service_eligibility(create_temp_experiment, client):
+    experiment_id = create_temp_experiment['id']
+    service_id = create_temp_experiment['service_id']
+    client.post(
+        f"/api/v1/experiments/{experiment_id}/criteria",
+        json={
+            "criterion": {"experiment_id": experiment_id, "sampling_model": "User", "sampling_attribute": "attributes"},
+            "conditions": [
+                {"experiment_id": experiment_id, "model": "User", "property": "country", "value": "US,IN",
+                 "condition": "in"}
+            ]
+        }
+    )
+
+    eligible = client.post(f"/api/v1/services/{service_id}/eligibility",
+                           json={"attributes": {"User": {"country": "IN"}}})
+    ineligible = client.post(f"/api/v1/services/{service_id}/eligibility",
+                             json={"attributes": {"User": {"country": "FR"}}})
+
+    assert eligible.status_code == status.HTTP_200_OK
+    assert experiment_id in eligible.json()["experiment_ids"]
+    assert experiment_id not in ineligible.json()["experiment_ids"]
@@ -79,3 +79,57 @@ def test_list_experiments(client, sample_create_bulk_experiments):
     ]
     assert len(all_experiments) == len(expected_experiments)
 
+
+
+def test_status_and_delete_refresh_the_allocator(create_temp_service, client):
+    from app.services.bucket_allocator import BucketAllocator
+
+    service_id = create_temp_service["id"]
+    experiment = client.post(f"/api/v1/services/{service_id}/experiments",
+                             json={"name": "refreshed", "active": True, "service_id": service_id}).json()
+    client.post(f"/api/v1/experiments/{experiment['id']}/buckets",
+                json={"experiment_id": experiment['id'], "bucket_name": "all", "percentage_distribution": 100})
+    allocator = BucketAllocator()
+    assert allocator.find_snapshot(experiment["id"]) is not None
+
+    response = client.put(f"/api/v1/services/{service_id}/experiments/{experiment['id']}/status",
+                          json={"active": False})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["active"] is False
+    assert allocator.find_snapshot(experiment["id"]) is None
+
+    client.put(f"/api/v1/services/{service_id}/experiments/{experiment['id']}/status", json={"active": True})
+    assert allocator.find_snapshot(experiment["id"]) is not None
+
+    client.delete(f"/api/v1/services/{service_id}/experiments/{experiment['id']}")
+    assert allocator.find_snapshot(experiment["id"]) is None
+
+
+def test_update_status_of_missing_experiment(create_temp_service, client):
+    response = client.put(f"/api/v1/services/{create_temp_service['id']}/experiments/"
+                          f"00000000-0000-0000-0000-000000000000/status", json={"active": False})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_status_and_delete_refresh_compiled_criteria(create_temp_service, client):
+    from app.services.criteria_engine import CriteriaEngine
+
+    service_id = create_temp_service["id"]
+    experiment = client.post(f"/api/v1/services/{service_id}/experiments",
+                             json={"name": "criteria-refreshed", "active": True, "service_id": service_id}).json()
+    client.post(f"/api/v1/experiments/{experiment['id']}/criteria", json={
+        "criterion": {"experiment_id": experiment['id'], "sampling_model": "User", "sampling_attribute": "attributes"},
+        "conditions": [{"experiment_id": experiment['id'], "model": "User", "property": "country", "value": "US",
+                        "condition": "equals"}]
+    })
+    engine = CriteriaEngine()
+    assert engine.find_compiled(experiment["id"]) is not None
+
+    client.put(f"/api/v1/services/{service_id}/experiments/{experiment['id']}/status", json={"active": False})
+    assert engine.find_compiled(experiment["id"]) is None
+
+    client.put(f"/api/v1/services/{service_id}/experiments/{experiment['id']}/status", json={"active": True})
+    assert engine.find_compiled(experiment["id"]) is not None
+
+    client.delete(f"/api/v1/services/{service_id}/experiments/{experiment['id']}")
+    assert engine.find_compiled(experiment["id"]) is None
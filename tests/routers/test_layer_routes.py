@@ -0,0 +1,39 @@
+# tests/routers/test_layer_routes.py
+from fastapi import status
+
+
+def test_create_and_list_layers(create_temp_service, client):
+    service_id = create_temp_service['id']
+    response = client.post(
+        f"/api/v1/services/{service_id}/layers",
+        json={"name": "checkout", "service_id": service_id, "segment_count": 100}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    layer = response.json()
+
+    response = client.get(f"/api/v1/services/{service_id}/layers")
+    assert response.status_code == status.HTTP_200_OK
+    assert [l["id"] for l in response.json()] == [layer["id"]]
+
+
+def test_assign_layer_experiments(sample_create_bulk_experiments, client):
+    test_service, test_experiments = sample_create_bulk_experiments
+    layer = client.post(
+        f"/api/v1/services/{test_service['id']}/layers",
+        json={"name": "checkout", "service_id": test_service['id'], "segment_count": 100}
+    ).json()
+
+    response = client.post(
+        f"/api/v1/layers/{layer['id']}/experiments",
+        json={"experiment_id": test_experiments[0]['id'], "segment_start": 0, "segment_end": 50}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.post(
+        f"/api/v1/layers/{layer['id']}/experiments",
+        json={"experiment_id": test_experiments[1]['id'], "segment_start": 25, "segment_end": 75}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    response = client.get(f"/api/v1/layers/{layer['id']}/experiments")
+    assert [m["experiment_id"] for m in response.json()] == [test_experiments[0]['id']]
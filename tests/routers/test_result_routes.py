@@ -0,0 +1,34 @@
+# tests/routers/test_result_routes.py
+from fastapi import status
+
+
+def test_experiment_results_count_assignments_and_completions(create_temp_experiment, client):
+    experiment_id = create_temp_experiment['id']
+    samples = [{
+        "experiment_id": experiment_id,
+        "sampled_entity": f"user{index}",
+        "sampled_value": "US",
+        "allocated_bucket": "control" if index % 2 else "variant"
+    } for index in range(10)]
+    client.post(f"/api/v1/experiments/{experiment_id}/samples:batch", json={"samples": samples})
+    client.post(f"/api/v1/experiments/{experiment_id}/samples:complete", json={"keys": [
+        {"sampled_entity": "user1", "sampled_value": "US"},
+        {"sampled_entity": "user3", "sampled_value": "US"}
+    ]})
+
+    response = client.get(f"/api/v1/experiments/{experiment_id}/results")
+
+    assert response.status_code == status.HTTP_200_OK
+    buckets = {b["bucket_name"]: b for b in response.json()["buckets"]}
+    assert (buckets["control"]["assigned"], buckets["control"]["completed"]) == (5, 2)
+    assert buckets["control"]["completion_rate"] == 0.4
+    assert (buckets["variant"]["assigned"], buckets["variant"]["completed"]) == (5, 0)
+    assert sum(w["assigned"] for w in response.json()["windows"]) == 10
+
+
+def test_experiment_results_reject_an_empty_range(create_temp_experiment, client):
+    response = client.get(
+        f"/api/v1/experiments/{create_temp_experiment['id']}/results",
+        params={"since": "2026-01-02T00:00:00", "until": "2026-01-01T00:00:00"}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -1,4 +1,6 @@
 # tests/routers/test_sample_routes.py
+import json
+
 import pytest
 from fastapi import status
 
@@ -33,3 +35,68 @@ def test_list_samples(create_temp_experiment, client):
     response = client.get(f"/api/v1/experiments/{create_temp_experiment['id']}/samples")
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) > 0
+
+
+def test_create_samples_batch(create_temp_experiment, client):
+    experiment_id = create_temp_experiment['id']
+    samples = [{
+        "experiment_id": experiment_id,
+        "sampled_entity": f"user{index}",
+        "sampled_value": "US",
+        "allocated_bucket": "test-bucket"
+    } for index in range(50)]
+
+    response = client.post(f"/api/v1/experiments/{experiment_id}/samples:batch", json={"samples": samples})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["created"] == 50
+    assert response.json()["failed"] == 0
+    assert [item["index"] for item in response.json()["items"]] == list(range(50))
+
+    # Re-sending the batch upserts the same samples
+    resent = client.post(f"/api/v1/experiments/{experiment_id}/samples:batch", json={"samples": samples})
+    assert [i["sample"]["id"] for i in resent.json()["items"]] == \
+        [i["sample"]["id"] for i in response.json()["items"]]
+    listed = client.get(f"/api/v1/experiments/{experiment_id}/samples", params={"limit": 100})
+    assert len(listed.json()) == 50
+
+
+def test_create_samples_batch_too_large(create_temp_experiment, client, monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "sample_batch_max_size", 1)
+    experiment_id = create_temp_experiment['id']
+    sample = {"experiment_id": experiment_id, "sampled_entity": "user1", "sampled_value": "US",
+              "allocated_bucket": "test-bucket"}
+
+    response = client.post(f"/api/v1/experiments/{experiment_id}/samples:batch", json={"samples": [sample] * 2})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_complete_samples_batch(create_temp_experiment, client):
+    experiment_id = create_temp_experiment['id']
+    samples = [{
+        "experiment_id": experiment_id,
+        "sampled_entity": f"user{index}",
+        "sampled_value": "US",
+        "allocated_bucket": "test-bucket"
+    } for index in range(3)]
+    created = client.post(f"/api/v1/experiments/{experiment_id}/samples:batch", json={"samples": samples}).json()
+    keys = [
+        {"sample_id": created["items"][0]["sample"]["id"]},
+        {"sampled_entity": "user1", "sampled_value": "US"},
+        {"sampled_entity": "nobody", "sampled_value": "US"}
+    ]
+
+    response = client.post(f"/api/v1/experiments/{experiment_id}/samples:complete", json={"keys": keys})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["status"] for item in items] == ["completed", "completed", "not_found"]
+
+    listed = client.get(f"/api/v1/experiments/{experiment_id}/samples").json()
+    assert {s["sampled_entity"] for s in listed if s["complete"]} == {"user0", "user1"}
+
+
+def test_complete_samples_batch_rejects_ambiguous_keys(create_temp_experiment, client):
+    response = client.post(f"/api/v1/experiments/{create_temp_experiment['id']}/samples:complete",
+                           json={"keys": [{"sampled_entity": "user1"}]})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,223 @@
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+from app.models.schemas import Experiment, ExperimentBucket, ExperimentLayer, ExperimentSlotMap, LayerExperiment
+from app.services.allocator_loader import AllocatorLoader
+from app.services.bucket_allocator import BucketAllocator, SlotMapTable, rebalance_slot_map
+
+
+def make_experiment(experiment_id, allocation_mode="range"):
+    now = datetime.now()
+    return Experiment(id=experiment_id, service_id=uuid4(), name="exp", active=True, created_at=now,
+                      updated_at=now, allocation_mode=allocation_mode)
+
+
+def make_bucket(experiment_id, name, percentage):
+    now = datetime.now()
+    return ExperimentBucket(experiment_id=experiment_id, bucket_name=name, percentage_distribution=percentage,
+                            created_at=now, updated_at=now)
+
+
+def make_layer(layer_id, segment_count=100):
+    now = datetime.now()
+    return ExperimentLayer(id=layer_id, service_id=uuid4(), name="layer", segment_count=segment_count,
+                           created_at=now, updated_at=now)
+
+
+def make_member(layer_id, experiment_id, start, end):
+    now = datetime.now()
+    return LayerExperiment(layer_id=layer_id, experiment_id=experiment_id, segment_start=start, segment_end=end,
+                           created_at=now, updated_at=now)
+
+
+@pytest.fixture
+def allocator():
+    BucketAllocator._instance = None
+    return BucketAllocator()
+
+
+@pytest.fixture
+def experiment_repo():
+    return MagicMock()
+
+
+@pytest.fixture
+def bucket_repo():
+    return MagicMock()
+
+
+@pytest.fixture
+def layer_repo():
+    repo = MagicMock()
+    repo.list_all.return_value = []
+    repo.list_all_experiments.return_value = []
+    return repo
+
+
+@pytest.fixture
+def slot_map_repo():
+    repo = MagicMock()
+    repo.list_all.return_value = []
+    repo.find_by_id.return_value = None
+    return repo
+
+
+@pytest.fixture
+def loader(allocator, experiment_repo, bucket_repo, layer_repo, slot_map_repo):
+    return AllocatorLoader(allocator, experiment_repo, bucket_repo, layer_repo, slot_map_repo)
+
+
+def test_load_all(loader, allocator, experiment_repo, bucket_repo):
+    configured, incomplete = uuid4(), uuid4()
+    experiments = [make_experiment(configured), make_experiment(incomplete)]
+    experiment_repo.list_all.return_value = experiments
+    bucket_repo.list_all.return_value = [
+        make_bucket(configured, "control", 50),
+        make_bucket(configured, "variant", 50),
+        make_bucket(incomplete, "control", 40)
+    ]
+
+    assert loader.load_all() == 1
+    assert [s.experiment_id for s in allocator.service_snapshots(str(experiments[0].service_id))] == [str(configured)]
+    assert allocator.allocate(str(configured), {"entity_id": "user1"}) in ("control", "variant")
+    assert allocator.find_snapshot(str(incomplete)) is None
+    experiment_repo.list_all.assert_called_once_with(True)
+
+
+def test_load_all_drops_inactive_experiments(loader, allocator, experiment_repo, bucket_repo):
+    allocator.configure_experiment(str(uuid4()), [{"bucket_name": "A", "percentage_distribution": 100}])
+    experiment_repo.list_all.return_value = []
+    bucket_repo.list_all.return_value = []
+
+    assert loader.load_all() == 0
+    assert allocator.experiment_ids() == []
+
+
+def test_load_all_keeps_unchanged_snapshots(loader, allocator, experiment_repo, bucket_repo):
+    changed, unchanged = uuid4(), uuid4()
+    experiment_repo.list_all.return_value = [make_experiment(changed), make_experiment(unchanged)]
+    bucket_repo.list_all.return_value = [
+        make_bucket(changed, "control", 100),
+        make_bucket(unchanged, "control", 50),
+        make_bucket(unchanged, "variant", 50)
+    ]
+    loader.load_all()
+    first = {experiment_id: allocator.find_snapshot(experiment_id) for experiment_id in allocator.experiment_ids()}
+
+    # A later scan may return the same buckets in another order
+    bucket_repo.list_all.return_value = [
+        make_bucket(unchanged, "variant", 50),
+        make_bucket(unchanged, "control", 50),
+        make_bucket(changed, "control", 50),
+        make_bucket(changed, "variant", 50)
+    ]
+    loader.load_all()
+
+    assert allocator.find_snapshot(str(unchanged)) is first[str(unchanged)]
+    assert allocator.find_snapshot(str(changed)).version > first[str(changed)].version
+
+
+def test_refresh_experiment(loader, allocator, experiment_repo, bucket_repo):
+    experiment_id = uuid4()
+    experiment_repo.find_by_id.return_value = make_experiment(experiment_id)
+    bucket_repo.list_by_experiment.return_value = [make_bucket(experiment_id, "control", 100)]
+    first = loader.refresh_experiment(experiment_id)
+
+    bucket_repo.list_by_experiment.return_value = [
+        make_bucket(experiment_id, "control", 50),
+        make_bucket(experiment_id, "variant", 50)
+    ]
+    second = loader.refresh_experiment(experiment_id)
+
+    assert second.version > first.version
+    assert second.service_id == str(experiment_repo.find_by_id.return_value.service_id)
+    experiment_repo.find_by_id.assert_called_with(experiment_id)
+    assert [name for name, _ in second.buckets] == ["control", "variant"]
+
+
+def test_refresh_experiment_keeps_last_valid_snapshot(loader, allocator, experiment_repo, bucket_repo):
+    experiment_id = uuid4()
+    experiment_repo.find_by_id.return_value = make_experiment(experiment_id)
+    bucket_repo.list_by_experiment.return_value = [make_bucket(experiment_id, "control", 100)]
+    first = loader.refresh_experiment(experiment_id)
+
+    bucket_repo.list_by_experiment.return_value = [
+        make_bucket(experiment_id, "control", 100),
+        make_bucket(experiment_id, "variant", 20)
+    ]
+
+    assert loader.refresh_experiment(experiment_id) is first
+
+
+def test_load_all_layers(loader, allocator, experiment_repo, bucket_repo, layer_repo):
+    layer_id, experiment_id = uuid4(), uuid4()
+    experiment_repo.list_all.return_value = []
+    bucket_repo.list_all.return_value = []
+    layer_repo.list_all.return_value = [make_layer(layer_id)]
+    layer_repo.list_all_experiments.return_value = [make_member(layer_id, experiment_id, 0, 50)]
+
+    loader.load_all()
+
+    assert allocator.layer_of(str(experiment_id)).layer_id == str(layer_id)
+
+
+def test_refresh_layer(loader, allocator, layer_repo):
+    layer_id, first, second = uuid4(), uuid4(), uuid4()
+    layer_repo.find_by_id.return_value = make_layer(layer_id)
+    layer_repo.list_experiments.return_value = [make_member(layer_id, first, 0, 50)]
+    loader.refresh_layer(layer_id)
+
+    layer_repo.list_experiments.return_value = [make_member(layer_id, first, 0, 50),
+                                                make_member(layer_id, second, 50, 100)]
+    layer = loader.refresh_layer(layer_id)
+    assert layer.experiment_ids == (str(first), str(second))
+
+    layer_repo.find_by_id.return_value = None
+    assert loader.refresh_layer(layer_id) is None
+    assert allocator.layer_of(str(first)) is None
+
+
+def test_refresh_experiment_removes_inactive_experiment(loader, allocator, experiment_repo, bucket_repo):
+    experiment_id = uuid4()
+    experiment_repo.find_by_id.return_value = make_experiment(experiment_id)
+    bucket_repo.list_by_experiment.return_value = [make_bucket(experiment_id, "control", 100)]
+    loader.refresh_experiment(experiment_id)
+
+    experiment_repo.find_by_id.return_value = None
+    assert loader.refresh_experiment(experiment_id) is None
+    assert allocator.find_snapshot(str(experiment_id)) is None
+
+
+def test_refresh_slot_map_experiment(loader, allocator, experiment_repo, bucket_repo, slot_map_repo):
+    experiment_id = uuid4()
+    experiment_repo.find_by_id.return_value = make_experiment(experiment_id, allocation_mode="slot_map")
+    bucket_repo.list_by_experiment.return_value = [
+        make_bucket(experiment_id, "control", 80),
+        make_bucket(experiment_id, "variant", 20)
+    ]
+    previous = rebalance_slot_map([
+        {"bucket_name": "control", "percentage_distribution": 90},
+        {"bucket_name": "variant", "percentage_distribution": 10}
+    ])
+    slot_map_repo.find_by_id.return_value = ExperimentSlotMap(experiment_id=experiment_id, owners=previous,
+                                                              updated_at=datetime.now())
+
+    snapshot = loader.refresh_experiment(experiment_id)
+
+    assert isinstance(snapshot.slots, SlotMapTable)
+    saved_owners = slot_map_repo.save.call_args.args[1]
+    assert sum(before != after for before, after in zip(previous, saved_owners)) == 1000
+
+
+def test_load_all_keeps_current_slot_map(loader, allocator, experiment_repo, bucket_repo, slot_map_repo):
+    experiment_id = uuid4()
+    experiment_repo.list_all.return_value = [make_experiment(experiment_id, allocation_mode="slot_map")]
+    bucket_repo.list_all.return_value = [make_bucket(experiment_id, "control", 100)]
+    owners = rebalance_slot_map([{"bucket_name": "control", "percentage_distribution": 100}])
+    slot_map_repo.list_all.return_value = [ExperimentSlotMap(experiment_id=experiment_id, owners=owners,
+                                                             updated_at=datetime.now())]
+
+    assert loader.load_all() == 1
+    slot_map_repo.save.assert_not_called()
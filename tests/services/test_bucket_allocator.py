@@ -1,6 +1,14 @@
 import pytest
 from unittest.mock import patch
-from app.services.bucket_allocator import BucketAllocator
+from app.services.bucket_allocator import (
+    BucketAllocator,
+    HASH_SPACE,
+    SLOT_MAP_SIZE,
+    SlotMapTable,
+    SlotTable,
+    rebalance_slot_map,
+    slot_targets
+)
 import threading
 import xxhash
 
@@ -132,4 +140,259 @@ def test_distribution_accuracy(allocator):
 def test_unconfigured_experiment(allocator, sample_data):
     """Test handling of unconfigured experiments"""
     with pytest.raises(ValueError):
-        allocator.allocate('unknown_exp', sample_data)
\ No newline at end of file
+        allocator.allocate('unknown_exp', sample_data)
+
+def test_allocate_many_matches_allocate(allocator, experiment_config):
+    """Test batch allocation is identical to per-entity allocation"""
+    allocator.configure_experiment('exp1', experiment_config)
+    entity_ids = [f'user{i}' for i in range(5000)]
+
+    batch = allocator.allocate_many('exp1', entity_ids)
+
+    assert batch == [allocator.allocate('exp1', {'entity_id': e}) for e in entity_ids]
+
+
+@pytest.mark.parametrize("hash_value, expected_bucket", [
+    (0, 'control'),
+    (2147483648, 'variant1'),
+    (4294967295, 'variant2')
+])
+def test_allocate_many_edge_cases(allocator, experiment_config, hash_value, expected_bucket):
+    """Test batch allocation at specific hash values"""
+    allocator.configure_experiment('exp1', experiment_config)
+    with patch('xxhash.xxh32_intdigest', return_value=hash_value):
+        assert allocator.allocate_many('exp1', ['user1', 'user2']) == [expected_bucket, expected_bucket]
+
+
+def test_allocate_many_empty_batch(allocator, experiment_config):
+    """Test batch allocation of no entities"""
+    allocator.configure_experiment('exp1', experiment_config)
+    assert allocator.allocate_many('exp1', []) == []
+
+
+def test_allocate_many_unconfigured_experiment(allocator):
+    """Test batch allocation against unconfigured experiments"""
+    with pytest.raises(ValueError):
+        allocator.allocate_many('unknown_exp', ['user1'])
+
+
+def test_slot_table_integer_boundaries():
+    """Test cut points are exact integer shares of the hash space"""
+    table = SlotTable.from_buckets([
+        {'bucket_name': 'B', 'percentage_distribution': 50},
+        {'bucket_name': 'A', 'percentage_distribution': 50}
+    ])
+
+    assert table.names == ('A', 'B')
+    assert list(table.cut_points) == [HASH_SPACE // 2]
+    assert table.lookup(HASH_SPACE // 2 - 1) == 'A'
+    assert table.lookup(HASH_SPACE // 2) == 'B'
+    assert table.lookup(HASH_SPACE - 1) == 'B'
+
+
+def test_slot_table_zero_percentage_bucket():
+    """Test that a bucket with no share never receives an allocation"""
+    table = SlotTable.from_buckets([
+        {'bucket_name': 'A', 'percentage_distribution': 0},
+        {'bucket_name': 'B', 'percentage_distribution': 100},
+        {'bucket_name': 'C', 'percentage_distribution': 0}
+    ])
+
+    assert table.lookup(0) == 'B'
+    assert table.lookup(HASH_SPACE - 1) == 'B'
+
+
+def test_slot_table_is_immutable(allocator, experiment_config):
+    """Test slot tables reject mutation"""
+    allocator.configure_experiment('exp1', experiment_config)
+    with pytest.raises(AttributeError):
+        allocator._get_slots('exp1').names = ('other',)
+
+
+def test_reconfiguration_is_immediately_visible(allocator):
+    """Test that reconfiguring an experiment replaces its cached slots"""
+    allocator.configure_experiment('exp1', [{'bucket_name': 'A', 'percentage_distribution': 100}])
+    assert allocator.allocate('exp1', {'entity_id': 'user1'}) == 'A'
+
+    allocator.configure_experiment('exp1', [{'bucket_name': 'B', 'percentage_distribution': 100}])
+    assert allocator.allocate('exp1', {'entity_id': 'user1'}) == 'B'
+
+
+def test_snapshot_versions(allocator, experiment_config):
+    """Test snapshots are versioned and unaffected by later reconfiguration"""
+    first = allocator.configure_experiment('exp1', experiment_config)
+    pinned = allocator.get_snapshot('exp1')
+    second = allocator.configure_experiment('exp1', [{'bucket_name': 'A', 'percentage_distribution': 100}])
+
+    assert pinned is first
+    assert second.version > first.version
+    assert allocator.get_snapshot('exp1') is second
+    assert pinned.allocate('user1') in ('control', 'variant1', 'variant2')
+    with pytest.raises(AttributeError):
+        pinned.version = 0
+
+
+def test_unchanged_configuration_keeps_its_snapshot(allocator, experiment_config):
+    """Test reloading an experiment or layer as it is served publishes no new version"""
+    first = allocator.configure_experiment('exp1', experiment_config, service_id='svc1')
+    assert allocator.configure_experiment('exp1', [dict(b) for b in experiment_config], service_id='svc1') is first
+    assert allocator.configure_experiment('exp1', experiment_config) is first
+    assert allocator.configure_experiment('exp1', experiment_config, service_id='svc2').version > first.version
+
+    layer = allocator.configure_layer('layer1', 100, [('exp1', 0, 50)])
+    assert allocator.configure_layer('layer1', 100, [('exp1', 0, 50)]) is layer
+    assert allocator.configure_layer('layer1', 100, [('exp1', 0, 60)]).version > layer.version
+
+
+def test_remove_experiment(allocator, experiment_config):
+    """Test removed experiments stop allocating"""
+    allocator.configure_experiment('exp1', experiment_config)
+
+    assert allocator.remove_experiment('exp1') is True
+    assert allocator.remove_experiment('exp1') is False
+    assert allocator.find_snapshot('exp1') is None
+    with pytest.raises(ValueError):
+        allocator.allocate('exp1', {'entity_id': 'user1'})
+
+
+def test_service_snapshots(allocator, experiment_config):
+    """Test experiments are indexed by the service they belong to"""
+    allocator.configure_experiment('exp1', experiment_config, service_id='svc1')
+    allocator.configure_experiment('exp2', experiment_config, service_id='svc1')
+    allocator.configure_experiment('exp3', experiment_config, service_id='svc2')
+
+    # Reconfiguring without a service keeps the existing one
+    allocator.configure_experiment('exp2', experiment_config)
+    assert [s.experiment_id for s in allocator.service_snapshots('svc1')] == ['exp1', 'exp2']
+
+    allocator.configure_experiment('exp1', experiment_config, service_id='svc2')
+    allocator.remove_experiment('exp3')
+    assert [s.experiment_id for s in allocator.service_snapshots('svc1')] == ['exp2']
+    assert [s.experiment_id for s in allocator.service_snapshots('svc2')] == ['exp1']
+    assert allocator.service_snapshots('unknown') == []
+
+
+def test_layer_segments_are_mutually_exclusive(allocator, experiment_config):
+    """Test every entity lands in at most one experiment of a layer"""
+    for experiment_id in ('exp1', 'exp2', 'exp3'):
+        allocator.configure_experiment(experiment_id, experiment_config, service_id='svc1')
+    allocator.configure_layer('layer1', 100, [('exp1', 0, 30), ('exp2', 30, 80)])
+
+    counts = {'exp1': 0, 'exp2': 0, 'exp3': 0}
+    for i in range(2000):
+        experiments = [s.experiment_id for s in allocator.assignable_snapshots('svc1', f'user{i}')]
+        layered = [e for e in experiments if e != 'exp3']
+        assert len(layered) <= 1
+        assert 'exp3' in experiments
+        for e in experiments:
+            counts[e] += 1
+
+    assert counts['exp1'] == pytest.approx(600, abs=80)
+    assert counts['exp2'] == pytest.approx(1000, abs=80)
+    assert counts['exp3'] == 2000
+
+
+def test_layer_members_matches_resolve(allocator):
+    """Test the vectorized layer mask agrees with per-entity resolution"""
+    layer = allocator.configure_layer('layer1', 1000, [('exp1', 0, 250), ('exp2', 500, 1000)])
+    entity_ids = [f'user{i}' for i in range(2000)]
+
+    mask = layer.members('exp1', entity_ids)
+
+    assert mask.tolist() == [layer.resolve(e) == 'exp1' for e in entity_ids]
+    assert not layer.members('exp3', entity_ids).any()
+    assert allocator.in_layer_segment('exp1', 'user1') == (layer.resolve('user1') == 'exp1')
+    assert allocator.in_layer_segment('unlayered', 'user1') is True
+
+
+def test_invalid_layer_configuration(allocator):
+    """Test overlapping or out of range segments are rejected"""
+    with pytest.raises(ValueError):
+        allocator.configure_layer('layer1', 100, [('exp1', 0, 60), ('exp2', 50, 100)])
+    with pytest.raises(ValueError):
+        allocator.configure_layer('layer1', 100, [('exp1', 0, 101)])
+    assert allocator.find_layer('layer1') is None
+
+
+def test_reconfigure_and_remove_layer(allocator):
+    """Test experiments leave a layer when it is reconfigured or removed"""
+    allocator.configure_layer('layer1', 100, [('exp1', 0, 50), ('exp2', 50, 100)])
+    allocator.configure_layer('layer1', 100, [('exp2', 0, 100)])
+    assert allocator.layer_of('exp1') is None
+    assert allocator.layer_of('exp2').resolve('user1') == 'exp2'
+
+    assert allocator.remove_layer('layer1') is True
+    assert allocator.layer_of('exp2') is None
+    assert allocator.remove_layer('layer1') is False
+
+
+def test_removed_experiment_leaves_its_layer_until_served_again(allocator, experiment_config):
+    """Test removing an experiment drops its layer membership and configuring it again restores it"""
+    allocator.configure_experiment('exp1', experiment_config)
+    allocator.configure_layer('layer1', 100, [('exp1', 0, 50)])
+
+    assert allocator.remove_experiment('exp1') is True
+    assert allocator.layer_of('exp1') is None
+
+    allocator.configure_experiment('exp1', experiment_config)
+    assert allocator.layer_of('exp1').layer_id == 'layer1'
+
+
+def test_slot_targets_sum_to_slot_map_size():
+    """Test slot targets use largest remainder rounding"""
+    targets = slot_targets([
+        {'bucket_name': 'A', 'percentage_distribution': 33.3},
+        {'bucket_name': 'B', 'percentage_distribution': 33.3},
+        {'bucket_name': 'C', 'percentage_distribution': 33.4}
+    ])
+    assert targets == {'A': 3330, 'B': 3330, 'C': 3340}
+
+    with pytest.raises(ValueError):
+        slot_targets([{'bucket_name': 'A', 'percentage_distribution': 90}])
+
+
+def test_rebalance_slot_map_moves_only_the_delta():
+    """Test ramping a bucket only hands over the slots it gains"""
+    before = rebalance_slot_map([
+        {'bucket_name': 'A', 'percentage_distribution': 30},
+        {'bucket_name': 'B', 'percentage_distribution': 50},
+        {'bucket_name': 'C', 'percentage_distribution': 20}
+    ])
+    after = rebalance_slot_map([
+        {'bucket_name': 'A', 'percentage_distribution': 20},
+        {'bucket_name': 'B', 'percentage_distribution': 50},
+        {'bucket_name': 'C', 'percentage_distribution': 30}
+    ], before)
+
+    moved = [(b, a) for b, a in zip(before, after) if b != a]
+    assert len(moved) == SLOT_MAP_SIZE // 10
+    assert set(moved) == {('A', 'C')}
+
+
+def test_rebalance_slot_map_drops_removed_buckets():
+    """Test slots of a removed bucket go to the remaining ones"""
+    before = rebalance_slot_map([
+        {'bucket_name': 'A', 'percentage_distribution': 50},
+        {'bucket_name': 'B', 'percentage_distribution': 50}
+    ])
+    after = rebalance_slot_map([{'bucket_name': 'A', 'percentage_distribution': 100}], before)
+    assert set(after) == {'A'}
+
+
+def test_slot_map_allocation(allocator):
+    """Test slot map experiments allocate by slot owner, scalar and batch alike"""
+    buckets = [
+        {'bucket_name': 'control', 'percentage_distribution': 90},
+        {'bucket_name': 'variant', 'percentage_distribution': 10}
+    ]
+    owners = rebalance_slot_map(buckets)
+    snapshot = allocator.configure_experiment('exp1', buckets, slot_owners=owners)
+    entity_ids = [f'user{i}' for i in range(2000)]
+
+    assert isinstance(snapshot.slots, SlotMapTable)
+    assert allocator.allocate_many('exp1', entity_ids) == [snapshot.allocate(e) for e in entity_ids]
+    with patch('xxhash.xxh32_intdigest', return_value=HASH_SPACE - 1):
+        assert allocator.allocate('exp1', {'entity_id': 'user1'}) == owners[-1]
+
+    with pytest.raises(ValueError):
+        allocator.configure_experiment('exp2', buckets, slot_owners=['unknown'] * SLOT_MAP_SIZE)
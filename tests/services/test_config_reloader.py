@@ -0,0 +1,47 @@
+# tests/services/test_config_reloader.py
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.config_reloader import ConfigReloader
+
+
+@pytest.mark.asyncio
+async def test_loaders_are_reloaded_every_interval():
+    loader = MagicMock()
+    reloader = ConfigReloader([loader], interval=0.01)
+    reloader.start()
+
+    # The first worker thread can take a while to start on a loaded machine
+    for _ in range(200):
+        if loader.load_all.call_count >= 2:
+            break
+        await asyncio.sleep(0.01)
+    await reloader.stop()
+
+    assert loader.load_all.call_count >= 2
+    calls = loader.load_all.call_count
+    await asyncio.sleep(0.02)
+    assert loader.load_all.call_count == calls
+
+
+@pytest.mark.asyncio
+async def test_a_failed_reload_does_not_stop_the_others():
+    failing, working = MagicMock(), MagicMock()
+    failing.load_all.side_effect = RuntimeError("cluster unavailable")
+    reloader = ConfigReloader([failing, working], interval=0.01)
+
+    await reloader.reload()
+    await reloader.reload()
+
+    assert working.load_all.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_zero_interval_turns_reloading_off():
+    reloader = ConfigReloader([MagicMock()], interval=0)
+    reloader.start()
+
+    assert reloader._task is None
+    await reloader.stop()
@@ -0,0 +1,242 @@
+import pytest
+import timeit
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from app.models.schemas import Experiment, ExperimentSamplingCondition, ExperimentSamplingCriterion
+from app.services.criteria_engine import CompiledCriteria, CriteriaEngine, TargetingIndex, compile_condition, index_terms
+from app.services.criteria_loader import CriteriaLoader
+
+
+def make_condition(model, prop, condition, value, criterion_id=None, experiment_id=None):
+    now = datetime.now()
+    return ExperimentSamplingCondition(id=uuid4(), criterion_id=criterion_id or uuid4(),
+                                       experiment_id=experiment_id or uuid4(), model=model, property=prop,
+                                       value=value, condition=condition, created_at=now, updated_at=now)
+
+
+def make_criterion(experiment_id, conditions, criterion_id=None):
+    now = datetime.now()
+    return ExperimentSamplingCriterion(id=criterion_id or uuid4(), experiment_id=experiment_id,
+                                       sampling_model="User", sampling_attribute="attributes",
+                                       conditions=conditions, created_at=now, updated_at=now)
+
+
+@pytest.fixture
+def engine():
+    CriteriaEngine._instance = None
+    return CriteriaEngine()
+
+
+@pytest.mark.parametrize("condition,value,actual,expected", [
+    ("equals", "US", "US", True),
+    ("equals", "US", "IN", False),
+    ("equals", "30", 30, True),
+    ("equals", "30", "30.0", True),
+    ("equals", "true", True, True),
+    ("not_equals", "US", "IN", True),
+    ("gt", "30", 31, True),
+    ("gt", "30", 30, False),
+    ("gte", "30", "30", True),
+    ("lt", "1.5", 1.2, True),
+    ("lte", "30", "abc", False),
+    ("in", "US, IN,GB", "IN", True),
+    ("in", "US,IN", "FR", False),
+    ("not_in", "US,IN", "FR", True),
+    ("contains", "beta", "beta-tester", True),
+    ("contains", "beta", ["alpha", "beta"], True),
+    ("regex", r"^\d{3}-", "555-1234", True),
+    ("regex", r"^\d{3}-", "x555", False),
+])
+def test_compiled_conditions(condition, value, actual, expected):
+    """Test each condition against a single attribute value"""
+    predicate = compile_condition(make_condition("User", "attr", condition, value))
+    assert predicate({"User": {"attr": actual}}) is expected
+
+
+def test_missing_attribute_never_matches():
+    """Test entities without the attribute are not eligible"""
+    predicate = compile_condition(make_condition("User", "country", "not_equals", "US"))
+    assert not predicate({"User": {}})
+    assert not predicate({"Device": {"country": "IN"}})
+    assert not predicate({"User": {"country": None}})
+
+
+@pytest.mark.parametrize("condition,value", [
+    ("between", "1"),
+    ("gte", "thirty"),
+    ("regex", "(unclosed"),
+])
+def test_invalid_conditions_fail_to_compile(condition, value):
+    """Test values are parsed when compiling, not when evaluating"""
+    with pytest.raises(ValueError):
+        compile_condition(make_condition("User", "attr", condition, value))
+
+
+def test_every_criterion_must_pass(engine):
+    """Test conditions and criteria combine with AND and report the failing criterion"""
+    experiment_id = uuid4()
+    geo = make_criterion(experiment_id, [make_condition("User", "country", "equals", "US")])
+    age = make_criterion(experiment_id, [
+        make_condition("User", "age", "gte", "18"),
+        make_condition("User", "age", "lt", "65")
+    ])
+    compiled = engine.configure_experiment(str(experiment_id), [geo, age])
+
+    assert compiled.first_failure({"User": {"country": "US", "age": 30}}) is None
+    assert compiled.first_failure({"User": {"country": "US", "age": 70}}) == str(age.id)
+    assert compiled.first_failure({"User": {"country": "IN", "age": 30}}) == str(geo.id)
+    assert engine.configure_experiment(str(experiment_id), []).evaluate({})
+
+
+def test_configure_bumps_version_and_keeps_last_valid(engine):
+    """Test a failed compile leaves the published version serving and unchanged criteria keep their version"""
+    experiment_id = str(uuid4())
+    first = engine.configure_experiment(experiment_id, [])
+    with pytest.raises(ValueError):
+        engine.configure_experiment(experiment_id, [
+            make_criterion(uuid4(), [make_condition("User", "age", "gte", "old")])
+        ])
+    assert engine.find_compiled(experiment_id) is first
+    assert engine.configure_experiment(experiment_id, []) is first
+
+    second = engine.configure_experiment(experiment_id, [
+        make_criterion(uuid4(), [make_condition("User", "age", "gte", "18")])
+    ])
+    assert second.version > first.version
+    assert engine.remove_experiment(experiment_id)
+    assert engine.find_compiled(experiment_id) is None
+
+
+def test_compiled_criteria_is_immutable():
+    compiled = CompiledCriteria.compile("exp1", 1, [])
+    with pytest.raises(AttributeError):
+        compiled.version = 2
+
+
+def test_evaluation_latency(engine):
+    """Test evaluation of a typical rule set stays in the microsecond range"""
+    experiment_id = uuid4()
+    compiled = engine.configure_experiment(str(experiment_id), [
+        make_criterion(experiment_id, [
+            make_condition("User", "country", "in", "US,IN,GB"),
+            make_condition("User", "age", "gte", "18"),
+            make_condition("User", "email", "regex", r"@example\.com$")
+        ])
+    ])
+    attributes = {"User": {"country": "IN", "age": 30, "email": "a@example.com"}}
+
+    per_call = min(timeit.repeat(lambda: compiled.evaluate(attributes), number=1000, repeat=5)) / 1000
+    assert per_call < 50e-6
+
+
+def test_loader_joins_conditions_to_criteria(engine):
+    """Test load_all compiles active experiments from bulk scans"""
+    experiment_id, stale_id = uuid4(), str(uuid4())
+    engine.configure_experiment(stale_id, [])
+    now = datetime.now()
+    experiment_repo, criterion_repo, condition_repo = MagicMock(), MagicMock(), MagicMock()
+    experiment_repo.list_all.return_value = [
+        Experiment(id=experiment_id, service_id=uuid4(), name="exp", active=True, created_at=now, updated_at=now)
+    ]
+    criterion = make_criterion(experiment_id, [])
+    criterion_repo.list_all.return_value = [criterion]
+    condition_repo.list_all.return_value = [
+        make_condition("User", "country", "equals", "US", criterion.id, experiment_id)
+    ]
+    loader = CriteriaLoader(engine, experiment_repo, criterion_repo, condition_repo)
+
+    assert loader.load_all() == 1
+    assert engine.find_compiled(stale_id) is None
+    assert engine.evaluate(str(experiment_id), {"User": {"country": "US"}})
+    assert not engine.evaluate(str(experiment_id), {"User": {"country": "IN"}})
+
+    experiment_repo.find_by_id.return_value = None
+    assert loader.refresh_experiment(experiment_id) is None
+    assert engine.find_compiled(str(experiment_id)) is None
+
+
+def test_configure_experiments_recompiles_only_changes(engine):
+    """Test a bulk reload keeps unchanged experiments and rebuilds each service index once"""
+    experiments = [str(uuid4()) for _ in range(4)]
+    criteria = {e: [make_criterion(uuid4(), [make_condition("User", "country", "equals", e)])] for e in experiments}
+    published, errors = engine.configure_experiments((e, criteria[e], "svc1") for e in experiments)
+    assert not errors
+
+    changed = experiments[0]
+    criteria[changed] = [make_criterion(uuid4(), [make_condition("User", "country", "equals", "US")])]
+    with patch.object(TargetingIndex, "build", wraps=TargetingIndex.build) as build:
+        reloaded, errors = engine.configure_experiments(
+            [(e, list(reversed(criteria[e])), "svc1") for e in experiments] +
+            [(str(uuid4()), [make_criterion(uuid4(), [make_condition("User", "age", "gte", "old")])], "svc1")]
+        )
+
+    assert build.call_count == 1
+    assert len(errors) == 1
+    assert all(reloaded[e] is published[e] for e in experiments[1:])
+    assert reloaded[changed].version > max(p.version for p in published.values())
+    assert [c.experiment_id for c in engine.eligible_experiments("svc1", {"User": {"country": "US"}})] == [changed]
+
+
+def test_index_terms_pick_the_narrowest_condition():
+    """Test experiments are indexed under their most selective equals/in condition"""
+    experiment_id = uuid4()
+    criteria = [make_criterion(experiment_id, [
+        make_condition("User", "age", "gte", "18"),
+        make_condition("User", "country", "in", "US,IN"),
+        make_condition("User", "plan", "equals", "pro")
+    ])]
+    assert index_terms(criteria) == frozenset({("User", "plan", "pro")})
+    assert index_terms([make_criterion(experiment_id, [make_condition("User", "age", "equals", "30")])]) == \
+        frozenset({("User", "age", 30.0)})
+    assert index_terms([make_criterion(experiment_id, [make_condition("User", "age", "gte", "18")])]) is None
+
+
+def test_targeting_index_candidates():
+    """Test candidates are the posting lists hit plus unindexed experiments"""
+    us = CompiledCriteria.compile("us", 1, [make_criterion(uuid4(), [make_condition("User", "country", "equals", "US")])])
+    adults = CompiledCriteria.compile("adults", 2, [make_criterion(uuid4(), [make_condition("User", "age", "gte", "18")])])
+    thirty = CompiledCriteria.compile("thirty", 3, [make_criterion(uuid4(), [make_condition("User", "age", "equals", "30")])])
+    index = TargetingIndex.build([us, adults, thirty])
+
+    assert index.candidates({"User": {"country": "US"}}) == {"us", "adults"}
+    assert index.candidates({"User": {"country": "IN", "age": "30"}}) == {"adults", "thirty"}
+
+
+def test_eligible_experiments_per_service(engine):
+    """Test service targeting only returns experiments passing their full criteria"""
+    service_id, other_service = str(uuid4()), str(uuid4())
+    us_adults = make_criterion(uuid4(), [
+        make_condition("User", "country", "equals", "US"),
+        make_condition("User", "age", "gte", "18")
+    ])
+    engine.configure_experiment("us_adults", [us_adults], service_id=service_id)
+    engine.configure_experiment("everyone", [], service_id=service_id)
+    engine.configure_experiment("elsewhere", [], service_id=other_service)
+
+    def eligible(attributes):
+        return {c.experiment_id for c in engine.eligible_experiments(service_id, attributes)}
+
+    assert eligible({"User": {"country": "US", "age": 30}}) == {"us_adults", "everyone"}
+    assert eligible({"User": {"country": "US", "age": 12}}) == {"everyone"}
+
+    engine.configure_experiment("everyone", [], service_id=other_service)
+    assert eligible({"User": {"country": "US", "age": 30}}) == {"us_adults"}
+    engine.remove_experiment("us_adults")
+    assert engine.eligible_experiments(service_id, {"User": {"country": "US", "age": 30}}) == []
+
+
+def test_targeting_checks_only_candidates(engine):
+    """Test targeting does not evaluate experiments whose indexed terms the entity lacks"""
+    service_id = str(uuid4())
+    for index in range(500):
+        engine.configure_experiment(f"exp{index}", [
+            make_criterion(uuid4(), [make_condition("User", "segment", "equals", f"segment{index}")])
+        ], service_id=service_id)
+
+    with patch.object(CompiledCriteria, "evaluate", autospec=True, side_effect=lambda self, a: True) as evaluate:
+        eligible = engine.eligible_experiments(service_id, {"User": {"segment": "segment7"}})
+
+    assert [c.experiment_id for c in eligible] == ["exp7"]
+    assert evaluate.call_count == 1
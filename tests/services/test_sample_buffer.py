@@ -0,0 +1,125 @@
+# tests/services/test_sample_buffer.py
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from app.models.schemas import BucketedSample, BucketedSampleCreate
+from app.repositories.cassandra.sample_repository import sample_id
+from app.services.sample_buffer import SampleBufferFull, SampleWriteBuffer
+
+
+def make_samples(count, experiment_id=None):
+    experiment_id = experiment_id or uuid4()
+    return [BucketedSampleCreate(experiment_id=experiment_id, sampled_entity=f"user{index}", sampled_value="US",
+                                 allocated_bucket="a") for index in range(count)]
+
+
+def fake_repo(fail=lambda sample: None):
+    """A repository whose ingest records every batch and fails the samples `fail` returns an error for"""
+    repo = MagicMock()
+    repo.batches = []
+
+    async def ingest(samples):
+        repo.batches.append(list(samples))
+        return [(MagicMock(), fail(sample)) for sample in samples]
+
+    repo.ingest_async = AsyncMock(side_effect=ingest)
+    return repo
+
+
+@pytest.mark.asyncio
+async def test_create_returns_the_rows_that_are_later_written():
+    repo = fake_repo()
+    buffer = SampleWriteBuffer(repo, max_size=10, flush_size=10, flush_interval=0.01)
+    samples = make_samples(2)
+
+    rows = await buffer.create_many_async(samples)
+
+    assert [row.id for row in rows] == [sample_id(s.experiment_id, s.sampled_entity, s.sampled_value)
+                                        for s in samples]
+    assert all(isinstance(row, BucketedSample) and not row.complete for row in rows)
+    assert len(buffer) == 2 and not repo.ingest_async.called
+
+    assert await buffer.flush() == 2
+    written = repo.batches[0]
+    assert [s.created_at for s in written] == [row.created_at for row in rows]
+    assert len(buffer) == 0 and buffer.written == 2
+
+
+@pytest.mark.asyncio
+async def test_pending_samples_are_not_queued_twice():
+    buffer = SampleWriteBuffer(fake_repo(), max_size=10, flush_size=10)
+    sample = make_samples(1)[0]
+
+    first = await buffer.create_async(sample)
+    second = await buffer.create_async(sample.model_copy())
+
+    assert second == first
+    assert len(buffer) == 1
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_sheds_after_the_put_timeout():
+    buffer = SampleWriteBuffer(fake_repo(), max_size=2, flush_size=2, put_timeout=0.01)
+    await buffer.create_many_async(make_samples(2))
+
+    with pytest.raises(SampleBufferFull):
+        await buffer.create_many_async(make_samples(1))
+    # A batch that could never fit is shed without waiting
+    with pytest.raises(SampleBufferFull):
+        await buffer.create_many_async(make_samples(3))
+    assert buffer.shed == 4
+    assert len(buffer) == 2
+
+
+@pytest.mark.asyncio
+async def test_writers_wait_for_room_while_flushing():
+    repo = fake_repo()
+    buffer = SampleWriteBuffer(repo, max_size=2, flush_size=2, flush_interval=0.01, put_timeout=1.0)
+    buffer.start()
+    experiment_id = uuid4()
+    samples = make_samples(6, experiment_id)
+
+    await asyncio.gather(*(buffer.create_async(sample) for sample in samples))
+    assert await buffer.stop() == 0
+
+    assert sorted(s.sampled_entity for batch in repo.batches for s in batch) == \
+        sorted(s.sampled_entity for s in samples)
+    assert all(len(batch) <= 2 for batch in repo.batches)
+
+
+@pytest.mark.asyncio
+async def test_failed_samples_are_retried_then_dropped():
+    attempts = {}
+
+    def fail(sample):
+        attempts[sample.sampled_entity] = attempts.get(sample.sampled_entity, 0) + 1
+        if sample.sampled_entity == "user1" or attempts[sample.sampled_entity] == 1:
+            return TimeoutError("write timed out")
+        return None
+
+    repo = fake_repo(fail)
+    buffer = SampleWriteBuffer(repo, max_size=10, flush_size=10, flush_interval=0.001, max_attempts=3)
+    buffer.start()
+    await buffer.create_many_async(make_samples(2))
+
+    assert await buffer.stop() == 0
+    assert attempts == {"user0": 2, "user1": 3}
+    assert buffer.written == 1 and buffer.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_the_queue_and_closes_the_buffer():
+    repo = fake_repo()
+    buffer = SampleWriteBuffer(repo, max_size=100, flush_size=50, flush_interval=60)
+    buffer.start()
+    await buffer.create_many_async(make_samples(20))
+
+    # The interval is far off, so only the shutdown drain writes the partial batch
+    assert await buffer.stop() == 0
+    assert buffer.written == 20
+
+    with pytest.raises(SampleBufferFull):
+        await buffer.create_many_async(make_samples(1))
@@ -0,0 +1,172 @@
+# tests/services/test_sample_log.py
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from app.models.schemas import BucketedSampleCreate
+from app.services.sample_buffer import SampleWriteBuffer
+from app.services.sample_log import SampleLog, segment_name
+
+
+def make_samples(count, prefix="user"):
+    experiment_id = uuid4()
+    return [BucketedSampleCreate(experiment_id=experiment_id, sampled_entity=f"{prefix}{index}", sampled_value="US",
+                                 allocated_bucket="a", created_at=datetime(2026, 1, 1)) for index in range(count)]
+
+
+def fake_repo(fail=lambda sample: None):
+    repo = MagicMock()
+    repo.written = []
+
+    async def ingest(samples):
+        results = [(MagicMock(), fail(sample)) for sample in samples]
+        repo.written.extend(s for s, (_, error) in zip(samples, results) if error is None)
+        return results
+
+    repo.ingest_async = AsyncMock(side_effect=ingest)
+    return repo
+
+
+@pytest.mark.asyncio
+async def test_concurrent_appends_are_durable_and_deleted_once_acknowledged(tmp_path):
+    log = SampleLog(str(tmp_path))
+    await log.recover(fake_repo())
+    samples = make_samples(10)
+
+    segments = await asyncio.gather(*(log.append([sample]) for sample in samples))
+
+    assert set(segments) == {1}
+    assert (tmp_path / segment_name(1)).read_bytes().count(b"\n") == 10
+    log.ack(1, 10)
+    # The open segment outlives its acknowledgements until it is rolled or closed
+    assert (tmp_path / segment_name(1)).exists()
+    await log.close()
+    assert log.segments() == []
+
+
+@pytest.mark.asyncio
+async def test_segments_roll_and_are_released_independently(tmp_path):
+    log = SampleLog(str(tmp_path), segment_bytes=1)
+    await log.recover(fake_repo())
+
+    first = await log.append(make_samples(1, "a"))
+    second = await log.append(make_samples(1, "b"))
+    third = await log.append(make_samples(1, "c"))
+
+    assert (first, second, third) == (1, 2, 3)
+    log.ack(second)
+    assert log.segments() == [1, 3]
+    log.ack(first)
+    assert log.segments() == [3]
+
+
+@pytest.mark.asyncio
+async def test_recover_replays_what_a_crash_left_behind(tmp_path):
+    crashed = SampleLog(str(tmp_path), segment_bytes=1)
+    await crashed.recover(fake_repo())
+    samples = make_samples(3)
+    for sample in samples:
+        await crashed.append([sample])
+    crashed.ack(1)
+    # A torn record from a crash in the middle of an append
+    with open(tmp_path / segment_name(3), "ab") as file:
+        file.write(b'{"experiment_id": "')
+    crashed._lock_file.close()
+
+    repo = fake_repo()
+    restarted = SampleLog(str(tmp_path))
+    assert await restarted.recover(repo) == 2
+    assert repo.written == samples[1:]
+    assert restarted.segments() == [4]
+
+
+@pytest.mark.asyncio
+async def test_recover_keeps_segments_that_fail_to_replay(tmp_path):
+    crashed = SampleLog(str(tmp_path))
+    await crashed.recover(fake_repo())
+    await crashed.append(make_samples(2))
+    crashed._lock_file.close()
+
+    restarted = SampleLog(str(tmp_path))
+    await restarted.recover(fake_repo(lambda s: TimeoutError() if s.sampled_entity == "user1" else None))
+    assert restarted.segments() == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_directory_is_locked_to_one_process(tmp_path):
+    log = SampleLog(str(tmp_path))
+    await log.recover(fake_repo())
+
+    with pytest.raises(RuntimeError):
+        await SampleLog(str(tmp_path)).recover(fake_repo())
+    await log.close()
+
+
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_a_root_log_to_their_own_directories(tmp_path):
+    first = SampleLog.for_worker(str(tmp_path), "1")
+    second = SampleLog.for_worker(str(tmp_path), "2")
+    await first.recover(fake_repo())
+    await second.recover(fake_repo())
+
+    assert await first.append(make_samples(1)) == 1
+    assert await second.append(make_samples(1)) == 1
+    assert (tmp_path / "1" / segment_name(1)).exists() and (tmp_path / "2" / segment_name(1)).exists()
+    await first.close()
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_recover_replays_logs_of_exited_workers_only(tmp_path):
+    live = SampleLog.for_worker(str(tmp_path), "live")
+    await live.recover(fake_repo())
+    await live.append(make_samples(1, "live"))
+    exited = SampleLog.for_worker(str(tmp_path), "exited")
+    await exited.recover(fake_repo())
+    samples = make_samples(2)
+    await exited.append(samples)
+    exited._lock_file.close()
+
+    repo = fake_repo()
+    restarted = SampleLog.for_worker(str(tmp_path), "restarted")
+    assert await restarted.recover(repo) == 2
+
+    assert repo.written == samples
+    assert not (tmp_path / "exited").exists()
+    assert live.segments() == [1]
+    await live.close()
+    await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_exited_worker_log_is_kept_until_fully_replayed(tmp_path):
+    exited = SampleLog.for_worker(str(tmp_path), "exited")
+    await exited.recover(fake_repo())
+    await exited.append(make_samples(2))
+    exited._lock_file.close()
+
+    restarted = SampleLog.for_worker(str(tmp_path), "restarted")
+    await restarted.recover(fake_repo(lambda s: TimeoutError() if s.sampled_entity == "user1" else None))
+
+    assert SampleLog(str(tmp_path / "exited")).segments() == [1]
+    await restarted.close()
+@pytest.mark.asyncio
+async def test_buffer_acknowledges_written_samples_and_keeps_dropped_ones(tmp_path):
+    log = SampleLog(str(tmp_path))
+    await log.recover(fake_repo())
+    repo = fake_repo(lambda s: TimeoutError() if s.sampled_entity == "user1" else None)
+    buffer = SampleWriteBuffer(repo, max_size=10, flush_size=10, flush_interval=0.001, max_attempts=2, log=log)
+    buffer.start()
+
+    await buffer.create_many_async(make_samples(3))
+    await buffer.stop()
+
+    assert buffer.written == 2 and buffer.failed == 1
+    # The dropped sample is still in the log for the next startup
+    assert log.segments() == [1]
+    assert b"user1" in (tmp_path / segment_name(1)).read_bytes()